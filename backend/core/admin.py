@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SystemSetting
+from .models import SystemSetting, TranslationCache
 
 @admin.register(SystemSetting)
 class SystemSettingAdmin(admin.ModelAdmin):
@@ -7,4 +7,11 @@ class SystemSettingAdmin(admin.ModelAdmin):
     
     # This removes the "Add" button if the settings row already exists
     def has_add_permission(self, request):
-        return not SystemSetting.objects.exists()
\ No newline at end of file
+        return not SystemSetting.objects.exists()
+
+@admin.register(TranslationCache)
+class TranslationCacheAdmin(admin.ModelAdmin):
+    list_display = ('source_text', 'lang', 'translated_text', 'created_at')
+    list_filter = ('lang',)
+    search_fields = ('source_text', 'translated_text')
+    readonly_fields = ('source_hash', 'created_at')
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+# A claim outlives any normal request; if the worker dies mid-request the key frees itself after this
+IN_PROGRESS_TIMEOUT = 60
+
+REPLAY_HEADER = 'Idempotent-Replayed'
+
+
+def idempotency_cache_key(scope, key):
+    # Hashed so arbitrary client strings are safe cache keys
+    return f"idempotency:{scope}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def request_fingerprint(data):
+    """ Hash of the request body, to tell a genuine retry from a reused key with a different payload """
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def run_idempotent(scope, key, fingerprint, handler, in_progress=None, mismatch=None, store=None):
+    """
+    Runs handler() (which returns a DRF Response) at most once per (scope, key) within
+    IDEMPOTENCY_KEY_TTL. Retries with the same key get the stored response back with an
+    Idempotent-Replayed header, without the handler's validation, inserts or notifications running again.
+
+    - A retry that arrives while the first request is still running gets `in_progress` (default 409).
+    - The same key with a different body gets `mismatch` (default 422).
+    - Only responses `store(response)` accepts are kept (default: 2xx). A 4xx such as "fully booked"
+      may not hold on retry, so it is only kept when the caller's `store` says it is final.
+      Otherwise, and when the handler raises, the key is released so the client can retry.
+    """
+    cache_key = idempotency_cache_key(scope, key)
+    if not cache.add(cache_key, {'state': 'running', 'fingerprint': fingerprint}, IN_PROGRESS_TIMEOUT):
+        record = cache.get(cache_key)
+        if record is None:  # Expired between the two calls: treat as a fresh request
+            return run_idempotent(scope, key, fingerprint, handler, in_progress, mismatch, store)
+        if record['fingerprint'] != fingerprint:
+            return mismatch or Response({"error": "This Idempotency-Key was already used for a different request."}, status=422)
+        if record['state'] == 'running':
+            return in_progress or Response({"error": "A request with this Idempotency-Key is still being processed."}, status=409)
+        return Response(record['data'], status=record['status'], headers={REPLAY_HEADER: 'true'})
+
+    try:
+        response = handler()
+    except Exception:
+        cache.delete(cache_key)
+        raise
+
+    if (store or (lambda r: 200 <= r.status_code < 300))(response):
+        cache.set(cache_key, {
+            'state': 'done', 'fingerprint': fingerprint, 'status': response.status_code, 'data': response.data,
+        }, getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))
+    else:
+        cache.delete(cache_key)
+    return response
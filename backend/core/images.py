@@ -0,0 +1,97 @@
+import os
+from io import BytesIO
+from PIL import Image, features
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.db import transaction
+from .models import ImageDerivative
+
+DERIVATIVE_WIDTHS = (320, 640, 1200)
+
+# (format, Pillow encoder name, encoder options)
+ENCODINGS = [
+    ('webp', 'WEBP', {'quality': 75, 'method': 4}),
+    ('avif', 'AVIF', {'quality': 55}),
+]
+
+
+def available_encodings():
+    """ WEBP always; AVIF only where this Pillow build ships the encoder """
+    return [encoding for encoding in ENCODINGS if features.check(encoding[0])]
+
+
+def _target_widths(original_width):
+    # Never upscale: small originals get a single variant at their own width
+    widths = [width for width in DERIVATIVE_WIDTHS if width < original_width]
+    return widths + [min(original_width, DERIVATIVE_WIDTHS[-1])]
+
+
+def _resized(image_file, width):
+    """
+    Decodes the original straight at (roughly) the target size. Image.draft lets the JPEG
+    decoder skip the DCT scales it does not need, so a 6000px upload never decodes at full size.
+    """
+    image_file.seek(0)
+    img = Image.open(image_file)
+    height = max(1, round(img.height * width / img.width))
+    img.draft('RGB', (width, height))
+    img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    img.thumbnail((width, height), Image.LANCZOS)
+    return img
+
+
+def generate_derivatives(instance, field_name='image'):
+    """ (Re)builds every variant of instance.<field_name> and replaces the previous set """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return []
+
+    with field_file.open('rb') as original:
+        data = BytesIO(original.read())
+    with Image.open(data) as probe:
+        original_width = probe.width
+
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    content_type = ContentType.objects.get_for_model(instance)
+    derivatives = []
+    for width in sorted(set(_target_widths(original_width))):
+        img = _resized(data, width)
+        for fmt, encoder, options in available_encodings():
+            buffer = BytesIO()
+            img.save(buffer, format=encoder, **options)
+            derivative = ImageDerivative(
+                content_type=content_type, object_id=instance.pk, field_name=field_name,
+                source_name=field_file.name, format=fmt, width=img.width, height=img.height,
+            )
+            derivative.file.save(f"{stem}-{width}w.{fmt}", ContentFile(buffer.getvalue()), save=False)
+            derivatives.append(derivative)
+
+    with transaction.atomic():
+        stale = ImageDerivative.objects.filter(content_type=content_type, object_id=instance.pk, field_name=field_name)
+        stale_files = [d.file.name for d in stale]
+        stale.delete()
+        ImageDerivative.objects.bulk_create(derivatives)
+
+    storage = field_file.storage
+    transaction.on_commit(lambda: [storage.delete(name) for name in stale_files])
+    return derivatives
+
+
+def build_srcset(instance, field_name='image', request=None):
+    """
+    {'webp': 'url 320w, url 640w, ...', 'avif': ...} for a <picture> element, built from
+    instance.image_derivatives (prefetch it for lists). Only variants of the current file count.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return {}
+
+    srcset = {}
+    for derivative in instance.image_derivatives.all():
+        if derivative.field_name != field_name or derivative.source_name != field_file.name:
+            continue
+        url = derivative.file.url
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        srcset.setdefault(derivative.format, []).append((derivative.width, f"{url} {derivative.width}w"))
+    return {fmt: ', '.join(entry for _, entry in sorted(entries)) for fmt, entries in srcset.items()}
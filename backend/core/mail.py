@@ -0,0 +1,160 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+logger = logging.getLogger(__name__)
+
+# Connection-level failures worth one reconnect + retry (a refused recipient is not)
+RETRYABLE_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def build_email(subject, body, to, html=None, attachments=None, from_email=None):
+    """ An EmailMultiAlternatives ready for MailDispatcher.send (attachments: [(filename, content, mimetype)]) """
+    msg = EmailMultiAlternatives(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        to=to,
+    )
+    if html:
+        msg.attach_alternative(html, "text/html")
+    for attachment in attachments or []:
+        msg.attach(*attachment)
+    return msg
+
+
+class MailDispatcher:
+    """
+    Sends email over one long-lived connection per process (each Celery worker child gets its own).
+    The connection is reopened after MAIL_CONNECTION_IDLE_TIMEOUT seconds of inactivity, or when the
+    server drops it mid-batch, and every batch records its latency in `recent_batches`.
+    """
+
+    def __init__(self, idle_timeout=None, history=100):
+        self.idle_timeout = idle_timeout
+        self.connection = None
+        self.last_used = 0
+        self.lock = threading.Lock()
+        self.recent_batches = deque(maxlen=history)
+        self.totals = {'batches': 0, 'sent': 0, 'failed': 0, 'reconnects': 0}
+        self._connect_seconds = 0
+
+    def get_idle_timeout(self):
+        if self.idle_timeout is not None:
+            return self.idle_timeout
+        return getattr(settings, 'MAIL_CONNECTION_IDLE_TIMEOUT', 60)
+
+    def _connect(self):
+        self.close()
+        started = time.monotonic()
+        self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+        self._connect_seconds += time.monotonic() - started
+        return self.connection
+
+    def _ensure_connection(self):
+        """ Reuses the pooled connection while it is fresh, otherwise opens a new one """
+        if self.connection is not None and time.monotonic() - self.last_used < self.get_idle_timeout():
+            return self.connection
+        return self._connect()
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass  # The server may already have hung up; nothing left to clean
+            self.connection = None
+
+    def _send_one(self, msg):
+        """ Returns (sent, reconnects) for one message on the pooled connection """
+        connection = self._ensure_connection()
+        try:
+            return connection.send_messages([msg]) or 0, 0
+        except RETRYABLE_ERRORS:
+            # Stale or dropped connection: one fresh connection, one retry for this message
+            return self._connect().send_messages([msg]) or 0, 1
+
+    def send_each(self, messages):
+        """
+        Sends a batch of EmailMessages over the pooled connection and returns one error (or None)
+        per message, in order. A failing message does not stop the rest of the batch.
+        """
+        errors = [None if msg.recipients() else ValueError("Message has no recipients") for msg in messages]
+        pending = [(i, msg) for i, msg in enumerate(messages) if errors[i] is None]
+        if not pending:
+            return errors
+
+        with self.lock:
+            started = time.monotonic()
+            self._connect_seconds = 0
+            sent = reconnects = 0
+            last_error = None
+
+            for i, msg in pending:
+                try:
+                    ok, retried = self._send_one(msg)
+                    sent += ok
+                    reconnects += retried
+                except Exception as e:
+                    errors[i] = last_error = e
+                    self.close()
+                self.last_used = time.monotonic()
+
+            self._record(len(pending), sent, reconnects, started, self._connect_seconds, last_error)
+        return errors
+
+    def send(self, messages, fail_silently=False):
+        """
+        Sends a batch of EmailMessages over the pooled connection. A failing message does not stop
+        the rest of the batch; the last error is raised afterwards unless fail_silently.
+        Returns the number sent.
+        """
+        messages = [msg for msg in messages if msg.recipients()]
+        errors = self.send_each(messages)
+        failures = [error for error in errors if error is not None]
+        if failures and not fail_silently:
+            raise failures[-1]
+        return len(messages) - len(failures)
+
+    def _record(self, size, sent, reconnects, started, connect_seconds, error):
+        stats = {
+            'size': size,
+            'sent': sent,
+            'reconnects': reconnects,
+            'connect_ms': round(connect_seconds * 1000, 1),
+            'total_ms': round((time.monotonic() - started) * 1000, 1),
+            'error': str(error) if error else None,
+        }
+        self.recent_batches.append(stats)
+        self.totals['batches'] += 1
+        self.totals['sent'] += sent
+        self.totals['failed'] += size - sent
+        self.totals['reconnects'] += reconnects
+        logger.debug(
+            "Mail batch: %s/%s sent in %sms (connect %sms, %s reconnects)%s",
+            sent, size, stats['total_ms'], stats['connect_ms'], reconnects, f" - error: {error}" if error else "",
+        )
+
+    def metrics(self):
+        """ Lifetime totals for this process plus latency figures over the recent batches """
+        latencies = [batch['total_ms'] for batch in self.recent_batches]
+        return {
+            **self.totals,
+            'recent_batches': len(latencies),
+            'avg_batch_ms': round(sum(latencies) / len(latencies), 1) if latencies else 0,
+            'max_batch_ms': max(latencies, default=0),
+            'last_batch': self.recent_batches[-1] if self.recent_batches else None,
+        }
+
+
+# One dispatcher (and therefore one SMTP connection) per process
+dispatcher = MailDispatcher()
+
+
+def send_emails(messages, fail_silently=False):
+    return dispatcher.send(messages, fail_silently=fail_silently)
@@ -0,0 +1,29 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from core.models import ImageDerivativesModel
+from core.tasks import generate_image_derivatives
+
+class Command(BaseCommand):
+    help = 'Queues responsive image variants for existing uploads (all image models, or --model app_label.model).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', help='e.g. marketing.post')
+        parser.add_argument('--sync', action='store_true', help='Build in this process instead of queueing Celery tasks')
+
+    def handle(self, *args, **options):
+        models = [apps.get_model(options['model'])] if options['model'] else [
+            model for model in apps.get_models() if issubclass(model, ImageDerivativesModel)
+        ]
+
+        for model in models:
+            label = model._meta.label_lower
+            for field in model.DERIVATIVE_FIELDS:
+                ids = model.objects.exclude(**{field: ''}).exclude(**{f"{field}__isnull": True}).values_list('pk', flat=True)
+                count = 0
+                for pk in ids.iterator():
+                    if options['sync']:
+                        generate_image_derivatives(label, pk, field)
+                    else:
+                        generate_image_derivatives.delay(label, pk, field)
+                    count += 1
+                self.stdout.write(f"{label}.{field}: {count} images {'processed' if options['sync'] else 'queued'}")
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0002_translation_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('field_name', models.CharField(default='image', max_length=50)),
+                ('source_name', models.CharField(help_text='Name of the original file this was built from', max_length=255)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(help_text='e.g. webp, avif', max_length=10)),
+                ('file', models.ImageField(upload_to='derivatives/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['format', 'width'],
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='image_derivative_source_idx')],
+            },
+        ),
+    ]
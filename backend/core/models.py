@@ -1,32 +1,168 @@
-from django.db import models
+import copy
+import uuid
+from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import models, transaction
 
-class SystemSetting(models.Model):
-    enable_sms_notifications = models.BooleanField(
-        default=True,
-        help_text="Uncheck this to completely disable all SMS sending globally (useful for testing)."
-    )
+class SingletonModel(models.Model):
+    """
+    Base for one-row global settings tables.
+
+    load() is served from process memory, revalidated on every call against a version key in the
+    shared cache (one cache GET): no query while the version is unchanged, one reload as soon as
+    save() has bumped it from any gunicorn or Celery process. Callers get their own copy, so
+    changing it never leaks into other requests.
+    """
+    # {model label: {'obj': instance, 'version': str}}
+    _local_cache = {}
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def cache_version_key(cls):
+        return f"singleton_version:{cls._meta.label_lower}"
 
     def save(self, *args, **kwargs):
         # If a setting row already exists and we are trying to create a new one, 
         # force it to update the existing row instead.
-        if SystemSetting.objects.exists() and not self.pk:
-            self.pk = SystemSetting.objects.first().pk
-        super(SystemSetting, self).save(*args, **kwargs)
+        model = type(self)
+        if not self.pk and model.objects.exists():
+            self.pk = model.objects.first().pk
+        super().save(*args, **kwargs)
+        model.invalidate_cache()
 
     def delete(self, *args, **kwargs):
         pass # Prevent accidental deletion
 
+    @classmethod
+    def invalidate_cache(cls):
+        """ Drops this process's copy now and tells every other process once the write is committed """
+        SingletonModel._local_cache.pop(cls._meta.label_lower, None)
+
+        def bump():
+            try:
+                cache.set(cls.cache_version_key(), uuid.uuid4().hex, None)
+            except Exception as e:
+                print(f"Settings cache version bump failed: {e}")
+
+        transaction.on_commit(bump)
+
+    @classmethod
+    def _current_version(cls):
+        try:
+            key = cls.cache_version_key()
+            version = cache.get(key)
+            if version is None:
+                cache.add(key, uuid.uuid4().hex, None)
+                version = cache.get(key)
+            return version
+        except Exception:
+            return None # Shared cache unreachable: fall back to the database
+
     @classmethod
     def load(cls):
+        label = cls._meta.label_lower
+        entry = SingletonModel._local_cache.get(label)
+        version = cls._current_version()
+        if entry and version is not None and entry['version'] == version:
+            return copy.copy(entry['obj'])
+
         # Safely get the first object, regardless of what its Primary Key is
         obj = cls.objects.first()
         if not obj:
             obj = cls.objects.create()
+        SingletonModel._local_cache[label] = {'obj': copy.copy(obj), 'version': version}
         return obj
 
+class SystemSetting(SingletonModel):
+    enable_sms_notifications = models.BooleanField(
+        default=True,
+        help_text="Uncheck this to completely disable all SMS sending globally (useful for testing)."
+    )
+
     class Meta:
         verbose_name = "System Setting"
         verbose_name_plural = "System Settings"
 
     def __str__(self):
-        return "Global System Settings"
\ No newline at end of file
+        return "Global System Settings"
+class TranslationCache(models.Model):
+    """ Machine translations keyed by (source text hash, target language), shared by every translated model """
+    source_hash = models.CharField(max_length=64, help_text="SHA-256 of the source text")
+    lang = models.CharField(max_length=10)
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source_hash', 'lang'], name='unique_translation_per_lang'),
+        ]
+
+    def __str__(self):
+        return f"[{self.lang}] {self.source_text[:50]}"
+
+class ImageDerivative(models.Model):
+    """ A resized / re-encoded copy of an uploaded image, produced by core.tasks.generate_image_derivatives """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    source = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(max_length=50, default='image')
+    source_name = models.CharField(max_length=255, help_text="Name of the original file this was built from")
+
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10, help_text="e.g. webp, avif")
+    file = models.ImageField(upload_to='derivatives/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['format', 'width']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id'], name='image_derivative_source_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_name} @{self.width}w ({self.format})"
+
+class ImageDerivativesModel(models.Model):
+    """
+    Abstract base for models with uploaded images. Originals are stored untouched on save; when
+    one of DERIVATIVE_FIELDS changes, responsive variants are built in the background after commit.
+    """
+    DERIVATIVE_FIELDS = ('image',)
+
+    image_derivatives = GenericRelation(ImageDerivative)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image_names = instance._image_names()
+        return instance
+
+    def _image_names(self):
+        return {
+            field: getattr(self, field).name or ''
+            for field in self.DERIVATIVE_FIELDS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        loaded = getattr(self, '_loaded_image_names', {})
+        changed = [field for field, name in self._image_names().items() if name and loaded.get(field) != name]
+        self._loaded_image_names = self._image_names()
+        if changed:
+            from .tasks import generate_image_derivatives
+            label, pk = self._meta.label_lower, self.pk
+            for field in changed:
+                transaction.on_commit(lambda field=field: generate_image_derivatives.delay(label, pk, field))
+
+    def derivatives_built(self, field_name):
+        """ Called once new variants are stored; override to refresh caches that embed the srcset """
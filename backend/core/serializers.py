@@ -1 +1,16 @@
+from rest_framework import serializers
+from .images import build_srcset
 
+
+class ImageSrcsetField(serializers.Field):
+    """
+    Read-only {'webp': 'url 320w, url 640w, ...', 'avif': ...} of an ImageDerivativesModel image.
+    Empty until the variants are built; prefetch 'image_derivatives' for lists.
+    """
+
+    def __init__(self, image_field='image', **kwargs):
+        self.image_field = image_field
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, instance):
+        return build_srcset(instance, self.image_field, self.context.get('request'))
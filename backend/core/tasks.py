@@ -0,0 +1,19 @@
+from celery import shared_task
+from django.apps import apps
+from .images import generate_derivatives
+
+
+@shared_task
+def generate_image_derivatives(model_label, pk, field_name='image'):
+    """ Builds the responsive WEBP/AVIF variants of one uploaded image """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+    try:
+        derivatives = generate_derivatives(instance, field_name)
+    except Exception as e:
+        print(f"Image derivative error ({model_label} #{pk}.{field_name}): {e}")
+        return
+    instance.derivatives_built(field_name)
+    return f"Built {len(derivatives)} variants for {model_label} #{pk}."
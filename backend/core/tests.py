@@ -1,3 +1,174 @@
-from django.test import TestCase
+import shutil
+import smtplib
+import tempfile
+from io import BytesIO
+from PIL import Image
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .mail import MailDispatcher, build_email
+from reservations.models import DiningArea
+from .images import available_encodings, build_srcset
+from .models import ImageDerivative, SingletonModel, SystemSetting, TranslationCache
+from .translation import OfflineBackend, translate_html
 
-# Create your tests here.
+
+class CountingBackend(EmailBackend):
+    """ locmem backend that counts opened connections and can drop the next send like a stale SMTP socket """
+    opened = 0
+    drop_next = False
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        if CountingBackend.drop_next:
+            CountingBackend.drop_next = False
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='core.tests.CountingBackend', EMAIL_HOST_USER='noreply@goldenbay.com.ph')
+class MailDispatcherTests(TestCase):
+
+    def setUp(self):
+        CountingBackend.opened = 0
+        CountingBackend.drop_next = False
+        self.dispatcher = MailDispatcher(idle_timeout=60)
+
+    def emails(self, count):
+        return [build_email('Hello', 'Body', [f'guest{i}@example.com'], html='<p>Body</p>') for i in range(count)]
+
+    def test_batches_reuse_one_connection(self):
+        self.assertEqual(self.dispatcher.send(self.emails(3)), 3)
+        self.assertEqual(self.dispatcher.send(self.emails(2)), 2)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(self.dispatcher.metrics()['batches'], 2)
+
+    def test_reconnects_after_dropped_connection(self):
+        self.dispatcher.send(self.emails(1))
+        CountingBackend.drop_next = True
+
+        self.assertEqual(self.dispatcher.send(self.emails(2)), 2)
+        self.assertEqual(CountingBackend.opened, 2)
+        self.assertEqual(self.dispatcher.recent_batches[-1]['reconnects'], 1)
+
+    def test_idle_connection_is_replaced(self):
+        self.dispatcher.idle_timeout = 0
+        self.dispatcher.send(self.emails(1))
+        self.dispatcher.send(self.emails(1))
+        self.assertEqual(CountingBackend.opened, 2)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class SingletonCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        SingletonModel._local_cache.clear()
+        self.addCleanup(SingletonModel._local_cache.clear)
+
+    def test_load_is_served_from_memory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemSetting.load()  # Creates the row
+        SystemSetting.load()
+        with self.assertNumQueries(0):
+            for _ in range(100):
+                self.assertTrue(SystemSetting.load().enable_sms_notifications)
+
+    def test_callers_get_their_own_copy(self):
+        setting = SystemSetting.load()
+        setting.enable_sms_notifications = False
+        self.assertTrue(SystemSetting.load().enable_sms_notifications)
+        self.assertIsNot(SystemSetting.load(), SystemSetting.load())
+
+    def test_save_invalidates_other_processes(self):
+        SystemSetting.load()
+
+        # Simulate another worker: its local copy survives, but save() bumps the shared version key
+        stale = dict(SingletonModel._local_cache)
+        with self.captureOnCommitCallbacks(execute=True):
+            setting = SystemSetting.objects.get()
+            setting.enable_sms_notifications = False
+            setting.save()
+        SingletonModel._local_cache.update(stale)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(SystemSetting.load().enable_sms_notifications)
+        with self.assertNumQueries(0):
+            SystemSetting.load()
+
+
+class TranslationServiceTests(TestCase):
+
+    def test_segments_are_deduplicated_batched_and_cached(self):
+        html = "<h1>Dim Sum Festival</h1><p>Dim Sum Festival</p><p>  Book\n  now!  <b>Limited</b></p><!-- internal -->"
+        backend = OfflineBackend()
+
+        result = translate_html(html, 'ja', backend)
+
+        self.assertEqual(backend.calls, [('ja', ['Book now!', 'Dim Sum Festival', 'Limited'])])
+        self.assertIn("<h1>[ja] Dim Sum Festival</h1>", result)
+        self.assertIn("<p>  [ja] Book now!  <b>[ja] Limited</b></p>", result)
+        self.assertIn("<!-- internal -->", result)
+
+        # Second post sharing a segment: only the new text reaches the backend
+        translate_html("<p>Limited</p><p>Free parking</p>", 'ja', backend)
+        self.assertEqual(backend.calls[-1], ('ja', ['Free parking']))
+        self.assertEqual(TranslationCache.objects.filter(lang='ja').count(), 4)
+
+
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, CELERY_TASK_ALWAYS_EAGER=True)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, size):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(buffer, format='JPEG')
+        return SimpleUploadedFile('room.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_are_built_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            room = DiningArea.objects.create(name="VIP 1", area_type='VIP', capacity=10, image=self.upload((2000, 1000)))
+
+        formats = [fmt for fmt, _, _ in available_encodings()]
+        variants = ImageDerivative.objects.filter(object_id=room.pk)
+        self.assertEqual(sorted(set(variants.values_list('width', flat=True))), [320, 640, 1200])
+        self.assertEqual(variants.count(), 3 * len(formats))
+        self.assertEqual(variants.get(width=640, format='webp').height, 320)
+        self.assertTrue(room.image.name.endswith('.jpg'))  # The original is kept untouched
+
+        srcset = build_srcset(DiningArea.objects.prefetch_related('image_derivatives').get(pk=room.pk))
+        self.assertEqual(set(srcset), set(formats))
+        self.assertRegex(srcset['webp'], r'-320w\.webp 320w, .*-640w\.webp 640w, .*-1200w\.webp 1200w$')
+
+        room_payload = APIClient().get('/api/reservations/rooms/').json()[0]
+        self.assertEqual(room_payload['srcset']['webp'].split(', ')[0].split(' ')[1], '320w')
+        self.assertTrue(room_payload['srcset']['webp'].startswith('http://testserver/'))
+
+    def test_small_images_are_not_upscaled_and_replacements_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            room = DiningArea.objects.create(name="VIP 2", area_type='VIP', capacity=10, image=self.upload((400, 300)))
+        self.assertEqual(sorted(set(ImageDerivative.objects.values_list('width', flat=True))), [320, 400])
+
+        room = DiningArea.objects.get(pk=room.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            room.name = "VIP 2 (renamed)"
+            room.save()  # Same image: nothing is rebuilt
+        self.assertEqual(ImageDerivative.objects.count(), 2 * len(available_encodings()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            room.image = self.upload((800, 600))
+            room.save()
+        self.assertEqual(sorted(set(ImageDerivative.objects.values_list('width', flat=True))), [320, 640, 800])
@@ -0,0 +1,140 @@
+import hashlib
+import re
+from bs4 import BeautifulSoup, Comment
+from django.conf import settings
+from django.utils.module_loading import import_string
+from .models import TranslationCache
+
+# Google's web endpoint rejects requests over 5,000 characters
+MAX_REQUEST_CHARS = 4500
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def normalize_segment(text):
+    # HTML collapses whitespace anyway; one-line segments keep the batch separator unambiguous
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class GoogleBackend:
+    """
+    Google Translate through deep_translator. Segments are packed one per line into as few
+    requests as the size limit allows; a pack whose line count comes back different is
+    retried segment by segment.
+    """
+
+    def __init__(self, source='en'):
+        self.source = source
+
+    def translate_batch(self, segments, lang):
+        from deep_translator import GoogleTranslator
+        translator = GoogleTranslator(source=self.source, target=lang)
+
+        results = []
+        for pack in self._packs(segments):
+            translated = (translator.translate('\n'.join(pack)) or '').split('\n')
+            if len(translated) != len(pack):
+                translated = [translator.translate(segment) for segment in pack]
+            results.extend(translated)
+        return results
+
+    @staticmethod
+    def _packs(segments):
+        pack, size = [], 0
+        for segment in segments:
+            if pack and size + len(segment) + 1 > MAX_REQUEST_CHARS:
+                yield pack
+                pack, size = [], 0
+            pack.append(segment)
+            size += len(segment) + 1
+        if pack:
+            yield pack
+
+
+class OfflineBackend:
+    """ Network-free stand-in for tests and local development: tags each segment with its language """
+
+    def __init__(self):
+        self.calls = []
+
+    def translate_batch(self, segments, lang):
+        self.calls.append((lang, list(segments)))
+        return [f"[{lang}] {segment}" for segment in segments]
+
+
+def get_backend():
+    return import_string(getattr(settings, 'TRANSLATION_BACKEND', 'core.translation.GoogleBackend'))()
+
+
+def translate_texts(texts, lang, backend=None):
+    """
+    Returns {text: translation} for the given texts. Segments are deduplicated, served from
+    TranslationCache where possible, and only the misses go to the backend in one batch.
+    """
+    segments = {normalize_segment(text) for text in texts if text and text.strip()}
+    if not segments:
+        return {}
+
+    hashes = {text_hash(segment): segment for segment in segments}
+    known = dict(
+        TranslationCache.objects.filter(lang=lang, source_hash__in=hashes).values_list('source_hash', 'translated_text')
+    )
+    translated = {hashes[h]: text for h, text in known.items()}
+
+    missing = sorted(segment for h, segment in hashes.items() if h not in known)
+    if missing:
+        backend = backend or get_backend()
+        results = backend.translate_batch(missing, lang)
+        fresh = {
+            segment: result for segment, result in zip(missing, results) if result
+        }
+        TranslationCache.objects.bulk_create([
+            TranslationCache(source_hash=text_hash(segment), lang=lang, source_text=segment, translated_text=result)
+            for segment, result in fresh.items()
+        ], ignore_conflicts=True)
+        translated.update(fresh)
+
+    # Untranslatable segments fall back to the original text
+    return {text: translated.get(normalize_segment(text), text) for text in texts if text and text.strip()}
+
+
+def _text_nodes(soup):
+    return [
+        node for node in soup.find_all(string=True)
+        if node.strip() and not isinstance(node, Comment) and node.parent.name not in ('script', 'style')
+    ]
+
+
+def translate_fields(fields, lang, html_fields=(), backend=None):
+    """
+    Translates several fields of one record, e.g. {'title': ..., 'content': ...}, with every segment
+    in a single translate_texts call. Fields named in `html_fields` have their text nodes translated
+    and their markup preserved. Returns {name: translation}; empty fields stay empty.
+    """
+    soups = {name: BeautifulSoup(value, 'html.parser') for name, value in fields.items() if value and name in html_fields}
+    nodes = {name: _text_nodes(soup) for name, soup in soups.items()}
+    segments = [value for name, value in fields.items() if value and name not in soups]
+    segments += [str(node) for field_nodes in nodes.values() for node in field_nodes]
+    translations = translate_texts(segments, lang, backend)
+
+    result = {}
+    for name, value in fields.items():
+        if not value:
+            result[name] = ""
+        elif name not in soups:
+            result[name] = translations.get(value, value)
+        else:
+            for node in nodes[name]:
+                original = str(node)
+                leading = original[:len(original) - len(original.lstrip())]
+                trailing = original[len(original.rstrip()):]
+                node.replace_with(leading + translations.get(original, original.strip()) + trailing)
+            result[name] = str(soups[name])
+    return result
+
+
+def translate_html(html_content, lang, backend=None):
+    """ Translates the text nodes of an HTML fragment, preserving its markup """
+    return translate_fields({'html': html_content}, lang, html_fields=['html'], backend=backend)['html']
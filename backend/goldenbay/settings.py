@@ -9,6 +9,7 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 from celery.schedules import crontab
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -176,6 +177,10 @@ CORS_ALLOWED_ORIGINS = [
     "https://www.goldenbay.com.ph", 
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
+# How long a booking's Idempotency-Key (or Messenger message id) replays the first response
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
 
 # EMAIL SETTINGS
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -184,6 +189,15 @@ EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+# core.mail keeps one SMTP connection per worker process; reopen it after this many idle seconds
+MAIL_CONNECTION_IDLE_TIMEOUT = int(os.getenv('MAIL_CONNECTION_IDLE_TIMEOUT', 60))
+
+# SMS GATEWAY (reservations.sms): concurrent requests per worker process and per-request timeout
+SMS_MAX_WORKERS = int(os.getenv('SMS_MAX_WORKERS', 8))
+SMS_TIMEOUT = int(os.getenv('SMS_TIMEOUT', 10))
+
+# Machine translation for posts (core.translation); use core.translation.OfflineBackend to stay off the network
+TRANSLATION_BACKEND = os.getenv('TRANSLATION_BACKEND', 'core.translation.GoogleBackend')
 
 # CELERY SETTINGS
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -203,4 +217,24 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'reservations.tasks.send_birthday_promos',
         'schedule': crontab(hour=11, minute=0),
     },
+    'reconcile-occupancy-cache': {
+        'task': 'reservations.tasks.reconcile_occupancy_cache',
+        'schedule': crontab(minute='*/15'),
+    },
+    'reconcile-hall-seats': {
+        'task': 'reservations.tasks.reconcile_hall_seats',
+        'schedule': crontab(minute='*/15'),
+    },
+    'reconcile-daily-rollups': {
+        'task': 'reservations.tasks.reconcile_daily_rollups',
+        'schedule': crontab(minute=30),
+    },
+    'sync-reservation-customers': {
+        'task': 'reservations.tasks.sync_reservation_customers',
+        'schedule': crontab(minute='*/5'),
+    },
+    'resume-stalled-campaigns': {
+        'task': 'marketing.tasks.resume_stalled_campaigns',
+        'schedule': crontab(minute='*/10'),
+    },
 }
\ No newline at end of file
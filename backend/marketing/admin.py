@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post
+from .models import Campaign, CampaignRecipient, Post
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -7,4 +7,17 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('type', 'is_active', 'created_at')
     search_fields = ('title', 'content')
     prepopulated_fields = {'slug': ('title',)} # Auto-fill slug from title
-    date_hierarchy = 'created_at'
\ No newline at end of file
+    date_hierarchy = 'created_at'
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'audience', 'status', 'total_recipients', 'created_at', 'completed_at')
+    list_filter = ('status', 'audience')
+    readonly_fields = ('total_recipients', 'created_at', 'started_at', 'completed_at')
+
+@admin.register(CampaignRecipient)
+class CampaignRecipientAdmin(admin.ModelAdmin):
+    list_display = ('email', 'campaign', 'status', 'attempts', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('email',)
+    raw_id_fields = ('campaign', 'customer')
@@ -1,25 +1,16 @@
-from django.db import models
-from PIL import Image
-from io import BytesIO
-from django.core.files.base import ContentFile
-from deep_translator import GoogleTranslator
-from bs4 import BeautifulSoup
-import os
-
-def auto_translate_html(html_content, dest_lang):
-    if not html_content: return ""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    translator = GoogleTranslator(source='en', target=dest_lang)
-    for element in soup.find_all(text=True):
-        if element.strip():
-            try:
-                translated_text = translator.translate(element.string)
-                element.replace_with(translated_text)
-            except:
-                pass # Fallback to original if translation fails
-    return str(soup)
-
-class Post(models.Model):
+from django.conf import settings
+from django.db import models, transaction
+from core.models import ImageDerivativesModel
+
+# Post field suffix -> translator language code
+TRANSLATION_LANGUAGES = {
+    'zh': 'zh-CN',
+    'zh_hant': 'zh-TW',
+    'ja': 'ja',
+    'ko': 'ko',
+}
+
+class Post(ImageDerivativesModel):
     TYPE_CHOICES = [
         ('BLOG', 'News & Events'),
         ('PROMO', 'Promotion'),
@@ -51,37 +42,78 @@ class Post(models.Model):
         return f"[{self.type}] {self.title}"
 
     def save(self, *args, **kwargs):
-        # 1. AUTO-TRANSLATE TITLE
-        if not self.title_zh: self.title_zh = GoogleTranslator(source='en', target='zh-CN').translate(self.title)
-        if not self.title_zh_hant: self.title_zh_hant = GoogleTranslator(source='en', target='zh-TW').translate(self.title)
-        if not self.title_ja: self.title_ja = GoogleTranslator(source='en', target='ja').translate(self.title)
-        if not self.title_ko: self.title_ko = GoogleTranslator(source='en', target='ko').translate(self.title)
-
-        # 2. AUTO-TRANSLATE HTML CONTENT (Preserving formatting)
-        if not self.content_zh: self.content_zh = auto_translate_html(self.content, 'zh-CN')
-        if not self.content_zh_hant: self.content_zh_hant = auto_translate_html(self.content, 'zh-TW')
-        if not self.content_ja: self.content_ja = auto_translate_html(self.content, 'ja')
-        if not self.content_ko: self.content_ko = auto_translate_html(self.content, 'ko')
-
-        # 3. IMAGE COMPRESSION (FIXED LOGIC)
-        image_changed = True
-        if self.pk:
-            try:
-                old_post = Post.objects.get(pk=self.pk)
-                if old_post.image == self.image:
-                    image_changed = False
-            except Post.DoesNotExist:
-                pass
-
-        if self.image and image_changed:
-            img = Image.open(self.image)
-            if img.mode in ("RGBA", "P"): img = img.convert("RGB")
-            img.thumbnail((1200, 1200))
-            buffer = BytesIO()
-            img.save(buffer, format='WEBP', quality=75)
-            
-            # Ensure proper string handling for the filename
-            file_name = os.path.splitext(os.path.basename(self.image.name))[0] + '.webp'
-            self.image = ContentFile(buffer.getvalue(), name=file_name)
-
-        super().save(*args, **kwargs)
\ No newline at end of file
+        # 1. The original upload is stored as-is; ImageDerivativesModel queues the 320/640/1200 variants
+        super().save(*args, **kwargs)
+
+        # 2. AUTO-TRANSLATE missing title/content languages in the background (see marketing.tasks.translate_post)
+        if self.missing_translations():
+            from .tasks import translate_post
+            post_id = self.pk
+            transaction.on_commit(lambda: translate_post.delay(post_id))
+
+    def missing_translations(self):
+        """ Names of the blank translation fields, e.g. ['title_ja', 'content_ja']; an empty source needs none """
+        return [
+            f"{field}_{suffix}"
+            for suffix in TRANSLATION_LANGUAGES
+            for field in ('title', 'content')
+            if (getattr(self, field) or '').strip() and not getattr(self, f"{field}_{suffix}")
+        ]
+
+class Campaign(models.Model):
+    """ One email blast: its content, the audience it was sent to and its delivery progress """
+    STATUS_CHOICES = [
+        ('PREPARING', 'Preparing Audience'),
+        ('SENDING', 'Sending'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    content = models.TextField(help_text="HTML body")
+    audience = models.CharField(max_length=20, default='ALL')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PREPARING')
+    total_recipients = models.IntegerField(default=0)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.subject} ({self.audience}, {self.status})"
+
+
+class CampaignRecipient(models.Model):
+    """ Audience snapshot row: who a campaign goes to and where their email is in the pipeline """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('CLAIMED', 'Claimed by a worker'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
+    customer = models.ForeignKey('reservations.Customer', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'email'], name='unique_campaign_email'),
+        ]
+        indexes = [
+            # Workers claim PENDING rows of one campaign in id order
+            models.Index(fields=['campaign', 'status', 'id'], name='campaign_recipient_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} [{self.status}]"
@@ -1,7 +1,40 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
-from .models import Post
+from core.serializers import ImageSrcsetField
+from .models import Campaign, Post
 
 class PostSerializer(serializers.ModelSerializer):
+    srcset = ImageSrcsetField()
+
     class Meta:
         model = Post
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# Recipient counts per delivery state, usable as aggregate() or annotate() arguments
+CAMPAIGN_PROGRESS_COUNTS = {
+    'pending': Count('recipients', filter=Q(recipients__status='PENDING')),
+    'in_flight': Count('recipients', filter=Q(recipients__status='CLAIMED')),
+    'sent': Count('recipients', filter=Q(recipients__status='SENT')),
+    'failed': Count('recipients', filter=Q(recipients__status='FAILED')),
+}
+
+class CampaignSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True, default=None)
+
+    class Meta:
+        model = Campaign
+        fields = [
+            'id', 'subject', 'audience', 'status', 'total_recipients', 'progress',
+            'created_by_name', 'created_at', 'started_at', 'completed_at',
+        ]
+
+    def get_progress(self, obj):
+        # Lists annotate the counts in their own query; a single campaign computes them here
+        if hasattr(obj, 'sent'):
+            counts = {name: getattr(obj, name) for name in CAMPAIGN_PROGRESS_COUNTS}
+        else:
+            counts = Campaign.objects.filter(pk=obj.pk).aggregate(**CAMPAIGN_PROGRESS_COUNTS)
+        done = counts['sent'] + counts['failed']
+        counts['percent_complete'] = round(done * 100 / obj.total_recipients, 1) if obj.total_recipients else 0
+        return counts
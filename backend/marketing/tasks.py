@@ -1,35 +1,30 @@
 # backend/marketing/tasks.py
 from datetime import date, timedelta
 from celery import shared_task
-from django.core.mail import send_mail
-from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
 from django.utils.html import strip_tags
+from core.mail import build_email, dispatcher
+from core.translation import translate_fields
 from reservations.models import Customer, Reservation
+from .models import TRANSLATION_LANGUAGES, Campaign, CampaignRecipient, Post
 
-# 1. The "Micro Task" - Handles just ONE customer's EMAIL.
-@shared_task(rate_limit='2/s')
-def send_single_blast_message(customer_id, subject, plain_message, html_content):
-    try:
-        customer = Customer.objects.get(id=customer_id)
-        
-        # Send Email Only
-        if customer.email:
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[customer.email],
-                fail_silently=True,
-                html_message=html_content
-            )
-            
-    except Customer.DoesNotExist:
-        pass
-
-
-# 2. The "Master Task" - Instantly queues up the micro tasks.
-@shared_task
-def send_mass_blast(audience, subject, html_content):
+# Recipients per delivery task; each chunk is sent over one SMTP connection
+BLAST_CHUNK_SIZE = 100
+
+# Parallel delivery chains started per campaign; each claims its own batches
+CAMPAIGN_WORKERS = 4
+
+# A claim older than this belongs to a worker that died mid-batch and is handed out again
+CAMPAIGN_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+# A sending campaign with no batch claimed for this long has lost its delivery chains
+CAMPAIGN_STALL_TIMEOUT = timedelta(minutes=10)
+
+
+def get_blast_audience(audience):
+    """ Customers with an email address in the given audience segment """
     # Base query: Only get customers with an email address
     customers = Customer.objects.exclude(email__isnull=True).exclude(email__exact='')
     
@@ -42,16 +37,187 @@ def send_mass_blast(audience, subject, html_content):
         customers = customers.filter(last_visit__lte=six_months_ago)
         
     elif audience == 'MANILA_VIP':
-        # Customers who previously booked the high-end Manila VIP Room
-        manila_phones = Reservation.objects.filter(
+        # Customers who previously booked the high-end Manila VIP Room (indexed join on Reservation.customer)
+        manila_bookings = Reservation.objects.filter(
+            customer=OuterRef('pk'),
             dining_area__name="MANILA VIP Room", 
             status__in=['CONFIRMED', 'COMPLETED', 'SEATED']
-        ).values_list('customer_contact', flat=True)
-        customers = customers.filter(phone__in=manila_phones)
-        
-    plain_message = strip_tags(html_content)
-    
-    for customer in customers:
-        send_single_blast_message.delay(customer.id, subject, plain_message, html_content)
-        
-    return f"Successfully queued {customers.count()} emails for sending."
\ No newline at end of file
+        )
+        customers = customers.filter(Exists(manila_bookings))
+
+    return customers
+
+
+def _stream_audience(audience):
+    """ Yields unique (customer_id, email) pairs for an audience without loading Customer rows """
+    seen = set()
+    for customer_id, email in get_blast_audience(audience).order_by('id').values_list('id', 'email').iterator(chunk_size=2000):
+        address = email.strip().lower()
+        if address in seen:
+            continue  # Shared family / office addresses get one copy
+        seen.add(address)
+        yield customer_id, email.strip()
+
+
+# --- Tracked campaigns ---
+
+@shared_task
+def prepare_campaign(campaign_id):
+    """
+    Snapshots the audience into CampaignRecipient rows, then starts the delivery workers. Safe to run
+    again after a crash: rows already inserted are skipped. started_at is stamped as it goes, so
+    resume_stalled_campaigns can tell a preparation that died from one still running.
+    """
+    campaign = Campaign.objects.get(id=campaign_id)
+    if campaign.status != 'PREPARING':
+        return f"Campaign {campaign_id} is already {campaign.status}."
+
+    preparing = Campaign.objects.filter(id=campaign_id, status='PREPARING')
+    preparing.update(started_at=timezone.now())
+    batch = []
+    for customer_id, email in _stream_audience(campaign.audience):
+        batch.append(CampaignRecipient(campaign=campaign, customer_id=customer_id, email=email))
+        if len(batch) == 1000:
+            CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+            preparing.update(started_at=timezone.now())
+            batch = []
+    if batch:
+        CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+
+    # Rows a previous attempt inserted are skipped by ignore_conflicts: count what is actually queued
+    total = CampaignRecipient.objects.filter(campaign_id=campaign_id).count()
+    if not preparing.update(status='SENDING', total_recipients=total, started_at=timezone.now()):
+        return f"Campaign {campaign_id} was started by another worker."
+    for _ in range(CAMPAIGN_WORKERS):
+        deliver_campaign_batch.delay(campaign_id)
+    return f"Campaign {campaign_id}: {total} recipients queued."
+
+
+def release_stale_claims(campaign_id=None):
+    """ Returns recipients claimed by a crashed worker to the queue """
+    stale = CampaignRecipient.objects.filter(status='CLAIMED', claimed_at__lt=timezone.now() - CAMPAIGN_CLAIM_TIMEOUT)
+    if campaign_id:
+        stale = stale.filter(campaign_id=campaign_id)
+    return stale.update(status='PENDING', claimed_at=None)
+
+
+def claim_recipients(campaign_id, batch_size):
+    """
+    Claims up to batch_size PENDING recipients. SKIP LOCKED lets any number of workers
+    claim concurrently without waiting on, or double-sending, each other's rows.
+    """
+    with transaction.atomic():
+        ids = list(
+            CampaignRecipient.objects
+            .select_for_update(skip_locked=True)
+            .filter(campaign_id=campaign_id, status='PENDING')
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        CampaignRecipient.objects.filter(id__in=ids).update(status='CLAIMED', claimed_at=timezone.now())
+    return list(CampaignRecipient.objects.filter(id__in=ids).order_by('id'))
+
+
+def finish_campaign_if_done(campaign_id):
+    if not CampaignRecipient.objects.filter(campaign_id=campaign_id, status__in=['PENDING', 'CLAIMED']).exists():
+        Campaign.objects.filter(id=campaign_id, status='SENDING').update(status='COMPLETED', completed_at=timezone.now())
+
+
+# Each worker sends one batch of BLAST_CHUNK_SIZE per minute
+@shared_task(rate_limit='1/m')
+def deliver_campaign_batch(campaign_id, batch_size=BLAST_CHUNK_SIZE):
+    """ Claims one batch, sends it over the pooled SMTP connection, records the outcome and re-queues itself """
+    campaign = Campaign.objects.filter(id=campaign_id, status='SENDING').first()
+    if campaign is None:
+        return 0
+
+    release_stale_claims(campaign_id)
+    recipients = claim_recipients(campaign_id, batch_size)
+    if not recipients:
+        finish_campaign_if_done(campaign_id)
+        return 0
+
+    plain = strip_tags(campaign.content)
+    errors = dispatcher.send_each([
+        build_email(subject=campaign.subject, body=plain, to=[recipient.email], html=campaign.content)
+        for recipient in recipients
+    ])
+
+    now = timezone.now()
+    for recipient, error in zip(recipients, errors):
+        recipient.attempts += 1
+        # claimed_at stays as the time of the last claim: resume_stalled_campaigns reads it as a heartbeat
+        if error is None:
+            recipient.status, recipient.sent_at, recipient.error = 'SENT', now, ''
+        else:
+            recipient.status, recipient.error = 'FAILED', str(error)[:500]
+    CampaignRecipient.objects.bulk_update(recipients, ['status', 'attempts', 'sent_at', 'error'])
+
+    deliver_campaign_batch.delay(campaign_id, batch_size)
+    return len(recipients)
+
+
+@shared_task
+def resume_stalled_campaigns():
+    """
+    Restarts campaigns whose workers died (e.g. a deploy or a crashed worker): preparations that stopped
+    making progress, and deliveries with pending recipients. Campaigns that claimed a batch within
+    CAMPAIGN_STALL_TIMEOUT still have live chains and are left alone.
+    Delivery is at least once: a worker that dies after sending but before recording the batch
+    leaves it claimed, and it is sent again once the claim expires.
+    """
+    released = release_stale_claims()
+    cutoff = timezone.now() - CAMPAIGN_STALL_TIMEOUT
+
+    # Preparations whose worker died: never started (the task was lost) or not stamped for a while
+    unprepared = Campaign.objects.filter(status='PREPARING').filter(
+        Q(started_at__lt=cutoff) | Q(started_at__isnull=True, created_at__lt=cutoff)
+    )
+    restarted = 0
+    for campaign_id in unprepared.values_list('id', flat=True):
+        prepare_campaign.delay(campaign_id)
+        restarted += 1
+
+    recently_claimed = CampaignRecipient.objects.filter(campaign=OuterRef('pk'), claimed_at__gte=cutoff)
+    pending = CampaignRecipient.objects.filter(campaign=OuterRef('pk'), status='PENDING')
+    stalled = Campaign.objects.filter(status='SENDING', started_at__lt=cutoff).filter(
+        Exists(pending), ~Exists(recently_claimed)
+    )
+    resumed = 0
+    for campaign_id in stalled.values_list('id', flat=True):
+        for _ in range(CAMPAIGN_WORKERS):
+            deliver_campaign_batch.delay(campaign_id)
+        resumed += 1
+    return f"Released {released} stale claims, restarted {restarted} preparations, resumed {resumed} campaigns."
+
+
+
+# --- Post translation ---
+
+@shared_task
+def translate_post(post_id):
+    """
+    Fills a Post's blank title/content translations. Each language costs one translate_texts call for
+    both fields, so at most one batched backend call for its uncached segments.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+
+    missing = set(post.missing_translations())
+    updates = {}
+    for suffix, lang in TRANSLATION_LANGUAGES.items():
+        fields = {field: getattr(post, field) for field in ('title', 'content') if f"{field}_{suffix}" in missing}
+        if not fields:
+            continue
+        try:
+            translated = translate_fields(fields, lang, html_fields=['content'])
+        except Exception as e:
+            print(f"Translation failed for post {post_id} ({lang}): {e}")
+            continue
+        updates.update({f"{field}_{suffix}": text for field, text in translated.items()})
+
+    # update() rather than save(): no image re-processing and no second translation round
+    if updates:
+        Post.objects.filter(pk=post_id).update(**updates)
+    return f"Translated {len(updates)} fields of post {post_id}."
@@ -1,3 +1,156 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from reservations.models import Customer, DiningArea, Reservation
+from core.translation import OfflineBackend
+from .models import TRANSLATION_LANGUAGES, Campaign, CampaignRecipient, Post
+from .tasks import _stream_audience, claim_recipients, get_blast_audience, deliver_campaign_batch, prepare_campaign, resume_stalled_campaigns
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, CELERY_TASK_ALWAYS_EAGER=True,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class MassBlastTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            Customer.objects.create(name=f"Guest {i}", phone=f"0917000000{i}", email=f"guest{i}@example.com", is_vip=i < 4)
+        Customer.objects.create(name="Guest 0 (spouse)", phone="09170000009", email="GUEST0@example.com", is_vip=True)
+        Customer.objects.create(name="No Email", phone="09170000008", is_vip=True)
+
+    def test_vip_campaign_is_deduplicated(self):
+        campaign = Campaign.objects.create(subject='Mooncake Festival', content='<p>Hello</p>', audience='VIP')
+        result = prepare_campaign(campaign.id)
+
+        self.assertIn('4 recipients queued', result)
+        self.assertEqual(sorted(m.to[0].lower() for m in mail.outbox), [f"guest{i}@example.com" for i in range(4)])
+        self.assertEqual(mail.outbox[0].body, 'Hello')
+
+    def test_vip_blast_is_streamed_chunked_and_deduplicated(self):
+        with self.assertNumQueries(1):  # One streamed (id, email) query, no Customer rows
+            audience = list(_stream_audience('VIP'))
+        self.assertEqual(len(audience), 4)
+
+        campaign = Campaign.objects.create(subject='Mooncake Festival', content='<p>Hello</p>', audience='VIP')
+        with patch('marketing.tasks.deliver_campaign_batch.delay'):
+            prepare_campaign(campaign.id)
+            sent = [deliver_campaign_batch(campaign.id, batch_size=3) for _ in range(3)]
+        self.assertEqual(sent, [3, 1, 0])
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_manila_vip_audience_joins_on_customer(self):
+        manila = DiningArea.objects.create(name="MANILA VIP Room", area_type='VIP', capacity=20)
+        # Bookings reach the phone book through the sync that runs on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            for contact, status in (("+63 917 000 0001", 'COMPLETED'), ("09170000002", 'CANCELLED')):
+                Reservation.objects.create(
+                    customer_name="Guest", customer_contact=contact, dining_area=manila,
+                    date=date(2026, 5, 1), session='DINNER', time=time(18, 0), pax=10, status=status,
+                )
+        self.assertEqual(list(get_blast_audience('MANILA_VIP').values_list('email', flat=True)), ['guest1@example.com'])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, CELERY_TASK_ALWAYS_EAGER=True,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class CampaignDeliveryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            Customer.objects.create(name=f"Guest {i}", phone=f"0917000000{i}", email=f"guest{i}@example.com")
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def test_blast_creates_tracked_campaign(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.post('/api/marketing/manage/blast/', {'subject': 'Hi', 'content': '<p>Hello</p>'}, format='json')
+
+        campaign = Campaign.objects.get(id=response.data['campaign_id'])
+        self.assertEqual(campaign.status, 'COMPLETED')
+        self.assertEqual(len(mail.outbox), 7)
+
+        progress = client.get(f'/api/marketing/manage/campaigns/{campaign.id}/').data['progress']
+        self.assertEqual(progress, {'pending': 0, 'in_flight': 0, 'sent': 7, 'failed': 0, 'percent_complete': 100.0})
+        listed = client.get('/api/marketing/manage/campaigns/').data
+        self.assertEqual(listed[0]['progress']['sent'], 7)
+
+    def test_crashed_preparation_is_restarted_with_the_real_count(self):
+        campaign = Campaign.objects.create(subject='Hi', content='<p>Hello</p>')
+        # A first attempt inserted part of the audience, then its worker died
+        CampaignRecipient.objects.bulk_create([
+            CampaignRecipient(campaign=campaign, email=f"guest{i}@example.com") for i in range(3)
+        ])
+        with patch('marketing.tasks.prepare_campaign.delay') as delay:
+            resume_stalled_campaigns()
+        delay.assert_not_called()  # Only just created: its worker may still be running
+
+        Campaign.objects.filter(id=campaign.id).update(created_at=timezone.now() - timedelta(hours=1))
+        with patch('marketing.tasks.deliver_campaign_batch.delay') as deliver:
+            self.assertIn("restarted 1 preparations", resume_stalled_campaigns())
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.status, campaign.total_recipients), ('SENDING', 7))
+        self.assertEqual(deliver.call_count, 4)
+        # A second copy of the task finds it already started
+        self.assertIn("already SENDING", prepare_campaign(campaign.id))
+
+    def test_restart_resumes_where_it_stopped(self):
+        campaign = Campaign.objects.create(subject='Hi', content='<p>Hello</p>')
+        # One batch delivered, one claimed by a worker that then crashed
+        with patch('marketing.tasks.deliver_campaign_batch.delay'):
+            prepare_campaign(campaign.id)
+            deliver_campaign_batch(campaign.id, batch_size=3)
+        claim_recipients(campaign.id, 2)
+        self.assertEqual(len(mail.outbox), 3)
+
+        # Still within the stall timeout: the delivery chains may be alive, so nothing is restarted
+        with patch('marketing.tasks.deliver_campaign_batch.delay') as delay:
+            resume_stalled_campaigns()
+        delay.assert_not_called()
+
+        # An hour later nothing has been claimed since
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Campaign.objects.filter(id=campaign.id).update(started_at=an_hour_ago)
+        CampaignRecipient.objects.exclude(claimed_at=None).update(claimed_at=an_hour_ago)
+        resume_stalled_campaigns()
+
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [f"guest{i}@example.com" for i in range(7)])
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, 'COMPLETED')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CELERY_TASK_ALWAYS_EAGER=True)
+class PostTranslationTests(TestCase):
+
+    def test_title_and_content_share_one_call_per_language(self):
+        backend = OfflineBackend()
+        with patch('core.translation.get_backend', return_value=backend), self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title="Dim Sum Week", slug='dim-sum-week', type='PROMO', content="<p>Book <b>now</b></p>")
+
+        self.assertEqual(backend.calls, [(lang, ['Book', 'Dim Sum Week', 'now']) for lang in TRANSLATION_LANGUAGES.values()])
+        post.refresh_from_db()
+        self.assertEqual(post.title_ja, "[ja] Dim Sum Week")
+        self.assertEqual(post.content_ja, "<p>[ja] Book <b>[ja] now</b></p>")
+
+    def test_empty_content_counts_as_translated(self):
+        backend = OfflineBackend()
+        with patch('core.translation.get_backend', return_value=backend), self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title="Closed for Renovation", slug='closed', type='BLOG', content="")
+
+        post.refresh_from_db()
+        self.assertEqual(post.title_ko, "[ko] Closed for Renovation")
+        self.assertIsNone(post.content_ko)
+        self.assertEqual(post.missing_translations(), [])
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.save()  # Nothing left to translate: no new task is queued
+        self.assertEqual(callbacks, [])
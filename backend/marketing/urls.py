@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import AdminPostDetailView, AdminPostListCreateView, MarketingBlastView, PublicPostListView, PostDetailView
+from .views import AdminPostDetailView, AdminPostListCreateView, CampaignListView, CampaignProgressView, MarketingBlastView, PublicPostListView, PostDetailView
 
 urlpatterns = [
     path('', PublicPostListView.as_view()),
@@ -7,4 +7,6 @@ urlpatterns = [
     path('manage/all/', AdminPostListCreateView.as_view()),
     path('manage/<int:id>/', AdminPostDetailView.as_view()),
     path('manage/blast/', MarketingBlastView.as_view()),
+    path('manage/campaigns/', CampaignListView.as_view()),
+    path('manage/campaigns/<int:id>/', CampaignProgressView.as_view()),
 ]
\ No newline at end of file
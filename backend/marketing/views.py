@@ -1,13 +1,13 @@
 from rest_framework import generics, status
 from django.http import HttpResponse
-from .models import Post
+from .models import Campaign, Post
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .serializers import PostSerializer
+from .serializers import CAMPAIGN_PROGRESS_COUNTS, CampaignSerializer, PostSerializer
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from core.permissions import IsAdminUserOnly
-from .tasks import send_mass_blast
+from .tasks import prepare_campaign
 
 class PublicPostListView(generics.ListAPIView):
     serializer_class = PostSerializer
@@ -15,20 +15,20 @@ class PublicPostListView(generics.ListAPIView):
 
     def get_queryset(self):
         # Allow filtering by type via URL: /api/marketing/?type=PROMO
-        queryset = Post.objects.filter(is_active=True)
+        queryset = Post.objects.filter(is_active=True).prefetch_related('image_derivatives')
         post_type = self.request.query_params.get('type')
         if post_type:
             queryset = queryset.filter(type=post_type)
         return queryset
 
 class PostDetailView(generics.RetrieveAPIView):
-    queryset = Post.objects.filter(is_active=True)
+    queryset = Post.objects.filter(is_active=True).prefetch_related('image_derivatives')
     serializer_class = PostSerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
 
 class AdminPostListCreateView(generics.ListCreateAPIView):
-    queryset = Post.objects.all().order_by('-created_at')
+    queryset = Post.objects.prefetch_related('image_derivatives').order_by('-created_at')
     serializer_class = PostSerializer
     # RECEPTIONISTS CANNOT MANAGE MARKETING
     permission_classes = [IsAdminUserOnly] 
@@ -96,7 +96,26 @@ class MarketingBlastView(APIView):
         if not subject or not content:
             return Response({"error": "Subject and content required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Fire the Celery Task!
-        send_mass_blast.delay(audience, subject, content)
+        # Record the campaign, then snapshot its audience and deliver it in the background
+        campaign = Campaign.objects.create(subject=subject, content=content, audience=audience, created_by=request.user)
+        prepare_campaign.delay(campaign.id)
         
-        return Response({"message": "Email Campaign is now sending in the background!"}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({
+            "message": "Email Campaign is now sending in the background!",
+            "campaign_id": campaign.id
+        }, status=status.HTTP_200_OK)
+
+class CampaignListView(generics.ListAPIView):
+    """ Recent campaigns with their delivery progress, for the admin blast screen """
+    serializer_class = CampaignSerializer
+    permission_classes = [IsAdminUserOnly]
+
+    def get_queryset(self):
+        return Campaign.objects.select_related('created_by').annotate(**CAMPAIGN_PROGRESS_COUNTS).order_by('-created_at')[:20]
+
+class CampaignProgressView(generics.RetrieveAPIView):
+    """ Polled by the admin UI while a campaign is sending """
+    queryset = Campaign.objects.select_related('created_by')
+    serializer_class = CampaignSerializer
+    permission_classes = [IsAdminUserOnly]
+    lookup_field = 'id'
\ No newline at end of file
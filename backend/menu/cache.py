@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from .models import Category, MenuItem
+
+try:
+    import brotli
+except ImportError:  # Optional: without it the snapshot is served as gzip or plain JSON
+    brotli = None
+
+# Every menu write bumps the generation; entries of older generations are never read again and simply expire
+MENU_VERSION_KEY = 'menu:version'
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Bursts of writes (bulk admin edits, seed commands) share one warm-up, queued this many seconds later
+MENU_WARM_PENDING_KEY = 'menu:warm-pending'
+MENU_WARM_DELAY = 5
+
+# ?lang= codes of the slim payloads (the same suffixes as the name_* columns); English is the fallback
+MENU_LANGUAGES = ('en', 'zh', 'zh_hant', 'ja', 'ko')
+# Item fields a slim payload can be trimmed to with ?fields= ('id' is always sent)
+MENU_ITEM_FIELDS = ('code', 'name', 'description', 'image', 'srcset', 'is_available', 'prices', 'cooking_methods')
+
+
+def get_menu_version():
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        cache.add(MENU_VERSION_KEY, 1, None)
+        version = cache.get(MENU_VERSION_KEY, 1)
+    return version
+
+
+def menu_cache_key(variant='full', version=None):
+    """ e.g. menu:v12:full; localized payloads use their own variant (menu:v12:ja) """
+    return f"menu:v{version or get_menu_version()}:{variant}"
+
+
+def bump_menu_version():
+    try:
+        return cache.incr(MENU_VERSION_KEY)
+    except ValueError:
+        # Key evicted or never set: any fresh value works as long as it differs from the cached generations
+        cache.add(MENU_VERSION_KEY, 2, None)
+        return cache.get(MENU_VERSION_KEY)
+
+
+def menu_queryset():
+    sorted_items = MenuItem.objects.order_by('code').prefetch_related('prices', 'cooking_methods', 'image_derivatives')
+    return Category.objects.prefetch_related(
+        Prefetch('items', queryset=sorted_items)
+    ).all().order_by('order')
+
+
+def build_menu_payload():
+    from .serializers import CategorySerializer
+    return CategorySerializer(menu_queryset(), many=True).data
+
+
+def get_menu_payload():
+    key = menu_cache_key()
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_menu_payload()
+        cache.set(key, payload, MENU_CACHE_TIMEOUT)
+    return payload
+
+
+def _localized_name(obj, lang):
+    return (obj.get(f"name_{lang}") if lang != 'en' else None) or obj['name']
+
+
+def localize_menu(payload, lang, fields=None):
+    """
+    Slims the full menu payload down to one language: a single `name` per category, item and cooking
+    method (falling back to English where a translation is missing), optionally only the given item fields.
+    """
+    fields = fields or MENU_ITEM_FIELDS
+    categories = []
+    for category in payload:
+        items = []
+        for item in category['items']:
+            slim = {'id': item['id']}
+            for field in fields:
+                if field == 'name':
+                    slim['name'] = _localized_name(item, lang)
+                elif field == 'cooking_methods':
+                    slim['cooking_methods'] = [
+                        {'id': method['id'], 'name': _localized_name(method, lang)} for method in item['cooking_methods']
+                    ]
+                else:
+                    slim[field] = item[field]
+            items.append(slim)
+        categories.append({'id': category['id'], 'name': _localized_name(category, lang), 'items': items})
+    return categories
+
+
+def build_menu_snapshot(payload=None):
+    """
+    Renders the menu to JSON once and keeps the encoded bodies alongside it, so serving the menu
+    is a cache read and a byte copy. `etag` is the hash of the JSON; the view derives one ETag per encoding.
+    """
+    body = JSONRenderer().render(build_menu_payload() if payload is None else payload)
+    return {
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+        'br': brotli.compress(body) if brotli else None,
+    }
+
+
+def menu_snapshot_variant(lang=None, fields=None):
+    """ snapshot (everything), snapshot:ja, or snapshot:ja:code,name,prices for a trimmed payload """
+    if not lang:
+        return 'snapshot'
+    if not fields:
+        return f"snapshot:{lang}"
+    return f"snapshot:{lang}:{','.join(field for field in MENU_ITEM_FIELDS if field in fields)}"
+
+
+def get_menu_snapshot(lang=None, fields=None):
+    """ The cached snapshot of the full menu, or of one language (and field selection) when `lang` is given """
+    key = menu_cache_key(menu_snapshot_variant(lang, fields))
+    snapshot = cache.get(key)
+    if snapshot is None:
+        payload = get_menu_payload()
+        snapshot = build_menu_snapshot(localize_menu(payload, lang, fields) if lang else payload)
+        cache.set(key, snapshot, MENU_CACHE_TIMEOUT)
+    return snapshot
+
+
+def invalidate_menu():
+    """
+    Moves the menu to a new cache generation once the write commits, then re-warms it in the
+    background. Only menu keys are affected; OTPs, throttles and other cache users are left alone.
+    """
+    def bump_and_warm():
+        bump_menu_version()
+        if not cache.add(MENU_WARM_PENDING_KEY, 1, MENU_WARM_DELAY * 6):
+            return  # A warm-up is already queued and will pick up this generation
+        from .tasks import warm_menu_cache
+        try:
+            warm_menu_cache.apply_async(countdown=MENU_WARM_DELAY)
+        except Exception as e:
+            cache.delete(MENU_WARM_PENDING_KEY)
+            print(f"Warning: Could not queue menu warm-up: {e}")
+
+    transaction.on_commit(bump_and_warm)
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from menu.cache import MENU_LANGUAGES, build_menu_payload, build_menu_snapshot, localize_menu
+from menu.models import Category, CookingMethod, MenuItem, MenuItemPrice
+
+# What a list screen needs: no descriptions, no cooking methods
+LIST_SCREEN_FIELDS = ['code', 'name', 'image', 'is_available', 'prices']
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        'Compares the size of the full multi-language menu payload with the per-language (?lang=) and '
+        'list-screen (?fields=) payloads, raw and compressed. Use --seed on an empty database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Add this many synthetic items first (rolled back afterwards)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                self.report()
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def seed(self, count):
+        methods = [
+            CookingMethod.objects.create(name=name, name_zh=zh, name_zh_hant=zh, name_ja=ja, name_ko=ko)
+            for name, zh, ja, ko in [
+                ("Steamed", "清蒸", "蒸し", "찜"), ("Deep Fried", "油炸", "揚げ", "튀김"), ("Sweet & Sour", "糖醋", "甘酢", "탕수"),
+            ]
+        ]
+        for c in range(max(count // 20, 1)):
+            category = Category.objects.create(
+                name=f"Category {c}", name_zh=f"类别 {c}", name_zh_hant=f"類別 {c}", name_ja=f"カテゴリー {c}", name_ko=f"카테고리 {c}", order=c
+            )
+            for i in range(20):
+                item = MenuItem.objects.create(
+                    category=category, code=f"C{c:02d}{i:02d}", name=f"Braised Dish {c}-{i}",
+                    name_zh=f"红烧菜 {c}-{i}", name_zh_hant=f"紅燒菜 {c}-{i}", name_ja=f"煮込み料理 {c}-{i}", name_ko=f"조림 요리 {c}-{i}",
+                    description="Slow-braised with oyster sauce, shiitake and seasonal greens.",
+                )
+                item.cooking_methods.set(methods[:1 + i % 3])
+                MenuItemPrice.objects.create(menu_item=item, size="Small", price=380 + i)
+                MenuItemPrice.objects.create(menu_item=item, size="Large", price=680 + i)
+
+    def report(self):
+        payload = build_menu_payload()
+        variants = [('full (all languages)', payload)]
+        variants += [(f"?lang={lang}", localize_menu(payload, lang)) for lang in MENU_LANGUAGES]
+        variants += [(f"?lang={lang}&fields={','.join(LIST_SCREEN_FIELDS)}", localize_menu(payload, lang, LIST_SCREEN_FIELDS)) for lang in ('en', 'ja')]
+
+        items = sum(len(category['items']) for category in payload)
+        self.stdout.write(f"{len(payload)} categories, {items} items")
+        self.stdout.write(f"{'payload':<64} {'json':>10} {'gzip':>10} {'br':>10}")
+        full_size = None
+        for label, data in variants:
+            snapshot = build_menu_snapshot(data)
+            sizes = [len(snapshot['identity']), len(snapshot['gzip']), len(snapshot['br']) if snapshot['br'] else None]
+            full_size = full_size or sizes[0]
+            self.stdout.write(
+                f"{label:<64} " + ' '.join(f"{size:>10,}" if size is not None else f"{'n/a':>10}" for size in sizes)
+                + f"   {sizes[0] / full_size:6.1%} of full json"
+            )
@@ -0,0 +1,67 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from menu.cache import MENU_LANGUAGES, build_menu_payload
+from menu.models import MenuItem
+from menu.search import MenuSearchIndex, normalize
+from .benchmark_menu_payload import Command as PayloadBenchmark
+
+QUERIES = ['BA01', 'c0105', 'fried', 'dish 7-1', '鲍鱼', '红烧', '煮込み', '조림', 'ＢＡ０１', 'no such dish']
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        'Measures menu search latency: the in-memory n-gram index against scanning the menu payload '
+        '(what the clients did) and an icontains query over the name columns. Use --seed on an empty database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Add this many synthetic items first (rolled back afterwards)')
+        parser.add_argument('--repeat', type=int, default=200, help='Runs per query')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    PayloadBenchmark(stdout=self.stdout).seed(options['seed'])
+                self.report(options['repeat'])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def report(self, repeat):
+        payload = build_menu_payload()
+        items = [item for category in payload for item in category['items']]
+        name_columns = ['name'] + [f"name_{lang}" for lang in MENU_LANGUAGES if lang != 'en']
+
+        started = time.perf_counter()
+        index = MenuSearchIndex(payload)
+        self.stdout.write(f"{len(items)} items, index built in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        def scan(query):
+            query = normalize(query)
+            return [item for item in items if any(query in normalize(item.get(column)) for column in ['code'] + name_columns)]
+
+        def database(query):
+            lookup = Q(code__icontains=query)
+            for column in name_columns:
+                lookup |= Q(**{f"{column}__icontains": query})
+            return list(MenuItem.objects.filter(lookup).values_list('id', flat=True)[:20])
+
+        strategies = [('n-gram index', index.search), ('payload scan', scan), ('database icontains', database)]
+        self.stdout.write(f"{'strategy':<20} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for label, action in strategies:
+            timings = []
+            for query in QUERIES:
+                for _ in range(repeat if label != 'database icontains' else max(repeat // 10, 1)):
+                    started = time.perf_counter()
+                    action(query)
+                    timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label:<20} {statistics.median(timings):8.3f} {timings[int(len(timings) * 0.95) - 1]:8.3f} {timings[-1]:8.3f}"
+            )
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from core.models import ImageDerivativesModel
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -25,7 +28,7 @@ class CookingMethod(models.Model):
     def __str__(self):
         return self.name
     
-class MenuItem(models.Model):
+class MenuItem(ImageDerivativesModel):
     category = models.ForeignKey(Category, related_name='items', on_delete=models.CASCADE)
     code = models.CharField(max_length=20, blank=True, null=True, help_text="e.g., BA01")
     
@@ -46,6 +49,11 @@ class MenuItem(models.Model):
     def __str__(self):
         return f"{self.code} - {self.name}" if self.code else self.name
 
+    def derivatives_built(self, field_name):
+        # The cached menu payload embeds each item's srcset
+        from .cache import invalidate_menu
+        invalidate_menu()
+
 class MenuItemPrice(models.Model):
     menu_item = models.ForeignKey(MenuItem, related_name='prices', on_delete=models.CASCADE)
     size = models.CharField(max_length=50, default='Regular', help_text="e.g., S, M, L, Half, Whole")
@@ -56,4 +64,14 @@ class MenuItemPrice(models.Model):
         ordering = ['price']
 
     def __str__(self):
-        return f"{self.menu_item.name} - {self.size}"
\ No newline at end of file
+        return f"{self.menu_item.name} - {self.size}"
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=CookingMethod)
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=MenuItemPrice)
+@receiver(m2m_changed, sender=MenuItem.cooking_methods.through)
+def invalidate_menu_cache(sender, **kwargs):
+    """ Any menu write (admin panel, Django admin, seed commands) starts a new menu cache generation """
+    from .cache import invalidate_menu
+    invalidate_menu()
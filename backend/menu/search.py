@@ -0,0 +1,104 @@
+import threading
+import unicodedata
+from .cache import MENU_LANGUAGES, get_menu_payload, get_menu_version, localize_menu
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Ranking: the best way any searchable field matches the query decides an item's score
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = 100, 60, 40, 10
+
+
+def normalize(text):
+    """ Case- and width-insensitive form (NFKC folds full-width 'ＢＡ０１' to 'ba01') """
+    return unicodedata.normalize('NFKC', text or '').casefold().strip()
+
+
+def ngrams(text):
+    """ Unigrams for one-character text, bigrams otherwise: CJK names have no spaces to split on """
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _match_score(value, query):
+    position = value.find(query)
+    if position < 0:
+        return 0
+    if position == 0:
+        return EXACT if len(value) == len(query) else PREFIX
+    if value[position - 1] == ' ' or f" {query}" in value:
+        return WORD_PREFIX
+    return SUBSTRING
+
+
+class MenuSearchIndex:
+    """
+    In-memory n-gram index over item codes and every name_* column. A query is narrowed to the items
+    holding all of its n-grams, then confirmed and ranked by substring matching on that short list.
+    """
+
+    def __init__(self, payload):
+        self.items = {}
+        self.fields = {}
+        self.postings = {}
+        for category in payload:
+            for item in category['items']:
+                self.items[item['id']] = (category, item)
+                values = [normalize(item['code'])] + [
+                    normalize(item['name'] if lang == 'en' else item.get(f"name_{lang}")) for lang in MENU_LANGUAGES
+                ]
+                self.fields[item['id']] = [value for value in dict.fromkeys(values) if value]
+                for value in self.fields[item['id']]:
+                    for gram in ngrams(value) | set(value):
+                        self.postings.setdefault(gram, set()).add(item['id'])
+
+    def candidates(self, query):
+        grams = sorted((self.postings.get(gram, set()) for gram in ngrams(query)), key=len)
+        if not grams:
+            return set()
+        return set.intersection(*grams)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """ Returns [(score, category, item)] best first; items are entries of the full menu payload """
+        query = normalize(query)
+        ranked = []
+        for item_id in self.candidates(query):
+            score = max(_match_score(value, query) for value in self.fields[item_id])
+            if score:
+                category, item = self.items[item_id]
+                # A sold-out dish ranks just below an available one with the same kind of match
+                ranked.append((score + (1 if item['is_available'] else 0), item['code'] or '', category, item))
+        ranked.sort(key=lambda row: (-row[0], row[1]))
+        return [(score, category, item) for score, _, category, item in ranked[:limit]]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    The index for the current menu generation. Each process builds it once from the cached menu
+    payload and rebuilds when a menu write moves the cache to a new generation.
+    """
+    global _index
+    version = get_menu_version()
+    if _index is None or _index[0] != version:
+        with _index_lock:
+            if _index is None or _index[0] != version:
+                _index = (version, MenuSearchIndex(get_menu_payload()))
+    return _index[1]
+
+
+def search_menu(query, lang='en', limit=SEARCH_LIMIT):
+    """ Ranked search results shaped like the ?lang= menu items, each with its category """
+    results = []
+    for score, category, item in get_search_index().search(query, limit):
+        localized = localize_menu([{**category, 'items': [item]}], lang)[0]
+        results.append({
+            **localized['items'][0],
+            'category': {'id': localized['id'], 'name': localized['name']},
+            'score': score,
+        })
+    return results
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from core.serializers import ImageSrcsetField
 from .models import Category, MenuItem, MenuItemPrice, CookingMethod
 
 class CookingMethodSerializer(serializers.ModelSerializer):
@@ -15,10 +16,11 @@ class MenuItemSerializer(serializers.ModelSerializer):
     prices = MenuItemPriceSerializer(many=True, read_only=True)
     cooking_methods = CookingMethodSerializer(many=True, read_only=True) # <--- Added this
     image = serializers.SerializerMethodField()
+    srcset = ImageSrcsetField()
 
     class Meta:
         model = MenuItem
-        fields = ['id', 'code', 'name', 'name_zh', 'name_zh_hant', 'name_ja', 'name_ko', 'description', 'image', 'is_available', 'prices', 'cooking_methods']
+        fields = ['id', 'code', 'name', 'name_zh', 'name_zh_hant', 'name_ja', 'name_ko', 'description', 'image', 'srcset', 'is_available', 'prices', 'cooking_methods']
 
     def get_image(self, obj):
         if obj.image:
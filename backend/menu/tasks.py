@@ -0,0 +1,13 @@
+from celery import shared_task
+from django.core.cache import cache
+from .cache import MENU_LANGUAGES, MENU_WARM_PENDING_KEY, get_menu_snapshot, get_menu_version
+
+
+@shared_task
+def warm_menu_cache():
+    """ Builds the current menu generation so the first public request after an edit is already warm """
+    cache.delete(MENU_WARM_PENDING_KEY)
+    get_menu_snapshot()
+    for lang in MENU_LANGUAGES:
+        get_menu_snapshot(lang)
+    return f"Menu cache v{get_menu_version()} warmed."
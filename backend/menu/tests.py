@@ -1,3 +1,119 @@
-from django.test import TestCase
+import gzip
+import json
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from .cache import get_menu_version
+from .models import Category, MenuItem, MenuItemPrice
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CELERY_TASK_ALWAYS_EAGER=True)
+class MenuCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Dim Sum", order=1)
+        cls.item = MenuItem.objects.create(category=cls.category, code="DS01", name="Hakaw")
+        cls.price = MenuItemPrice.objects.create(menu_item=cls.item, size="Regular", price=Decimal('280.00'))
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_admin_price_edit_only_invalidates_menu_keys(self):
+        self.client.get('/api/menu/')
+        cache.set('otp_09170000000', '123456', 300)
+        version = get_menu_version()
+
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/menu/manage/prices/{self.price.pk}/', {'price': '300.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(cache.get('otp_09170000000'), '123456')
+        self.assertEqual(get_menu_version(), version + 1)
+        # The warm-up already built the new generation: public reads are served without queries
+        with self.assertNumQueries(0):
+            menu = json.loads(APIClient().get('/api/menu/').content)
+        self.assertEqual(menu[0]['items'][0]['prices'][0]['price'], '300.00')
+
+    def test_snapshot_is_served_compressed_with_etag(self):
+        with self.assertNumQueries(5):  # categories, items, prices, cooking methods, image variants
+            first = self.client.get('/api/menu/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', first['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(first.content))[0]['items'][0]['code'], 'DS01')
+
+        plain = self.client.get('/api/menu/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(first['ETag'], plain['ETag'][:-1] + '-gzip"')
+
+        with self.assertNumQueries(0):
+            revalidated = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = "Har Gow"
+            self.item.save()
+        changed = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_lang_payload_falls_back_to_english_and_selects_fields(self):
+        self.item.name_ja = "海老餃子"
+        self.item.save()
+
+        menu = json.loads(self.client.get('/api/menu/?lang=ja').content)
+        self.assertEqual(menu[0]['name'], "Dim Sum")  # No Japanese category name yet
+        self.assertEqual(menu[0]['items'][0]['name'], "海老餃子")
+        self.assertNotIn('name_ja', menu[0]['items'][0])
+
+        slim = json.loads(self.client.get('/api/menu/?fields=code,prices').content)
+        self.assertEqual(slim[0]['items'][0], {'id': self.item.id, 'code': 'DS01', 'prices': menu[0]['items'][0]['prices']})
+
+        self.assertEqual(self.client.get('/api/menu/?lang=fr').status_code, 400)
+        self.assertEqual(self.client.get('/api/menu/?fields=secret').status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CELERY_TASK_ALWAYS_EAGER=True)
+class MenuSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Abalone", name_zh="鲍鱼", order=1)
+        cls.braised = MenuItem.objects.create(category=category, code="AB01", name="Braised Whole Abalone", name_zh="红烧原只鲍鱼")
+        cls.soup = MenuItem.objects.create(category=category, code="AB02", name="Abalone Soup", name_zh="鲍鱼汤")
+        MenuItem.objects.create(category=category, code="BA01", name="Roast Duck", name_zh="烧鸭")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, query, **params):
+        response = self.client.get('/api/menu/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [result['code'] for result in response.data['results']]
+
+    def test_ranks_codes_names_and_cjk_substrings(self):
+        self.assertEqual(self.search('ba01'), ['BA01'])
+        self.assertEqual(self.search('ＢＡ０１'), ['BA01'])  # Full-width input from CJK keyboards
+        self.assertEqual(self.search('abalone'), ['AB02', 'AB01'])  # Name prefix beats a later word
+        self.assertEqual(self.search('鲍鱼'), ['AB02', 'AB01'])
+        self.assertEqual(self.search('鸭'), ['BA01'])
+
+        result = self.client.get('/api/menu/search/', {'q': '鲍鱼汤', 'lang': 'zh'}).data['results'][0]
+        self.assertEqual((result['name'], result['category']['name']), ("鲍鱼汤", "鲍鱼"))
+        self.assertEqual(self.client.get('/api/menu/search/').status_code, 400)
+
+    def test_index_follows_menu_edits(self):
+        self.assertEqual(self.search('lobster'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup.name = "Lobster Soup"
+            self.soup.save()
+        self.assertEqual(self.search('lobster'), ['AB02'])
@@ -1,9 +1,10 @@
 # backend/menu/urls.py
 from django.urls import path
-from .views import MenuListView, AdminMenuListView, AdminMenuItemUpdateView, AdminMenuItemPriceUpdateView
+from .views import MenuListView, MenuSearchView, AdminMenuListView, AdminMenuItemUpdateView, AdminMenuItemPriceUpdateView
 
 urlpatterns = [
     path('', MenuListView.as_view(), name='api_menu_list'),
+    path('search/', MenuSearchView.as_view(), name='api_menu_search'),
     
     # Admin Management Endpoints
     path('manage/all/', AdminMenuListView.as_view(), name='api_admin_menu_list'),
@@ -1,28 +1,97 @@
 # backend/menu/views.py
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
 from rest_framework import generics
-from django.db.models import Prefetch
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.core.cache import cache
+from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Category, MenuItem, MenuItemPrice
+from rest_framework.response import Response
+from .models import MenuItem, MenuItemPrice
 from .serializers import CategorySerializer, AdminMenuItemUpdateSerializer, AdminMenuItemPriceUpdateSerializer
+from .cache import MENU_ITEM_FIELDS, MENU_LANGUAGES, get_menu_snapshot, menu_queryset
+from .search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, search_menu
 
 # --- EXISTING PUBLIC VIEW ---
+def accepted_encodings(request):
+    """ Content codings the client accepts (anything listed without q=0) """
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
 class MenuListView(generics.ListAPIView):
+    """
+    Serves the pre-rendered menu snapshot (see menu.cache) as stored bytes: brotli or gzip when the
+    client accepts it, with a strong ETag so unchanged menus cost clients a 304 and the server no serialization.
+
+    ?lang=ja returns a slim payload with one `name` per object (English where untranslated);
+    ?fields=code,name,prices additionally trims the items (implies lang=en if no lang is given).
+    """
     serializer_class = CategorySerializer
 
-    @method_decorator(cache_page(60 * 15))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
-    
     def get_queryset(self):
-        sorted_items = MenuItem.objects.order_by('code').prefetch_related('prices')
-        return Category.objects.prefetch_related(
-            Prefetch('items', queryset=sorted_items)
-        ).all().order_by('order')
+        return menu_queryset()
+
+    def list(self, request, *args, **kwargs):
+        lang = request.query_params.get('lang')
+        fields = request.query_params.get('fields')
+        if fields:
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+            unknown = [field for field in fields if field not in MENU_ITEM_FIELDS]
+            if unknown:
+                return Response({"error": f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(MENU_ITEM_FIELDS)}."}, status=400)
+            lang = lang or 'en'
+        if lang and lang not in MENU_LANGUAGES:
+            return Response({"error": f"Unsupported language. Choose from {', '.join(MENU_LANGUAGES)}."}, status=400)
+
+        snapshot = get_menu_snapshot(lang, fields)
+        encodings = accepted_encodings(request)
+        if snapshot['br'] and 'br' in encodings:
+            coding = 'br'
+        elif 'gzip' in encodings:
+            coding = 'gzip'
+        else:
+            coding = 'identity'
+
+        # Each encoding is its own representation with its own strong ETag; any of them revalidates
+        etags = {name: f'"{snapshot["etag"]}"' if name == 'identity' else f'"{snapshot["etag"]}-{name}"'
+                 for name in ('identity', 'gzip', 'br')}
+        etag = etags[coding]
+        if_none_match = [tag.strip() for tag in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+
+        if '*' in if_none_match or set(if_none_match) & set(etags.values()):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(snapshot[coding], content_type='application/json')
+            if coding != 'identity':
+                response['Content-Encoding'] = coding
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+class MenuSearchView(APIView):
+    """ GET ?q=BA01 or ?q=鲍鱼 (&lang=ja&limit=10): ranked matches on item codes and every menu language """
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Search query 'q' is required"}, status=400)
+
+        lang = request.query_params.get('lang', 'en')
+        if lang not in MENU_LANGUAGES:
+            return Response({"error": f"Unsupported language. Choose from {', '.join(MENU_LANGUAGES)}."}, status=400)
+        try:
+            limit = min(max(int(request.query_params.get('limit', SEARCH_LIMIT)), 1), MAX_SEARCH_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=400)
+
+        return Response({"query": query, "results": search_menu(query, lang, limit)})
 
 # --- NEW ADMIN VIEWS ---
 
@@ -32,10 +101,7 @@ class AdminMenuListView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        sorted_items = MenuItem.objects.order_by('code').prefetch_related('prices')
-        return Category.objects.prefetch_related(
-            Prefetch('items', queryset=sorted_items)
-        ).all().order_by('order')
+        return menu_queryset()
 
 class AdminMenuItemUpdateView(generics.UpdateAPIView):
     """ Updates Image and Availability """
@@ -50,8 +116,7 @@ class AdminMenuItemUpdateView(generics.UpdateAPIView):
         if not (user.is_superuser or user.groups.filter(name__in=['Admin', 'Supervisor']).exists()):
             raise PermissionDenied("Only Supervisors and Admins can manage the menu.")
             
-        serializer.save()
-        cache.clear()
+        serializer.save()  # menu.models.invalidate_menu_cache moves the menu cache to a new generation
 
 class AdminMenuItemPriceUpdateView(generics.UpdateAPIView):
     """ Updates specific Prices and Seasonal flags """
@@ -65,5 +130,4 @@ class AdminMenuItemPriceUpdateView(generics.UpdateAPIView):
         if not (user.is_superuser or user.groups.filter(name__in=['Admin', 'Supervisor']).exists()):
             raise PermissionDenied("Only Supervisors and Admins can manage the menu.")
             
-        serializer.save()
-        cache.clear()
\ No newline at end of file
+        serializer.save()  # menu.models.invalidate_menu_cache moves the menu cache to a new generation
\ No newline at end of file
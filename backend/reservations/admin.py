@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, DiningArea, PointTransaction, Reservation, RewardItem, RewardRedemption
+from .models import Customer, DailyReservationRollup, DiningArea, HallSeatLedger, PointTransaction, Reservation, RewardItem, RewardRedemption
 
 @admin.register(DiningArea)
 class DiningAreaAdmin(admin.ModelAdmin):
@@ -34,4 +34,15 @@ class RewardRedemptionAdmin(admin.ModelAdmin):
     list_display = ('customer', 'reward_item', 'status', 'created_at')
     list_filter = ('status', 'created_at')
     search_fields = ('customer__name', 'customer__phone')
-    list_editable = ('status',)
\ No newline at end of file
+    list_editable = ('status',)
+@admin.register(DailyReservationRollup)
+class DailyReservationRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'session', 'area_type', 'bookings', 'pax', 'vip_rooms', 'estimated_revenue')
+    list_filter = ('session', 'area_type')
+    date_hierarchy = 'date'
+
+@admin.register(HallSeatLedger)
+class HallSeatLedgerAdmin(admin.ModelAdmin):
+    list_display = ('dining_area', 'date', 'session', 'booked_pax')
+    list_filter = ('session', 'dining_area')
+    date_hierarchy = 'date'
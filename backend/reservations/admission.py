@@ -0,0 +1,115 @@
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.fields import DateField
+from .models import DiningArea, HallSeatLedger, Reservation
+from .occupancy import INACTIVE_STATUSES
+
+
+def _held_seats(values, halls):
+    """ ((area_id, date, session), pax) a booking in this state holds in a hall, or None """
+    if not values or values.get('status') in INACTIVE_STATUSES or values.get('dining_area_id') not in halls:
+        return None
+    return (values['dining_area_id'], DateField().to_python(values['date']), values['session']), int(values['pax'])
+
+
+def ensure_ledger_row(area_id, date_val, session):
+    """ Creates the slot's ledger row on first use, counting the bookings already in it """
+    if HallSeatLedger.objects.filter(dining_area_id=area_id, date=date_val, session=session).exists():
+        return
+    booked = _slot_pax(area_id, date_val, session)
+    try:
+        with transaction.atomic():
+            HallSeatLedger.objects.create(dining_area_id=area_id, date=date_val, session=session, booked_pax=booked)
+    except IntegrityError:
+        pass  # Another booking created it first
+
+
+def apply_seat_change(stored, current):
+    """
+    Moves a booking's hall seats from the slot it held (`stored` field values) to the one it asks for
+    (`current`). Seats are only claimed if they fit, in one conditional UPDATE per slot; raises
+    ValidationError when the hall is full.
+    """
+    area_ids = {values.get('dining_area_id') for values in (stored, current) if values} - {None}
+    halls = dict(DiningArea.objects.filter(id__in=area_ids, area_type='HALL').values_list('id', 'capacity')) if area_ids else {}
+    if not halls:
+        return
+
+    deltas = {}
+    for values, sign in ((stored, -1), (current, 1)):
+        held = _held_seats(values, halls)
+        if held:
+            key, pax = held
+            deltas[key] = deltas.get(key, 0) + sign * pax
+
+    # Fixed slot order, so two bookings swapping slots lock the rows in the same sequence
+    for (area_id, date_val, session), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        ensure_ledger_row(area_id, date_val, session)
+        row = HallSeatLedger.objects.filter(dining_area_id=area_id, date=date_val, session=session)
+        if delta < 0:
+            row.update(booked_pax=F('booked_pax') + delta)
+        elif not row.filter(booked_pax__lte=halls[area_id] - delta).update(booked_pax=F('booked_pax') + delta):
+            seats_left = max(halls[area_id] - row.values_list('booked_pax', flat=True).get(), 0)
+            raise ValidationError({'pax': f"Only {seats_left} seats left in the Hall."})
+
+
+def _stored_booking(reservation):
+    # Locked so two writes to the same booking cannot both release its old seats
+    return Reservation.objects.select_for_update().filter(pk=reservation.pk).values(
+        'status', 'dining_area_id', 'date', 'session', 'pax'
+    ).first()
+
+
+def admit_hall_seats(reservation):
+    """ Claims hall seats for a booking about to be saved (call inside the save transaction) """
+    stored = None
+    if not reservation._state.adding and reservation.pk:
+        stored = _stored_booking(reservation)
+    apply_seat_change(stored, reservation.__dict__)
+
+
+def release_hall_seats(reservation):
+    """
+    Gives a booking's seats back before its row is deleted (call inside the delete transaction).
+    While the row still exists, a ledger row created now counts it, so it is released exactly once.
+    """
+    apply_seat_change(_stored_booking(reservation), None)
+
+
+def _slot_pax(area_id, date_val, session):
+    return Reservation.objects.filter(
+        dining_area_id=area_id, date=date_val, session=session
+    ).exclude(status__in=INACTIVE_STATUSES).aggregate(total=Sum('pax'))['total'] or 0
+
+
+def reconcile_hall_ledger(start, end):
+    """
+    Repairs ledger rows in a date window that disagree with the bookings they count (rows changed with
+    queryset.update(), raw admin edits, an area switching between hall and VIP). A drifted row is
+    recounted while locked, so a booking claiming seats meanwhile lands on top of the fresh count.
+    Returns the number of rows repaired.
+    """
+    counted = {
+        (row['dining_area_id'], row['date'], row['session']): row['total']
+        for row in Reservation.objects.filter(date__range=(start, end))
+        .exclude(status__in=INACTIVE_STATUSES)
+        .order_by()
+        .values('dining_area_id', 'date', 'session')
+        .annotate(total=Sum('pax'))
+    }
+
+    repaired = 0
+    ledger = HallSeatLedger.objects.filter(date__range=(start, end)).values_list('id', 'dining_area_id', 'date', 'session', 'booked_pax')
+    for row_id, area_id, date_val, session, booked_pax in ledger:
+        if counted.get((area_id, date_val, session), 0) == booked_pax:
+            continue
+        with transaction.atomic():
+            row = HallSeatLedger.objects.select_for_update().get(pk=row_id)
+            actual = _slot_pax(area_id, date_val, session)
+            if row.booked_pax != actual:
+                HallSeatLedger.objects.filter(pk=row_id).update(booked_pax=actual)
+                repaired += 1
+    return repaired
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from .models import DiningArea, Reservation
+from .occupancy import get_slot_occupancy, query_range_occupancy
+from .serializers import DiningAreaSerializer
+
+
+def get_availability(date_val, session):
+    """ Builds the /check/ payload: every active area plus its live availability """
+    areas = list(DiningArea.objects.filter(is_active=True).order_by('id'))
+    occupancy = get_slot_occupancy(date_val, session, [area.id for area in areas])
+
+    results = []
+    for area, data in zip(areas, DiningAreaSerializer(areas, many=True).data):
+        slot = occupancy[area.id]
+        is_available = True
+        current_pax = 0
+
+        if area.area_type == 'VIP':
+            if slot['bookings'] > 0:
+                is_available = False
+        elif area.area_type == 'HALL':
+            current_pax = slot['pax']
+            if current_pax >= area.capacity:
+                is_available = False
+
+        data['is_available'] = is_available
+        data['remaining_capacity'] = area.capacity - current_pax if area.area_type == 'HALL' else 0
+        results.append(data)
+
+    return results
+
+
+def get_occupancy_matrix(start, end):
+    """
+    Builds a compact date x session x area matrix for the booking calendar.
+    VIP rooms map to a booked flag and halls to their remaining seats.
+    The whole window is resolved with one grouped aggregate.
+    """
+    areas = list(DiningArea.objects.filter(is_active=True).order_by('id'))
+    occupancy = query_range_occupancy(start, end)
+
+    sessions = [code for code, _ in Reservation.SESSION_CHOICES]
+    days = {}
+    current = start
+    while current <= end:
+        day = {}
+        for session in sessions:
+            vip_booked = {}
+            hall_remaining = {}
+            for area in areas:
+                slot = occupancy.get((current, session, area.id))
+                if area.area_type == 'VIP':
+                    vip_booked[area.id] = bool(slot and slot['bookings'])
+                elif area.area_type == 'HALL':
+                    hall_remaining[area.id] = area.capacity - (slot['pax'] if slot else 0)
+
+            day[session] = {
+                'vip_booked': vip_booked,
+                'hall_remaining': hall_remaining,
+                'fully_booked': all(vip_booked.values()) and all(seats <= 0 for seats in hall_remaining.values()),
+            }
+        days[current.isoformat()] = day
+        current += timedelta(days=1)
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'areas': [
+            {'id': area.id, 'name': area.name, 'area_type': area.area_type, 'capacity': area.capacity}
+            for area in areas
+        ],
+        'days': days,
+    }
@@ -0,0 +1,140 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Subquery, Sum
+from django.db.models.fields import DateField
+from django.db.models.functions import Coalesce
+from .admission import admit_hall_seats
+from .models import DiningArea, Reservation
+from .occupancy import INACTIVE_STATUSES
+
+# The fields that decide whether and where a booking holds a room or hall seats
+SCHEDULING_FIELDS = ('dining_area_id', 'date', 'session', 'pax', 'status')
+
+
+def touches_scheduling(update_fields):
+    """ False for saves limited to other fields (reminder_sent, customer, bill amounts...) """
+    if update_fields is None:
+        return True
+    names = {'dining_area_id' if name == 'dining_area' else name for name in update_fields}
+    return bool(names & set(SCHEDULING_FIELDS))
+
+
+def _normalized(name, value):
+    if name == 'date':
+        return DateField().to_python(value)
+    if name in ('dining_area_id', 'pax') and value not in (None, ''):
+        return int(value)
+    return value
+
+
+def scheduling_changes(reservation, update_fields=None):
+    """ The scheduling fields this save changes compared to the stored row (all of them for a new booking) """
+    if not touches_scheduling(update_fields):
+        return set()
+    loaded = getattr(reservation, '_loaded_values', None)
+    if reservation._state.adding or not loaded:
+        return set(SCHEDULING_FIELDS)
+    return {
+        name for name in SCHEDULING_FIELDS
+        if name not in loaded or _normalized(name, loaded[name]) != _normalized(name, reservation.__dict__.get(name))
+    }
+
+
+def needs_clash_check(reservation, changes):
+    """ Moves and resizes can clash; of status changes, only reviving a cancelled booking can """
+    if changes & {'dining_area_id', 'date', 'session', 'pax'}:
+        return True
+    loaded = getattr(reservation, '_loaded_values', None) or {}
+    return 'status' in changes and loaded.get('status') == 'CANCELLED' and reservation.status != 'CANCELLED'
+
+
+def needs_seat_change(reservation, changes):
+    """ Hall seats move with the slot and pax, and with status changes into or out of cancelled / no-show """
+    if changes != {'status'}:
+        return True
+    loaded = getattr(reservation, '_loaded_values', None) or {}
+    return (loaded.get('status') in INACTIVE_STATUSES) != (reservation.status in INACTIVE_STATUSES)
+
+
+def check_booking(area, date_val, session, pax, status, exclude_pk=None):
+    """
+    Room capacity and the one-booking-per-VIP-room rule. Hall seats are claimed separately
+    through the seat ledger when the booking is saved (see reservations.admission).
+    """
+    if pax > area.capacity:
+        raise ValidationError({'pax': f"Guests exceed capacity ({area.capacity}) for this room."})
+
+    if area.area_type == 'VIP' and status != 'CANCELLED':
+        clashing = Reservation.objects.filter(dining_area=area, date=date_val, session=session).exclude(status='CANCELLED')
+        if exclude_pk:
+            clashing = clashing.exclude(pk=exclude_pk)
+        if clashing.exists():
+            raise ValidationError(f"{area.name} is already booked for this session.")
+
+
+def booking_key(reservation):
+    return tuple(_normalized(name, reservation.__dict__.get(name)) for name in SCHEDULING_FIELDS) + (reservation.pk,)
+
+
+def enforce_booking_rules(reservation, update_fields=None):
+    """
+    Runs the booking rules for a save, once: nothing at all for saves that leave the scheduling fields
+    alone, no clash query for plain status moves, and no repeat of a check clean() already ran.
+    Call inside the save transaction.
+    """
+    changes = scheduling_changes(reservation, update_fields)
+    if not changes:
+        return
+    if 'dining_area_id' in changes:
+        reservation.is_private_room = reservation.dining_area.area_type == 'VIP'
+    if needs_clash_check(reservation, changes) and getattr(reservation, '_checked_booking', None) != booking_key(reservation):
+        reservation.clean()
+    if needs_seat_change(reservation, changes):
+        admit_hall_seats(reservation)
+
+
+def load_assignable_areas(date_val, session):
+    """ Every active room and hall with its slot occupancy (is_taken for rooms, booked_pax for halls), in one query """
+    in_slot = Reservation.objects.filter(dining_area=OuterRef('pk'), date=date_val, session=session).order_by()
+    booked_pax = in_slot.exclude(status__in=INACTIVE_STATUSES).values('dining_area').annotate(total=Sum('pax')).values('total')
+    return list(DiningArea.objects.filter(is_active=True).annotate(
+        is_taken=Exists(in_slot.exclude(status='CANCELLED')),
+        booked_pax=Coalesce(Subquery(booked_pax), 0),
+    ))
+
+
+def rank_areas(areas, area_types, pax):
+    """
+    The areas that can take the party, best first: in the order of `area_types`, then the smallest
+    room that fits, then the cheapest. A VIP room fits when it is free, min_pax <= pax <= capacity,
+    and the party is too big for the next smaller room size: each size of room is kept for its own
+    size of party, so a couple never takes a 20-seat room even when the small ones are booked.
+    """
+    vip_sizes = sorted({area.capacity for area in areas if area.area_type == 'VIP'})
+
+    def smallest_party(area):
+        smaller = [size for size in vip_sizes if size < area.capacity]
+        return max(area.min_pax, smaller[-1] + 1 if smaller else 1)
+
+    def fits(area):
+        if area.area_type == 'VIP':
+            return not area.is_taken and smallest_party(area) <= pax <= area.capacity
+        return area.capacity - area.booked_pax >= pax
+
+    return sorted(
+        (area for area in areas if area.area_type in area_types and fits(area)),
+        key=lambda area: (area_types.index(area.area_type), area.capacity, area.price, area.id),
+    )
+
+
+def book_best_area(areas, area_types, pax, **fields):
+    """
+    Books the party into the best area that admits it. Every attempt goes through Reservation.save's
+    admission control (VIP constraint, hall seat ledger), so an area a concurrent booking took a moment
+    ago is skipped for the next best one. Returns the reservation, or None when everything is full.
+    """
+    for area in rank_areas(areas, area_types, pax):
+        try:
+            return Reservation.objects.create(dining_area=area, pax=pax, **fields)
+        except ValidationError:
+            continue
+    return None
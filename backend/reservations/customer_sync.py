@@ -0,0 +1,112 @@
+from django.core.cache import cache
+from django.db import transaction
+from .models import Customer, Reservation
+from .utils import phone_book_key
+
+# The reservation fields its phone book entry is derived from
+CONTACT_FIELDS = ('customer_name', 'customer_contact', 'customer_email')
+
+# Bookings arriving together (peak hours, imports) share one sync, queued this many seconds later
+CUSTOMER_SYNC_PENDING_KEY = 'reservations:customer-sync-pending'
+CUSTOMER_SYNC_DELAY = 2
+CUSTOMER_SYNC_BATCH_SIZE = 500
+
+
+def needs_customer_sync(reservation, update_fields=None):
+    """ True for new bookings and for saves that change the contact details; status flips, reminders and bills don't """
+    if update_fields is not None and not set(update_fields) & set(CONTACT_FIELDS):
+        return False
+    loaded = getattr(reservation, '_loaded_values', None)
+    if reservation._state.adding or not loaded:
+        return True
+    return any(name not in loaded or loaded[name] != reservation.__dict__.get(name) for name in CONTACT_FIELDS)
+
+
+def queue_customer_sync():
+    """ Schedules one background sync after the write commits; further bookings before it runs join that one """
+    def queue():
+        if not cache.add(CUSTOMER_SYNC_PENDING_KEY, 1, CUSTOMER_SYNC_DELAY * 30):
+            return  # A sync is already queued and will pick this booking up
+        from .tasks import sync_reservation_customers
+        try:
+            sync_reservation_customers.apply_async(countdown=CUSTOMER_SYNC_DELAY)
+        except Exception as e:
+            cache.delete(CUSTOMER_SYNC_PENDING_KEY)
+            print(f"Warning: Could not queue customer sync: {e}")
+
+    transaction.on_commit(queue)
+
+
+def _upsert_phone_customers(bookings):
+    """
+    Creates or refreshes the phone book entries for {phone: reservation} in one INSERT ... ON CONFLICT.
+    New entries take the booking's name and email; existing ones keep their name, gain an email if
+    they had none, and get last_visit bumped. Returns {phone: customer_id}.
+    """
+    existing_emails = dict(Customer.objects.filter(phone__in=bookings).values_list('phone', 'email'))
+    customers = [
+        Customer(phone=phone, name=reservation.customer_name, email=existing_emails.get(phone) or reservation.customer_email)
+        for phone, reservation in bookings.items()
+    ]
+    Customer.objects.bulk_create(
+        customers, update_conflicts=True, unique_fields=['phone'], update_fields=['email', 'last_visit'],
+    )
+    return {customer.phone: customer.pk for customer in customers}
+
+
+def _care_of_customer(reservation, handler):
+    """
+    'Care Of' contacts have no phone to upsert on: looked up by name and handler, one at a time.
+    The phone book may hold duplicates of these, so the oldest entry wins.
+    """
+    customer = Customer.objects.filter(name=reservation.customer_name, care_of=handler).order_by('id').first()
+    if customer is None:
+        return Customer.objects.create(name=reservation.customer_name, care_of=handler, email=reservation.customer_email).pk
+    if not customer.email and reservation.customer_email:
+        customer.email = reservation.customer_email
+    customer.save(update_fields=['email', 'last_visit'])
+    return customer.pk
+
+
+def sync_pending_customers(reservation_ids=None, batch_size=CUSTOMER_SYNC_BATCH_SIZE):
+    """
+    Files every booking marked customer_sync_pending (or just `reservation_ids`) in the phone book and
+    links it to its Customer. Phone contacts are batch-upserted; a booking edited while it is being
+    synced stays locked until this batch commits and is then marked again. Returns the number synced.
+    """
+    synced = 0
+    while True:
+        with transaction.atomic():
+            pending = Reservation.objects.filter(customer_sync_pending=True)
+            if reservation_ids is not None:
+                pending = pending.filter(pk__in=reservation_ids)
+            batch = list(
+                pending.select_for_update(skip_locked=True).order_by('id')
+                .only('id', 'customer_id', *CONTACT_FIELDS)[:batch_size]
+            )
+            if not batch:
+                return synced
+
+            by_phone = {}
+            for reservation in batch:
+                phone = phone_book_key(reservation.customer_contact)
+                if phone:
+                    by_phone.setdefault(phone, reservation)  # The earliest booking names a new entry
+            customer_ids = _upsert_phone_customers(by_phone) if by_phone else {}
+
+            for reservation in batch:
+                phone = phone_book_key(reservation.customer_contact)
+                if phone:
+                    reservation.customer_id = customer_ids[phone]
+                elif reservation.customer_contact and str(reservation.customer_contact).strip():
+                    try:
+                        with transaction.atomic():
+                            reservation.customer_id = _care_of_customer(reservation, str(reservation.customer_contact).strip())
+                    except Exception as e:
+                        # Left unlinked rather than retried forever: one bad entry must not hold up the queue
+                        print(f"Failed to auto-save customer to phonebook for reservation #{reservation.id}: {e}")
+                reservation.customer_sync_pending = False
+
+            # bulk_update skips save() and its signals: no rollup, cache or history side effects
+            Reservation.objects.bulk_update(batch, ['customer', 'customer_sync_pending'])
+            synced += len(batch)
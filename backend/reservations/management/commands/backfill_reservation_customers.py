@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from reservations.models import Customer, Reservation
+from reservations.utils import phone_book_key
+
+class Command(BaseCommand):
+    help = 'Links existing reservations to their phone book Customer in id-ordered batches (safe to re-run).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        linked = unmatched = 0
+
+        while True:
+            # Keyset batches over the unlinked rows: constant cost per batch however large the table
+            batch = list(
+                Reservation.objects
+                .filter(customer__isnull=True, id__gt=last_id)
+                .order_by('id')
+                .only('id', 'customer_name', 'customer_contact')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            keys = {r.id: phone_book_key(r.customer_contact) for r in batch}
+            by_phone = dict(
+                Customer.objects.filter(phone__in=set(keys.values()) - {None}).values_list('phone', 'id')
+            )
+            care_of = {str(r.customer_contact).strip() for r in batch if keys[r.id] is None and r.customer_contact}
+            by_care_of = {
+                (name, handler): customer_id
+                for name, handler, customer_id in Customer.objects.filter(care_of__in=care_of).values_list('name', 'care_of', 'id')
+            }
+
+            to_update = []
+            for reservation in batch:
+                if keys[reservation.id]:
+                    customer_id = by_phone.get(keys[reservation.id])
+                else:
+                    customer_id = by_care_of.get((reservation.customer_name, str(reservation.customer_contact or '').strip()))
+                if customer_id:
+                    reservation.customer_id = customer_id
+                    to_update.append(reservation)
+                else:
+                    unmatched += 1
+
+            # bulk_update skips save() and its signals: no rollup, cache or phone book side effects
+            Reservation.objects.bulk_update(to_update, ['customer'], batch_size=500)
+            linked += len(to_update)
+            self.stdout.write(f"...linked {linked} so far (up to reservation #{last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Linked {linked} reservations; {unmatched} have no matching customer."))
@@ -0,0 +1,22 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reservations.reports import rebuild_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuilds DailyReservationRollup from the reservations table (all dates, or a --start/--end window).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last date to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format.')
+
+        with transaction.atomic():
+            count = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup rows."))
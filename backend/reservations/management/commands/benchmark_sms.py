@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from reservations.sms import FakeTransport, SMSClient
+
+class Command(BaseCommand):
+    help = 'Benchmarks SMS dispatch strategies offline against a fake gateway with simulated latency.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200, help='Number of recipients')
+        parser.add_argument('--latency', type=float, default=0.15, help='Simulated gateway round trip in seconds')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent requests for personalised messages')
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        numbers = [f"0917{i:07d}" for i in range(count)]
+        personalised = [(number, f"Hi guest {i}, see you soon! - GOLDENBAY") for i, number in enumerate(numbers)]
+        shared_body = "Golden Bay is fully booked tonight. - GOLDENBAY"
+
+        strategies = [
+            ('serial send() (previous behaviour)', lambda client: [client.send(n, body) for n, body in personalised]),
+            (f"send_many() personalised, {options['workers']} workers", lambda client: client.send_many(personalised)),
+            ('send_bulk() same body', lambda client: client.send_bulk(numbers, shared_body)),
+        ]
+
+        self.stdout.write(f"{count} recipients, {options['latency'] * 1000:.0f}ms simulated gateway latency")
+        for label, action in strategies:
+            transport = FakeTransport(latency=options['latency'])
+            client = SMSClient(
+                api_key='benchmark', transport=transport, max_workers=options['workers'],
+                verbose=False, use_admin_switch=False,
+            )
+
+            started = time.perf_counter()
+            action(client)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<36} {elapsed:8.2f}s {count / elapsed:9.1f} msg/s {len(transport.calls):6} gateway calls"
+            )
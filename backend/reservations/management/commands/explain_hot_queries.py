@@ -0,0 +1,117 @@
+import random
+from datetime import date, time, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from reservations.models import DiningArea, Reservation
+from reservations.occupancy import INACTIVE_STATUSES, range_occupancy_queryset, slot_occupancy_queryset
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN on the reservation hot-path queries and fails if any of them does not use an index. '
+        'Use --seed to run against a synthetic table (rolled back afterwards unless --keep).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Insert this many synthetic reservations first (e.g. 500000)')
+        parser.add_argument('--keep', action='store_true', help='Commit the seeded rows instead of rolling them back')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                failures = self.explain_all()
+                if options['seed'] and not options['keep']:
+                    raise Rollback()
+        except Rollback:
+            self.stdout.write("Seeded rows rolled back.")
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries are not using an index: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index.'))
+
+    def seed(self, count):
+        self.stdout.write(f"Seeding {count:,} reservations...")
+        areas = list(DiningArea.objects.filter(is_active=True))
+        if not areas:
+            areas = [DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=200)] + [
+                DiningArea.objects.create(name=f"VIP Room {i}", area_type='VIP', capacity=12) for i in range(1, 14)
+            ]
+
+        statuses = ['COMPLETED'] * 14 + ['CANCELLED'] * 2 + ['NO_SHOW', 'PENDING', 'CONFIRMED', 'SEATED']
+        first_day = date.today() - timedelta(days=3 * 365)
+        batch = []
+        for i in range(count):
+            batch.append(Reservation(
+                customer_name=f"Seed Guest {i}",
+                customer_contact=f"0917{i % 10_000_000:07d}",
+                dining_area=random.choice(areas),
+                date=first_day + timedelta(days=random.randrange(3 * 365 + 60)),
+                session=random.choice(['LUNCH', 'DINNER']),
+                time=time(random.choice([11, 12, 13, 17, 18, 19]), random.choice([0, 30])),
+                pax=random.randint(1, 12),
+                status=random.choice(statuses),
+                reminder_sent=random.random() < 0.9,
+            ))
+            if len(batch) == 5000:
+                Reservation.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Reservation.objects.bulk_create(batch)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Reservation._meta.db_table}')
+
+    def hot_queries(self):
+        today = date.today()
+        area = DiningArea.objects.filter(is_active=True).order_by('id').first()
+        area_id = area.id if area else 0
+
+        return {
+            # AvailableRoomsView / occupancy cache misses
+            'availability (one session)': slot_occupancy_queryset(today, 'DINNER'),
+            # AvailabilityCalendarView / reconcile_occupancy_cache
+            'availability calendar (month)': range_occupancy_queryset(today, today + timedelta(days=30)),
+            # ReservationSerializer / Reservation.clean VIP clash check
+            'room clash check': Reservation.objects.filter(
+                dining_area_id=area_id, date=today, session='DINNER'
+            ).exclude(status='CANCELLED'),
+            # Hall pax sum for a single area
+            'hall pax sum': Reservation.objects.filter(
+                dining_area_id=area_id, date=today, session='DINNER'
+            ).exclude(status__in=INACTIVE_STATUSES),
+            # DashboardStatsView / OwnerReportView
+            'dashboard (today, active)': Reservation.objects.filter(
+                date=today, status__in=['CONFIRMED', 'SEATED', 'COMPLETED']
+            ),
+            'pending queue': Reservation.objects.filter(status='PENDING').order_by('-created_at'),
+            # send_reminders
+            'reminders due': Reservation.objects.filter(
+                status='CONFIRMED', reminder_sent=False, date__in=[today, today + timedelta(days=1)]
+            ),
+            # AdminReservationListView default page
+            'staff list (first page)': Reservation.objects.order_by('-created_at', '-id')[:50],
+        }
+
+    def uses_index(self, plan):
+        if connection.vendor == 'postgresql':
+            return 'Index Scan' in plan or 'Index Only Scan' in plan
+        if connection.vendor == 'sqlite':
+            return 'USING INDEX' in plan or 'USING COVERING INDEX' in plan
+        return 'index' in plan.lower()
+
+    def explain_all(self):
+        failures = []
+        for name, queryset in self.hot_queries().items():
+            plan = queryset.explain()
+            if self.uses_index(plan):
+                self.stdout.write(self.style.SUCCESS(f"[INDEX] {name}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"[SCAN]  {name}"))
+                failures.append(name)
+            self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        return failures
@@ -3,8 +3,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from reservations.models import Reservation
 from reservations.utils import send_sms
-from django.core.mail import send_mail
-from django.conf import settings
+from core.mail import build_email, send_emails
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 
@@ -56,17 +55,15 @@ class Command(BaseCommand):
                     html_message = render_to_string('emails/confirmation.html', context)
                     plain_message = strip_tags(html_message)
 
-                    send_mail(
+                    send_emails([build_email(
                         subject='Table Reminder - Golden Bay',
-                        message=plain_message,
-                        from_email=settings.EMAIL_HOST_USER,
-                        recipient_list=[res.customer_email],
-                        fail_silently=True,
-                        html_message=html_message
-                    )
+                        body=plain_message,
+                        to=[res.customer_email],
+                        html=html_message,
+                    )], fail_silently=True)
 
-                # Mark as sent so we don't message them again!
+                # Mark as sent so we don't message them again! (a flag-only save skips the booking checks)
                 res.reminder_sent = True
-                res.save()
+                res.save(update_fields=['reminder_sent'])
 
         self.stdout.write(self.style.SUCCESS('Successfully checked and sent reminders.'))
\ No newline at end of file
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0018_reservation_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('status', 'CANCELLED'), _negated=True), fields=['dining_area', 'date', 'session'], name='res_active_slot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'status'], name='res_date_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('reminder_sent', False), ('status', 'CONFIRMED')), fields=['date', 'time'], name='res_reminder_due_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:17
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Reservation = apps.get_model('reservations', 'Reservation')
+    DailyReservationRollup = apps.get_model('reservations', 'DailyReservationRollup')
+
+    rows = (
+        Reservation.objects
+        .exclude(status__in=['CANCELLED', 'NO_SHOW'])
+        .order_by()
+        .values('date', 'session', 'dining_area__area_type')
+        .annotate(bookings=Count('id'), pax=Sum('pax'), vip_rooms=Count('id', filter=Q(dining_area__area_type='VIP')))
+    )
+    DailyReservationRollup.objects.bulk_create([
+        DailyReservationRollup(
+            date=row['date'], session=row['session'], area_type=row['dining_area__area_type'],
+            bookings=row['bookings'], pax=row['pax'] or 0, vip_rooms=row['vip_rooms'],
+            estimated_revenue=(row['pax'] or 0) * 1500,
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0019_reservation_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReservationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('session', models.CharField(choices=[('LUNCH', 'Lunch (11:00 AM - 2:30 PM)'), ('DINNER', 'Dinner (5:00 PM - 10:00 PM)')], max_length=10)),
+                ('area_type', models.CharField(choices=[('VIP', 'VIP Room'), ('HALL', 'Main Dining Hall (Ala Carte)')], max_length=10)),
+                ('bookings', models.IntegerField(default=0)),
+                ('pax', models.IntegerField(default=0)),
+                ('vip_rooms', models.IntegerField(default=0, help_text='VIP rooms occupied')),
+                ('estimated_revenue', models.IntegerField(default=0, help_text='Estimated PHP spend (per-head estimate x pax)')),
+            ],
+            options={
+                'ordering': ['date', 'session', 'area_type'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'session', 'area_type'), name='unique_daily_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0020_daily_reservation_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalreservation',
+            name='customer',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='reservations.customer'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='customer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservations', to='reservations.customer'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:48
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+LIVE_STATUSES = ['PENDING', 'CONFIRMED', 'SEATED']
+
+
+def mark_private_rooms(apps, schema_editor):
+    """
+    Flags VIP bookings for the one-live-booking constraint. Rooms the old code double-booked keep
+    the flag on their first booking only, so the deploy never waits on cleaning up history;
+    upcoming clashes are listed for staff to move.
+    """
+    Reservation = apps.get_model('reservations', 'Reservation')
+    Reservation.objects.filter(dining_area__area_type='VIP').update(is_private_room=True)
+
+    clashes = (
+        Reservation.objects
+        .filter(is_private_room=True, status__in=LIVE_STATUSES)
+        .order_by()
+        .values('dining_area_id', 'dining_area__name', 'date', 'session')
+        .annotate(bookings=Count('id'), first=Min('id'))
+        .filter(bookings__gt=1)
+    )
+    upcoming = []
+    for row in clashes.iterator():
+        Reservation.objects.filter(
+            dining_area_id=row['dining_area_id'], date=row['date'], session=row['session'],
+            is_private_room=True, status__in=LIVE_STATUSES,
+        ).exclude(pk=row['first']).update(is_private_room=False)
+        if row['date'] >= date.today():
+            upcoming.append(f"{row['dining_area__name']} {row['date']} {row['session']}")
+    if upcoming:
+        print(f"\n  Double-booked VIP rooms to move: {', '.join(upcoming)}")
+
+    if schema_editor.connection.vendor == 'postgresql':
+        # Fire the deferred FK checks the updates queued: PostgreSQL won't build the index below over pending ones
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0021_reservation_customer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HallSeatLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('session', models.CharField(choices=[('LUNCH', 'Lunch (11:00 AM - 2:30 PM)'), ('DINNER', 'Dinner (5:00 PM - 10:00 PM)')], max_length=10)),
+                ('booked_pax', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'session'],
+            },
+        ),
+        migrations.AddField(
+            model_name='historicalreservation',
+            name='is_private_room',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='is_private_room',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_private_rooms, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_private_room', True), ('status__in', ['PENDING', 'CONFIRMED', 'SEATED'])), fields=('dining_area', 'date', 'session'), name='res_one_active_vip_booking'),
+        ),
+        migrations.AddField(
+            model_name='hallseatledger',
+            name='dining_area',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_ledger', to='reservations.diningarea'),
+        ),
+        migrations.AddConstraint(
+            model_name='hallseatledger',
+            constraint=models.UniqueConstraint(fields=('dining_area', 'date', 'session'), name='unique_hall_seat_ledger'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0022_admission_control'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalreservation',
+            name='customer_sync_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='customer_sync_pending',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('customer_sync_pending', True)), fields=['id'], name='res_customer_sync_idx'),
+        ),
+    ]
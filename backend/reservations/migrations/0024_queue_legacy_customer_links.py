@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:05
+
+from django.db import migrations
+
+
+def queue_unlinked_bookings(apps, schema_editor):
+    """
+    Bookings made before Reservation.customer existed are matched to the phone book by the scheduled
+    customer sync (reservations.tasks.sync_reservation_customers) rather than inside this migration.
+    """
+    Reservation = apps.get_model('reservations', 'Reservation')
+    Reservation.objects.filter(customer__isnull=True).exclude(customer_contact='').update(customer_sync_pending=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0023_customer_sync_queue'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_unlinked_bookings, migrations.RunPython.noop),
+    ]
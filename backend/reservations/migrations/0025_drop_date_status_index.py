@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0024_queue_legacy_customer_links'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='res_date_status_idx',
+        ),
+    ]
@@ -1,12 +1,13 @@
-from django.db import models
+from django.db import DatabaseError, IntegrityError, models
 from django.core.exceptions import ValidationError
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from simple_history.models import HistoricalRecords
 from django.db import transaction
+from core.models import ImageDerivativesModel
 
-class DiningArea(models.Model):
+class DiningArea(ImageDerivativesModel):
     TYPE_CHOICES = [
         ('VIP', 'VIP Room'),
         ('HALL', 'Main Dining Hall (Ala Carte)'),
@@ -29,6 +30,30 @@ class DiningArea(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    def shared_session_error(self):
+        """ The error for making a room that holds several live bookings in one session a VIP room, or None """
+        shared = (
+            self.reservations.filter(status__in=['PENDING', 'CONFIRMED', 'SEATED']).order_by('date', 'session')
+            .values('date', 'session').annotate(bookings=models.Count('id')).filter(bookings__gt=1).first()
+        )
+        if shared:
+            return ValidationError({'area_type': (
+                f"Cannot make this a VIP room: it has {shared['bookings']} live bookings on "
+                f"{shared['date']} ({shared['session']}). Move or cancel them first."
+            )})
+        return None
+
+    def clean(self):
+        if self.area_type == 'VIP' and self.pk:
+            error = self.shared_session_error()
+            if error:
+                raise error
+
+    def save(self, *args, **kwargs):
+        # The room and its bookings' is_private_room copy (sync_private_room_flag) change together or not at all
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.get_area_type_display()})"
     
@@ -58,9 +83,15 @@ class Reservation(models.Model):
     customer_name = models.CharField(max_length=100)
     customer_contact = models.CharField(max_length=50, help_text="Phone or Viber")
     customer_email = models.EmailField(blank=True, null=True)
+    # Phone book entry, linked in the background by reservations.customer_sync (backfill: manage.py backfill_reservation_customers)
+    customer = models.ForeignKey('Customer', on_delete=models.SET_NULL, null=True, blank=True, related_name='reservations')
+    # Set by new bookings and contact changes until the phone book sync has filed them
+    customer_sync_pending = models.BooleanField(default=False, editable=False)
     
     # Booking Details
     dining_area = models.ForeignKey(DiningArea, on_delete=models.CASCADE, related_name='reservations')
+    # Copy of dining_area.area_type == 'VIP', so the one-booking-per-room rule can be a database constraint
+    is_private_room = models.BooleanField(default=False, editable=False)
     date = models.DateField()
     session = models.CharField(max_length=10, choices=SESSION_CHOICES)
     time = models.TimeField(help_text="Specific arrival time")
@@ -86,24 +117,126 @@ class Reservation(models.Model):
 
     class Meta:
         ordering = ['-date', '-time']
+        indexes = [
+            # Staff list: keyset pagination, newest first
+            models.Index(fields=['-created_at', '-id'], name='res_created_keyset_idx'),
+            # Staff list narrowed to a day or a date range ("today" view), one-session availability,
+            # dashboard and calendar ranges (a day is few enough rows to filter status after the scan)
+            models.Index(fields=['date', 'session'], name='res_date_session_idx'),
+            # Staff list filtered by status (e.g. the PENDING queue)
+            models.Index(fields=['status', '-created_at'], name='res_status_created_idx'),
+            # Room clash checks and hall pax sums: one slot, ignoring cancelled rows.
+            # Queries excluding CANCELLED (and NO_SHOW) imply this predicate, so they can use it.
+            models.Index(
+                fields=['dining_area', 'date', 'session'],
+                condition=~models.Q(status='CANCELLED'),
+                name='res_active_slot_idx',
+            ),
+            # send_reminders only ever looks at confirmed bookings that still need a reminder
+            models.Index(
+                fields=['date', 'time'],
+                condition=models.Q(status='CONFIRMED', reminder_sent=False),
+                name='res_reminder_due_idx',
+            ),
+            # The phone book sync's work queue
+            models.Index(fields=['id'], condition=models.Q(customer_sync_pending=True), name='res_customer_sync_idx'),
+        ]
+        constraints = [
+            # One live booking per VIP room and session, enforced even when two requests race past clean().
+            # Finished bookings are history: old double bookings never block a deploy or a room change
+            models.UniqueConstraint(
+                fields=['dining_area', 'date', 'session'],
+                condition=models.Q(is_private_room=True, status__in=['PENDING', 'CONFIRMED', 'SEATED']),
+                name='res_one_active_vip_booking',
+            ),
+        ]
+
+    def clashing_bookings(self):
+        """ Other live bookings of the same room and session """
+        return Reservation.objects.filter(
+            dining_area=self.dining_area,
+            date=self.date,
+            session=self.session
+        ).exclude(pk=self.pk).exclude(status='CANCELLED')
 
     def clean(self):
-        if self.dining_area.area_type == 'VIP' and self.status != 'CANCELLED':
-            clashing = Reservation.objects.filter(
-                dining_area=self.dining_area,
-                date=self.date,
-                session=self.session
-            ).exclude(pk=self.pk).exclude(status='CANCELLED')
-            
-            if clashing.exists():
-                raise ValidationError(f"{self.dining_area.name} is already booked for this session.")
-
-        if self.pax > self.dining_area.capacity:
-            raise ValidationError(f"Guests exceed capacity ({self.dining_area.capacity}) for this room.")
+        from .booking_rules import booking_key, check_booking
+
+        check_booking(self.dining_area, self.date, self.session, self.pax, self.status, exclude_pk=self.pk)
+        # save() skips the same check for the same values (admin forms run clean() first)
+        self._checked_booking = booking_key(self)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored row so writes know which slot a booking moved away from
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # The reloaded fields are the stored row again
+        names = set(fields) if fields is not None else None
+        loaded = getattr(self, '_loaded_values', None) or {}
+        for f in self._meta.concrete_fields:
+            if (names is None or f.name in names or f.attname in names) and f.attname in self.__dict__:
+                loaded[f.attname] = self.__dict__[f.attname]
+        self._loaded_values = loaded
 
     def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+        from .booking_rules import enforce_booking_rules
+        from .customer_sync import needs_customer_sync, queue_customer_sync
+
+        # Only new bookings and contact changes go to the phone book, in a background batch
+        sync_customer = needs_customer_sync(self, kwargs.get('update_fields'))
+        forced_fields = False
+        if sync_customer:
+            self.customer_sync_pending = True
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'customer_sync_pending'}
+        elif kwargs.get('update_fields') is None and not kwargs.get('force_insert') and self.pk is not None:
+            # This copy's flag and customer link may predate the sync that set them: leave the stored
+            # ones alone unless this save changes the link itself
+            skipped = {'customer_sync_pending'}
+            if (getattr(self, '_loaded_values', None) or {}).get('customer_id') == self.customer_id:
+                skipped.add('customer')
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name not in skipped
+            ]
+            forced_fields = True
+
+        # Keep the row, its hall seats and everything post_save derives from it (daily rollups) in one transaction
+        with transaction.atomic():
+            # Saves that leave the scheduling fields alone (reminder flags, bills) skip every check
+            enforce_booking_rules(self, kwargs.get('update_fields'))
+            try:
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                except DatabaseError as e:
+                    # The row was deleted meanwhile: a plain save re-inserts it, as it always did
+                    if isinstance(e, IntegrityError) or not forced_fields or Reservation.objects.filter(pk=self.pk).exists():
+                        raise
+                    with transaction.atomic():
+                        super().save(*args, **{**kwargs, 'update_fields': None})
+            except IntegrityError:
+                # Lost a race for a VIP room that clean() saw as free
+                if self.is_private_room and self.clashing_bookings().exists():
+                    raise ValidationError(f"{self.dining_area.name} is already booked for this session.")
+                raise
+            if sync_customer:
+                queue_customer_sync()
+        self._loaded_values = {
+            f.attname: self.__dict__[f.attname] for f in self._meta.concrete_fields if f.attname in self.__dict__
+        }
+
+    def occupancy_slots(self):
+        """ The (area, date, session) slots this booking occupies now and occupied when loaded """
+        slots = {(self.dining_area_id, self.date, self.session)}
+        loaded = getattr(self, '_loaded_values', {})
+        if all(name in loaded for name in ('dining_area_id', 'date', 'session')):
+            slots.add((loaded['dining_area_id'], loaded['date'], loaded['session']))
+        return slots
 
     def __str__(self):
         return f"{self.customer_name} - {self.date} ({self.session})"
@@ -141,7 +274,7 @@ class Customer(models.Model):
         contact_info = self.phone or self.care_of or 'No Contact'
         return f"{self.name} ({contact_info})"
     
-class RewardItem(models.Model):
+class RewardItem(ImageDerivativesModel):
     """ Food items that customers can redeem using their points """
     name = models.CharField(max_length=200)
     size = models.CharField(max_length=50, blank=True, null=True)
@@ -202,64 +335,98 @@ class PointTransaction(models.Model):
                     cust.points_balance -= self.points
                 cust.save(update_fields=['points_balance'])
 
-# --- ADD THIS SIGNAL TO AUTO-SAVE CUSTOMERS ---
-@receiver(post_save, sender=Reservation)
-def save_customer_from_reservation(sender, instance, created, **kwargs):
+@receiver([post_save, post_delete], sender=Reservation)
+def invalidate_reservation_caches(sender, instance, **kwargs):
+    """
+    Retires the cached occupancy counters for every slot this write touched,
+    including status flips to CANCELLED / NO_SHOW and moves between rooms or dates,
+    plus the cached dashboard stats.
+    Runs after commit; a read that counted the pre-write rows caches them under the retired version.
+    """
+    from .occupancy import invalidate_occupancy
+    from .reports import invalidate_dashboard_stats
+
+    slots = instance.occupancy_slots()
+
+    def invalidate():
+        invalidate_occupancy(slots)
+        invalidate_dashboard_stats()
+
+    transaction.on_commit(invalidate)
+
+class DailyReservationRollup(models.Model):
     """
-    When a Reservation is saved, automatically create or update the Customer 
-    in the Phone Book. It smartly handles both Phone Numbers and 'Care Of' names.
+    Active (not cancelled / no-show) bookings pre-aggregated per day, session and area type.
+    Kept current by reservation writes; rebuilt with `manage.py backfill_rollups`.
     """
-    if instance.customer_contact:
-        try:
-            # 1. Determine if the contact is a phone number or a "Care Of" handler
-            contact_str = str(instance.customer_contact).strip()
-            
-            # If the contact string contains letters (A-Z, a-z), treat it as 'care_of'
-            # Otherwise, treat it as a 'phone' number
-            is_care_of = any(c.isalpha() for c in contact_str)
-
-            customer = None
-            customer_created = False
-
-            # 2. Search for existing customer or create new
-            if is_care_of:
-                # Search by name AND care_of to avoid mixing up people with the same handler
-                customer, customer_created = Customer.objects.get_or_create(
-                    name=instance.customer_name,
-                    care_of=contact_str,
-                    defaults={
-                        'email': instance.customer_email
-                    }
-                )
-            else:
-                # Standard phone number search
-                # Clean the phone number to match phone book formatting
-                clean_phone = ''.join(filter(str.isdigit, contact_str))
-                if clean_phone.startswith('63') and len(clean_phone) == 12:
-                    clean_phone = '0' + clean_phone[2:]
-                
-                # Fallback to the raw string if cleaning wiped it out (e.g. they typed symbols only)
-                final_phone = clean_phone if clean_phone else contact_str
-
-                customer, customer_created = Customer.objects.get_or_create(
-                    phone=final_phone,
-                    defaults={
-                        'name': instance.customer_name,
-                        'email': instance.customer_email
-                    }
-                )
-
-            # 3. If customer exists, update their latest info
-            if not customer_created:
-                customer.last_visit = instance.date
-                # Update email if the reservation has one and the profile doesn't
-                if not customer.email and instance.customer_email:
-                    customer.email = instance.customer_email
-                customer.save()
-
-        except Exception as e:
-            # Prevents a 500 Server Error if the Phone Book has duplicate numbers or crashes
-            print(f"Failed to auto-save customer to phonebook: {e}")
+    date = models.DateField()
+    session = models.CharField(max_length=10, choices=Reservation.SESSION_CHOICES)
+    area_type = models.CharField(max_length=10, choices=DiningArea.TYPE_CHOICES)
+    bookings = models.IntegerField(default=0)
+    pax = models.IntegerField(default=0)
+    vip_rooms = models.IntegerField(default=0, help_text="VIP rooms occupied")
+    estimated_revenue = models.IntegerField(default=0, help_text="Estimated PHP spend (per-head estimate x pax)")
+
+    class Meta:
+        ordering = ['date', 'session', 'area_type']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'session', 'area_type'], name='unique_daily_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.session} {self.area_type}: {self.bookings} bookings / {self.pax} pax"
+
+class HallSeatLedger(models.Model):
+    """
+    Seats taken in one hall slot. Bookings claim seats with a single conditional UPDATE
+    (booked_pax + pax <= capacity), so they only ever wait on bookings for the same slot.
+    Rows are created on first use from the reservations already in the slot.
+    """
+    dining_area = models.ForeignKey(DiningArea, on_delete=models.CASCADE, related_name='seat_ledger')
+    date = models.DateField()
+    session = models.CharField(max_length=10, choices=Reservation.SESSION_CHOICES)
+    booked_pax = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'session']
+        constraints = [
+            models.UniqueConstraint(fields=['dining_area', 'date', 'session'], name='unique_hall_seat_ledger'),
+        ]
+
+    def __str__(self):
+        return f"{self.dining_area.name} {self.date} {self.session}: {self.booked_pax}/{self.dining_area.capacity} pax"
+
+@receiver(pre_delete, sender=Reservation)
+def release_hall_seats(sender, instance, **kwargs):
+    """ Gives a deleted booking's seats back to its hall slot """
+    from .admission import release_hall_seats
+    release_hall_seats(instance)
+
+@receiver(post_save, sender=DiningArea)
+def sync_private_room_flag(sender, instance, **kwargs):
+    """ Keeps Reservation.is_private_room in step when a room changes between VIP and hall """
+    is_vip = instance.area_type == 'VIP'
+    try:
+        with transaction.atomic():
+            instance.reservations.exclude(is_private_room=is_vip).update(is_private_room=is_vip)
+    except IntegrityError:
+        # Saved without clean() (the admin form runs it): the one-booking-per-VIP-room constraint refused
+        raise instance.shared_session_error() or ValidationError("This room has bookings that clash as a VIP room.")
+
+@receiver([post_save, post_delete], sender=Reservation)
+def update_daily_rollup(sender, instance, **kwargs):
+    """ Moves this booking's contribution from the rollup row it was counted in to the one it belongs to now """
+    from .booking_rules import touches_scheduling
+    from .reports import apply_rollup_change
+
+    if not touches_scheduling(kwargs.get('update_fields')):
+        return
+
+    loaded = getattr(instance, '_loaded_values', None)
+    if kwargs.get('created'):
+        loaded = None
+    current = None if kwargs['signal'] is post_delete else instance.__dict__
+    apply_rollup_change(loaded, current)
 
 class RewardRedemption(models.Model):
     STATUS_CHOICES = [
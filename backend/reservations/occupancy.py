@@ -0,0 +1,120 @@
+import time
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.fields import DateField
+from .models import Reservation
+
+# Bookings in these states no longer hold a seat or a room
+INACTIVE_STATUSES = ['CANCELLED', 'NO_SHOW']
+
+# Every committed write bumps the version of its date/session, so counters cached by a read
+# that raced the write are never read again; the timeout only lets old versions expire
+OCCUPANCY_CACHE_TIMEOUT = 60 * 60 * 6
+
+EMPTY_SLOT = {'bookings': 0, 'pax': 0}
+
+
+def occupancy_version_key(date_val, session):
+    # Normalize so '2026-5-1', '2026-05-01' and date objects share one key
+    return f"occupancy:version:{DateField().to_python(date_val)}:{session}"
+
+
+def get_occupancy_versions(slots):
+    """ Returns {(date, session): version} for the given date/session pairs in one round trip """
+    keys = {occupancy_version_key(date_val, session): (date_val, session) for date_val, session in slots}
+    versions = {keys[key]: version for key, version in cache.get_many(list(keys)).items()}
+    for key, slot in keys.items():
+        if slot not in versions:
+            # Seeded from the clock: after an eviction the new generation still differs from every earlier one
+            cache.add(key, time.time_ns(), None)
+            versions[slot] = cache.get(key)
+    return versions
+
+
+def occupancy_cache_key(area_id, date_val, session, version):
+    return f"occupancy:v{version}:{area_id}:{DateField().to_python(date_val)}:{session}"
+
+
+def slot_occupancy_queryset(date_val, session, area_ids=None):
+    """ Grouped per-area occupancy of one date/session (conditional aggregation over Reservation) """
+    active = ~Q(status__in=INACTIVE_STATUSES)
+    rows = Reservation.objects.filter(date=date_val, session=session)
+    if area_ids is not None:
+        rows = rows.filter(dining_area_id__in=area_ids)
+    return (
+        rows
+        .order_by()
+        .values('dining_area_id')
+        .annotate(
+            bookings=Count('id', filter=active),
+            pax=Sum('pax', filter=active),
+        )
+    )
+
+
+def range_occupancy_queryset(start, end):
+    """ Grouped per-slot occupancy of a whole date window """
+    return (
+        Reservation.objects
+        .filter(date__range=(start, end))
+        .exclude(status__in=INACTIVE_STATUSES)
+        .order_by()
+        .values('date', 'session', 'dining_area_id')
+        .annotate(bookings=Count('id'), pax=Sum('pax'))
+    )
+
+
+def query_slot_occupancy(date_val, session, area_ids=None):
+    """
+    Returns {dining_area_id: {'bookings': n, 'pax': n}} for one date/session straight from the database.
+    Every area is resolved in a single grouped query instead of one query per room.
+    """
+    return {
+        row['dining_area_id']: {'bookings': row['bookings'], 'pax': row['pax'] or 0}
+        for row in slot_occupancy_queryset(date_val, session, area_ids)
+    }
+
+
+def query_range_occupancy(start, end):
+    """ Returns {(date, session, dining_area_id): {'bookings': n, 'pax': n}} for a window in one grouped query """
+    return {
+        (row['date'], row['session'], row['dining_area_id']): {'bookings': row['bookings'], 'pax': row['pax'] or 0}
+        for row in range_occupancy_queryset(start, end)
+    }
+
+
+def get_slot_occupancy(date_val, session, area_ids):
+    """
+    Cached version of query_slot_occupancy. Hits cost two Redis round trips for all areas
+    (the slot version, then the counters); only the areas that missed are recomputed, again in one grouped query.
+    """
+    # Read the version before the database: a write committing in between bumps it past what is cached here
+    version = get_occupancy_versions([(date_val, session)])[(date_val, session)]
+    keys = {occupancy_cache_key(area_id, date_val, session, version): area_id for area_id in area_ids}
+    occupancy = {keys[key]: slot for key, slot in cache.get_many(list(keys)).items()}
+
+    missing = [area_id for area_id in area_ids if area_id not in occupancy]
+    if missing:
+        fresh = query_slot_occupancy(date_val, session, missing)
+        for area_id in missing:
+            occupancy[area_id] = fresh.get(area_id, EMPTY_SLOT)
+        cache.set_many(
+            {occupancy_cache_key(area_id, date_val, session, version): occupancy[area_id] for area_id in missing},
+            OCCUPANCY_CACHE_TIMEOUT,
+        )
+    return occupancy
+
+
+def get_area_occupancy(area_id, date_val, session):
+    return get_slot_occupancy(date_val, session, [area_id])[area_id]
+
+
+def invalidate_occupancy(slots):
+    """ Moves the given (area_id, date, session) slots to a new version, retiring every counter cached for them """
+    for date_val, session in {(DateField().to_python(date_val), session) for _, date_val, session in slots}:
+        key = occupancy_version_key(date_val, session)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never read or evicted: the next read seeds a fresh generation
+            pass
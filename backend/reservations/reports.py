@@ -0,0 +1,256 @@
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.fields import DateField
+from .models import Customer, DailyReservationRollup, DiningArea, Reservation
+from .occupancy import INACTIVE_STATUSES
+from .serializers import ReservationSerializer
+
+ESTIMATED_SPEND_PER_PAX = 1500  # PHP, used for every revenue estimate
+ROLLUP_TOTALS = ('bookings', 'pax', 'vip_rooms', 'estimated_revenue')
+
+# The dashboard polls; writes invalidate immediately, the TTL only covers customer-side changes
+DASHBOARD_CACHE_TIMEOUT = 60
+
+
+def dashboard_cache_key(day=None):
+    return f"dashboard_stats:{day or date.today()}"
+
+
+def build_dashboard_stats(today=None):
+    """ Stat cards in one conditional aggregate, the 7-day chart in one grouped query """
+    today = today or date.today()
+    week_start = today - timedelta(days=6)
+
+    cards = Reservation.objects.filter(Q(date=today) | Q(status='PENDING')).aggregate(
+        today_count=Count('id', filter=Q(date=today)),
+        pending_count=Count('id', filter=Q(status='PENDING')),
+        pax_today=Sum('pax', filter=Q(date=today, status__in=['CONFIRMED', 'SEATED', 'COMPLETED'])),
+        vip_pax=Sum('pax', filter=Q(date=today, dining_area__area_type='VIP')),
+    )
+    expected_revenue = (cards['pax_today'] or 0) * ESTIMATED_SPEND_PER_PAX
+
+    counts = dict(
+        Reservation.objects
+        .filter(date__range=(week_start, today))
+        .order_by()
+        .values('date')
+        .annotate(bookings=Count('id'))
+        .values_list('date', 'bookings')
+    )
+    chart_data = []
+    for i in range(6, -1, -1):
+        target_date = today - timedelta(days=i)
+        chart_data.append({
+            "date": target_date.strftime("%b %d"),
+            "bookings": counts.get(target_date, 0)
+        })
+
+    recent = Reservation.objects.select_related('dining_area', 'encoded_by', 'last_modified_by').order_by('-created_at')[:5]
+
+    return {
+        "stats": {
+            "today_count": cards['today_count'],
+            "pending_count": cards['pending_count'],
+            "vip_pax": cards['vip_pax'] or 0,
+            "revenue": f"₱{expected_revenue:,}"
+        },
+        "chart_data": chart_data,
+        "recent_bookings": ReservationSerializer(recent, many=True).data
+    }
+
+
+def get_dashboard_stats():
+    key = dashboard_cache_key()
+    stats = cache.get(key)
+    if stats is None:
+        stats = build_dashboard_stats()
+        cache.set(key, stats, DASHBOARD_CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    cache.delete(dashboard_cache_key())
+
+
+ROLLUP_FIELDS = ('bookings', 'pax', 'vip_rooms', 'estimated_revenue')
+
+
+def _rollup_contribution(values, area_types):
+    """ The rollup key and counters one reservation (as a field dict) adds, or None if it does not count """
+    needed = ('status', 'dining_area_id', 'date', 'session', 'pax')
+    if not values or not all(name in values for name in needed) or values['status'] in INACTIVE_STATUSES:
+        return None
+    area_type = area_types.get(values['dining_area_id'])
+    if area_type is None:
+        return None
+
+    key = (DateField().to_python(values['date']), values['session'], area_type)
+    pax = int(values['pax'])
+    return key, {
+        'bookings': 1,
+        'pax': pax,
+        'vip_rooms': 1 if area_type == 'VIP' else 0,
+        'estimated_revenue': pax * ESTIMATED_SPEND_PER_PAX,
+    }
+
+
+def apply_rollup_change(old_values, new_values):
+    """
+    Applies the difference between a reservation's stored and new state to the daily rollups
+    with atomic F() increments, so concurrent writes to the same day never lose counts.
+    """
+    area_ids = {values.get('dining_area_id') for values in (old_values, new_values) if values} - {None}
+    if not area_ids:
+        return
+    area_types = dict(DiningArea.objects.filter(id__in=area_ids).values_list('id', 'area_type'))
+
+    deltas = {}
+    for values, sign in ((old_values, -1), (new_values, 1)):
+        contribution = _rollup_contribution(values, area_types)
+        if contribution:
+            key, counters = contribution
+            delta = deltas.setdefault(key, dict.fromkeys(ROLLUP_FIELDS, 0))
+            for name, value in counters.items():
+                delta[name] += sign * value
+
+    for (day, session, area_type), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        rows = DailyReservationRollup.objects.filter(date=day, session=session, area_type=area_type)
+        if not rows.update(**{name: F(name) + value for name, value in delta.items()}):
+            _, created = DailyReservationRollup.objects.get_or_create(
+                date=day, session=session, area_type=area_type, defaults=delta
+            )
+            if not created:  # Another write created the row in between
+                rows.update(**{name: F(name) + value for name, value in delta.items()})
+
+
+def _count_rollups(start=None, end=None, **filters):
+    """ Fresh (unsaved) rollup rows for a date window, counted straight from Reservation """
+    reservations = Reservation.objects.exclude(status__in=INACTIVE_STATUSES).filter(**filters)
+    if start:
+        reservations = reservations.filter(date__gte=start)
+    if end:
+        reservations = reservations.filter(date__lte=end)
+
+    rows = (
+        reservations
+        .order_by()
+        .values('date', 'session', 'dining_area__area_type')
+        .annotate(
+            bookings=Count('id'),
+            pax=Sum('pax'),
+            vip_rooms=Count('id', filter=Q(dining_area__area_type='VIP')),
+        )
+    )
+    return [
+        DailyReservationRollup(
+            date=row['date'],
+            session=row['session'],
+            area_type=row['dining_area__area_type'],
+            bookings=row['bookings'],
+            pax=row['pax'] or 0,
+            vip_rooms=row['vip_rooms'],
+            estimated_revenue=(row['pax'] or 0) * ESTIMATED_SPEND_PER_PAX,
+        )
+        for row in rows.iterator(chunk_size=2000)
+    ]
+
+
+def rebuild_rollups(start=None, end=None):
+    """ Recomputes the rollup rows (optionally for a date window) straight from Reservation """
+    rollups = DailyReservationRollup.objects.all()
+    if start:
+        rollups = rollups.filter(date__gte=start)
+    if end:
+        rollups = rollups.filter(date__lte=end)
+
+    rebuilt = _count_rollups(start, end)
+    rollups.delete()
+    DailyReservationRollup.objects.bulk_create(rebuilt, batch_size=1000)
+    return len(rebuilt)
+
+
+def reconcile_rollups(start, end):
+    """
+    Repairs drift in a date window: writes that skip Reservation.save (queryset.update(), bulk_update(),
+    an area switching between hall and VIP) leave the incremental rollups behind. A drifted row is
+    recounted while locked, so a booking's F() increment waits and lands on top of the fresh count.
+    Returns the number of rows repaired.
+    """
+    def totals(row):
+        return tuple(getattr(row, name) for name in ROLLUP_TOTALS)
+
+    fresh = {(row.date, row.session, row.area_type): totals(row) for row in _count_rollups(start, end)}
+    stored = {
+        (row.date, row.session, row.area_type): totals(row)
+        for row in DailyReservationRollup.objects.filter(date__range=(start, end))
+    }
+    empty = (0,) * len(ROLLUP_TOTALS)
+    drifted = [key for key in fresh.keys() | stored.keys() if fresh.get(key, empty) != stored.get(key, empty)]
+
+    repaired = 0
+    for day, session, area_type in drifted:
+        with transaction.atomic():
+            row, _ = DailyReservationRollup.objects.get_or_create(date=day, session=session, area_type=area_type)
+            row = DailyReservationRollup.objects.select_for_update().get(pk=row.pk)
+            recount = _count_rollups(day, day, session=session, dining_area__area_type=area_type)
+            actual = totals(recount[0]) if recount else empty
+            if totals(row) != actual:
+                DailyReservationRollup.objects.filter(pk=row.pk).update(**dict(zip(ROLLUP_TOTALS, actual)))
+                repaired += 1
+    return repaired
+
+
+def build_owner_report(days=30, today=None):
+    """ Owner report read from the daily rollups: one query per section, however long the range """
+    today = today or date.today()
+    first_day = today - timedelta(days=days - 1)
+    totals = dict(bookings=Sum('bookings'), pax=Sum('pax'), vip_rooms=Sum('vip_rooms'), revenue=Sum('estimated_revenue'))
+
+    per_day = {
+        row['date']: row
+        for row in DailyReservationRollup.objects
+        .filter(date__range=(first_day, today))
+        .order_by()
+        .values('date')
+        .annotate(**totals)
+    }
+    empty = dict.fromkeys(totals, 0)
+
+    chart_data = []
+    for i in range(days - 1, -1, -1):
+        target_date = today - timedelta(days=i)
+        day = per_day.get(target_date, empty)
+        chart_data.append({
+            "date": target_date.strftime("%b %d"),
+            "bookings": day['bookings'] or 0,
+            "pax": day['pax'] or 0,
+            "revenue": day['revenue'] or 0
+        })
+
+    today_totals = per_day.get(today, empty)
+    all_time_bookings = DailyReservationRollup.objects.aggregate(total=Sum('bookings'))['total'] or 0
+    customers = Customer.objects.aggregate(
+        total=Count('id'),
+        vip=Count('id', filter=Q(is_vip=True)),
+        points=Sum('points_balance'),
+    )
+
+    return {
+        "today": {
+            "bookings": today_totals['bookings'] or 0,
+            "pax": today_totals['pax'] or 0,
+            "vip_rooms_occupied": today_totals['vip_rooms'] or 0,
+            "estimated_revenue": f"₱{today_totals['revenue'] or 0:,}"
+        },
+        "all_time": {
+            "total_customers": customers['total'],
+            "total_vip_customers": customers['vip'],
+            "total_bookings": all_time_bookings,
+            "points_liability": customers['points'] or 0,
+        },
+        "chart_data": chart_data
+    }
@@ -1,7 +1,9 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from django.db.models import Sum
+from core.serializers import ImageSrcsetField
 from .models import DiningArea, PointTransaction, Reservation, Customer, RewardItem, RewardRedemption
-from django.db import transaction
+from django.db import models
+from .utils import phone_book_key
 
 class DiningAreaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,6 +13,28 @@ class DiningAreaSerializer(serializers.ModelSerializer):
             'has_ktv', 'has_restroom', 'has_tv', 'has_couch',
         ]
 
+class VIPRoomSerializer(DiningAreaSerializer):
+    """ The public VIP rooms page, with responsive variants of the room photo """
+    srcset = ImageSrcsetField()
+
+    class Meta(DiningAreaSerializer.Meta):
+        fields = DiningAreaSerializer.Meta.fields + ['srcset']
+
+class ReservationListSerializer(serializers.ListSerializer):
+    """
+    Resolves the Customer of every row in one query instead of one query per reservation.
+    Rows already linked to a Customer (select_related('customer')) need no lookup at all.
+    """
+
+    def to_representation(self, data):
+        reservations = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        unlinked = [r for r in reservations if not (r.customer_id and Reservation.customer.is_cached(r))]
+        phones = {phone_book_key(r.customer_contact) for r in unlinked} - {None}
+        self._context['no_show_counts'] = dict(
+            Customer.objects.filter(phone__in=phones).values_list('phone', 'no_show_count')
+        ) if phones else {}
+        return super().to_representation(reservations)
+
 class ReservationSerializer(serializers.ModelSerializer):
     room_name = serializers.CharField(source='dining_area.name', read_only=True)
     customer_no_show_count = serializers.SerializerMethodField()
@@ -21,10 +45,19 @@ class ReservationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reservation
         fields = '__all__'
-        read_only_fields = ['encoded_by', 'last_modified_by', 'created_at', 'updated_at']
+        read_only_fields = ['customer', 'encoded_by', 'last_modified_by', 'created_at', 'updated_at']
+        list_serializer_class = ReservationListSerializer
     
     def get_customer_no_show_count(self, obj):
-        customer = Customer.objects.filter(phone=obj.customer_contact).first()
+        if obj.customer_id and Reservation.customer.is_cached(obj):
+            return obj.customer.no_show_count
+
+        phone = phone_book_key(obj.customer_contact)
+        no_show_counts = self.context.get('no_show_counts')
+        if no_show_counts is not None:
+            return no_show_counts.get(phone, 0)
+
+        customer = Customer.objects.filter(phone=phone).first() if phone else None
         return customer.no_show_count if customer else 0
         
     def get_encoded_by_name(self, obj):
@@ -33,60 +66,12 @@ class ReservationSerializer(serializers.ModelSerializer):
     def get_last_modified_by_name(self, obj):
         return obj.last_modified_by.username if obj.last_modified_by else None
 
-    def validate(self, data):
-        instance = self.instance 
-
-        def get_field(name):
-            return data.get(name, getattr(instance, name, None))
-
-        dining_area = get_field('dining_area')
-        date_val = get_field('date')
-        session_val = get_field('session')
-        pax_val = get_field('pax')
-        status_val = get_field('status') # Capture status to match model logic
-
-        if not (dining_area and date_val and session_val and pax_val):
-            return data
-
-        # ATOMIC TRANSACTION: Locks the room until validation is finished
-        with transaction.atomic():
-            area = DiningArea.objects.select_for_update().get(id=dining_area.id)
-
-            # FIX 1: Add a global capacity check for BOTH Hall and VIP rooms
-            if pax_val > area.capacity:
-                raise serializers.ValidationError({"pax": f"Guests exceed capacity ({area.capacity}) for this room."})
-
-            if area.area_type == 'VIP':
-                # FIX 2: Only exclude 'CANCELLED' to perfectly match the model's clean() method
-                if status_val != 'CANCELLED':
-                    exists = Reservation.objects.filter(
-                        dining_area=area, 
-                        date=date_val, 
-                        session=session_val
-                    ).exclude(status='CANCELLED')
-                    
-                    if instance:
-                        exists = exists.exclude(id=instance.id)
-
-                    if exists.exists():
-                        raise serializers.ValidationError({"non_field_errors": f"{area.name} is already booked for this session."})
-
-            elif area.area_type == 'HALL':
-                total_pax_query = Reservation.objects.filter(
-                    dining_area=area, 
-                    date=date_val, 
-                    session=session_val
-                ).exclude(status__in=['CANCELLED', 'NO_SHOW'])
-
-                if instance:
-                    total_pax_query = total_pax_query.exclude(id=instance.id)
-
-                total_pax = total_pax_query.aggregate(Sum('pax'))['pax__sum'] or 0
-                
-                if (total_pax + pax_val) > area.capacity:
-                    raise serializers.ValidationError({"pax": f"Only {area.capacity - total_pax} seats left in the Hall."})
-
-        return data
+    def save(self, **kwargs):
+        # Capacity, VIP clashes and hall seats are checked once, by Reservation.save (see booking_rules)
+        try:
+            return super().save(**kwargs)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(serializers.as_serializer_error(e))
 
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -94,6 +79,8 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class RewardItemSerializer(serializers.ModelSerializer):
+    srcset = ImageSrcsetField()
+
     class Meta:
         model = RewardItem
         fields = '__all__'
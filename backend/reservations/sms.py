@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from core.models import SystemSetting
+from .utils import normalize_phone
+
+SEMAPHORE_URL = "https://api.semaphore.co/api/v4/messages"
+SENDER_NAME = 'GOLDENBAY'
+
+# Semaphore accepts up to 1,000 comma-separated numbers per request for one message
+BULK_LIMIT = 1000
+
+
+class HttpTransport:
+    """ Posts to the gateway over one pooled keep-alive session (TLS handshake paid once per connection) """
+
+    def __init__(self, pool_size=8, timeout=10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        # Only retry failures where the request never reached the gateway, so nobody gets a duplicate text
+        retries = Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.3, allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('https://', adapter)
+
+    def post(self, url, data):
+        return self.session.post(url, data=data, timeout=self.timeout).json()
+
+
+class FakeTransport:
+    """ Offline stand-in for benchmarks and tests: records every call and answers like Semaphore after `latency` seconds """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def post(self, url, data):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls.append(data)
+        return [
+            {'message_id': i, 'recipient': number, 'message': data['message'], 'status': 'Pending'}
+            for i, number in enumerate(data['number'].split(','))
+        ]
+
+
+class SMSClient:
+    """
+    Semaphore SMS client. One instance per process keeps the HTTP pool warm; identical messages
+    go out as one bulk request and personalised ones are posted concurrently.
+    """
+
+    def __init__(self, api_key=None, transport=None, max_workers=None, verbose=True, use_admin_switch=True):
+        self.verbose = verbose
+        self.use_admin_switch = use_admin_switch
+        self.api_key = api_key if api_key is not None else os.getenv('SEMAPHORE_API_KEY')
+        self.max_workers = max_workers or getattr(settings, 'SMS_MAX_WORKERS', 8)
+        self.transport = transport or HttpTransport(
+            pool_size=self.max_workers, timeout=getattr(settings, 'SMS_TIMEOUT', 10)
+        )
+
+    def is_enabled(self, preview=''):
+        """ Checks the admin kill switch (once per call, not once per recipient) """
+        if self.use_admin_switch and not SystemSetting.load().enable_sms_notifications:
+            print(f"🛑 SMS DISABLED BY ADMIN: Would have sent -> {preview}")
+            return False
+        return True
+
+    def _post(self, numbers, message):
+        if not self.api_key:
+            print(f"⚠️ SMS LOG (No API Key): To {numbers} - {message}")
+            return None
+
+        data = {
+            'apikey': self.api_key,
+            'number': ','.join(numbers),
+            'message': message,
+            'sendername': SENDER_NAME
+        }
+        try:
+            result = self.transport.post(SEMAPHORE_URL, data)
+            if self.verbose:
+                print(f"📲 SMS Sent to {data['number']}: {result}")
+            return result
+        except Exception as e:
+            print(f"❌ SMS Network Error: {e}")
+            return None
+
+    @staticmethod
+    def _clean(numbers):
+        # Semaphore prefers 0917 format over 63917 for local sending; drop blanks and duplicates
+        return list(dict.fromkeys(n for n in (normalize_phone(num) for num in numbers) if n))
+
+    def send(self, to_number, body):
+        if not self.is_enabled(f"{to_number}: {body}"):
+            return {"status": "disabled", "message": "SMS globally disabled in Admin"}
+        return self._post(self._clean([to_number]), body)
+
+    def send_bulk(self, numbers, body, check_enabled=True):
+        """ Same body to many numbers, in as few gateway calls as the bulk limit allows """
+        numbers = self._clean(numbers)
+        if not numbers or (check_enabled and not self.is_enabled(f"{len(numbers)} numbers: {body}")):
+            return []
+        return [self._post(numbers[i:i + BULK_LIMIT], body) for i in range(0, len(numbers), BULK_LIMIT)]
+
+    def send_many(self, messages):
+        """
+        Sends [(number, body), ...]. Bodies shared by several numbers are bulk-submitted;
+        the rest are posted concurrently over the pooled session. Returns one result per gateway call.
+        """
+        by_body = {}
+        for number, body in messages:
+            by_body.setdefault(body, []).append(number)
+        if not by_body or not self.is_enabled(f"{len(messages)} messages"):
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            batches = pool.map(lambda item: self.send_bulk(item[1], item[0], check_enabled=False), by_body.items())
+            return [result for batch in batches for result in batch]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_sms_client():
+    """ The process-wide client (created lazily so each Celery worker child builds its own pool) """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SMSClient()
+    return _client
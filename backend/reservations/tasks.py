@@ -1,13 +1,20 @@
 from celery import shared_task
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.conf import settings
 from datetime import date, datetime, timedelta
 from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 import os
+from django.core.cache import cache
+from core.mail import build_email, dispatcher, send_emails
+from .admission import reconcile_hall_ledger
+from .customer_sync import CUSTOMER_SYNC_PENDING_KEY, sync_pending_customers
+from .sms import get_sms_client
 from .utils import send_sms
-from .models import Customer, Reservation 
+from .models import Customer, DiningArea, Reservation 
+from .occupancy import (
+    EMPTY_SLOT, OCCUPANCY_CACHE_TIMEOUT, get_occupancy_versions, occupancy_cache_key, query_range_occupancy,
+)
+from .reports import reconcile_rollups
 
 def generate_ics(reservation):
     start_dt = datetime.combine(reservation.date, reservation.time)
@@ -52,47 +59,46 @@ def send_new_booking_notifications(reservation_id, send_sms_flag=True, notify_cu
         admin_html = render_to_string('emails/admin_notification.html', admin_context)
         admin_plain = strip_tags(admin_html)
         
-        send_mail(
+        # Admin and customer emails go out together over the worker's pooled SMTP connection
+        emails = [build_email(
             subject=f'New Booking Request: {reservation.customer_name}',
-            message=admin_plain,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=['marketing@goldenbay.com.ph'], 
-            html_message=admin_html,
-            fail_silently=False,
-        )
+            body=admin_plain,
+            to=['marketing@goldenbay.com.ph'],
+            html=admin_html,
+        )]
+
+        if notify_customer and reservation.customer_email and '@' in reservation.customer_email:
+            customer_context = {
+                'name': reservation.customer_name,
+                'status': 'PENDING',
+                'date': reservation.date.strftime('%B %d, %Y'),
+                'time': reservation.time.strftime('%I:%M %p'),
+                'pax': reservation.pax,
+                'area': area_name,
+                'id': reservation.id,
+                'manage_url': f"https://goldenbay.com.ph/manage-booking/{reservation.management_token}" # ADDED URL
+            }
+            customer_html = render_to_string('emails/confirmation.html', customer_context)
+            emails.append(build_email(
+                subject='Reservation Request Received - Golden Bay',
+                body=strip_tags(customer_html),
+                to=[reservation.customer_email],
+                html=customer_html,
+            ))
+
+        # Per-message results: a refused guest address must not keep the SMS alerts below from going out
+        for msg, error in zip(emails, dispatcher.send_each(emails)):
+            if error:
+                print(f"Celery Task Error (New Booking #{reservation.id}): email to {', '.join(msg.to)} failed: {error}")
 
         admin_numbers_env = os.getenv('ADMIN_PHONE_NUMBERS')
         if admin_numbers_env and send_sms_flag:
             admin_numbers = [num.strip() for num in admin_numbers_env.split(',') if num.strip()]
             admin_sms_body = f"New Booking: {reservation.customer_name} ({reservation.pax} pax) for {reservation.date.strftime('%b %d')} at {reservation.time.strftime('%I:%M %p')}. Area: {area_name}. Check Dashboard."
-            for num in admin_numbers:
-                send_sms(num, admin_sms_body)
+            get_sms_client().send_bulk(admin_numbers, admin_sms_body)
 
-        # 2. NOTIFY THE CUSTOMER
+        # 2. NOTIFY THE CUSTOMER (email already sent with the admin batch above)
         if notify_customer:
-            if reservation.customer_email and '@' in reservation.customer_email:
-                customer_context = {
-                    'name': reservation.customer_name,
-                    'status': 'PENDING',
-                    'date': reservation.date.strftime('%B %d, %Y'),
-                    'time': reservation.time.strftime('%I:%M %p'),
-                    'pax': reservation.pax,
-                    'area': area_name,
-                    'id': reservation.id,
-                    'manage_url': f"https://goldenbay.com.ph/manage-booking/{reservation.management_token}" # ADDED URL
-                }
-                customer_html = render_to_string('emails/confirmation.html', customer_context)
-                customer_plain = strip_tags(customer_html)
-                
-                send_mail(
-                    subject='Reservation Request Received - Golden Bay',
-                    message=customer_plain,
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[reservation.customer_email],
-                    html_message=customer_html,
-                    fail_silently=False,
-                )
-
             contact_digits = ''.join(filter(str.isdigit, str(reservation.customer_contact)))
             if len(contact_digits) >= 10 and send_sms_flag:
                  sms_body = f"Hi {reservation.customer_name}, we received your booking request for {reservation.pax} pax on {reservation.date.strftime('%b %d')}. Our team is reviewing availability and will confirm during operating hours. - GOLDENBAY"
@@ -121,19 +127,18 @@ def send_status_update_notifications(reservation_id, new_status, send_sms_flag=T
             html_message = render_to_string('emails/confirmation.html', context)
             plain_message = strip_tags(html_message)
 
-            msg = EmailMultiAlternatives(
-                subject=f'Reservation {new_status.capitalize()} - Golden Bay',
-                body=plain_message,
-                from_email=settings.EMAIL_HOST_USER,
-                to=[reservation.customer_email]
-            )
-            msg.attach_alternative(html_message, "text/html")
-            
+            attachments = []
             if new_status == 'CONFIRMED':
                 ics_data = generate_ics(reservation)
-                msg.attach('GoldenBay_Reservation.ics', ics_data, 'text/calendar')
+                attachments.append(('GoldenBay_Reservation.ics', ics_data, 'text/calendar'))
 
-            msg.send(fail_silently=False)
+            send_emails([build_email(
+                subject=f'Reservation {new_status.capitalize()} - Golden Bay',
+                body=plain_message,
+                to=[reservation.customer_email],
+                html=html_message,
+                attachments=attachments,
+            )])
             
         contact_digits = ''.join(filter(str.isdigit, str(reservation.customer_contact)))
         if len(contact_digits) >= 10 and send_sms_flag:
@@ -167,18 +172,14 @@ def send_booking_modification_notifications(reservation_id, send_sms_flag=True):
             html_message = render_to_string('emails/confirmation.html', context)
             plain_message = strip_tags(html_message)
 
-            msg = EmailMultiAlternatives(
+            ics_data = generate_ics(reservation)
+            send_emails([build_email(
                 subject='Reservation Updated - Golden Bay',
                 body=plain_message,
-                from_email=settings.EMAIL_HOST_USER,
-                to=[reservation.customer_email]
-            )
-            msg.attach_alternative(html_message, "text/html")
-            
-            ics_data = generate_ics(reservation)
-            msg.attach('GoldenBay_Reservation_Updated.ics', ics_data, 'text/calendar')
-            
-            msg.send(fail_silently=False)
+                to=[reservation.customer_email],
+                html=html_message,
+                attachments=[('GoldenBay_Reservation_Updated.ics', ics_data, 'text/calendar')],
+            )])
             
         contact_digits = ''.join(filter(str.isdigit, str(reservation.customer_contact)))
         if len(contact_digits) >= 10 and send_sms_flag:
@@ -203,13 +204,11 @@ def send_post_dining_feedback(reservation_id, send_sms_flag=True):
              send_sms(reservation.customer_contact, sms_body)
 
         if reservation.customer_email and '@' in reservation.customer_email:
-            send_mail(
+            send_emails([build_email(
                 subject='Thank you for dining with Golden Bay',
-                message=f"Hi {reservation.customer_name},\n\nThank you for choosing Golden Bay. We'd love to hear about your experience!\n\nLeave a review: {review_link}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[reservation.customer_email],
-                fail_silently=True,
-            )
+                body=f"Hi {reservation.customer_name},\n\nThank you for choosing Golden Bay. We'd love to hear about your experience!\n\nLeave a review: {review_link}",
+                to=[reservation.customer_email],
+            )], fail_silently=True)
             
     except Exception as e:
         print(f"Celery Task Error (Feedback Loop): {e}")
@@ -227,13 +226,16 @@ def send_we_miss_you_automation():
         Q(last_retention_sent__isnull=True) | Q(last_retention_sent__lte=one_eighty_days_ago)
     )
 
+    sms_messages = []
+    emails = []
+    contacted_ids = []
     for customer in eligible_customers:
         sent_any = False
         
         contact_digits = ''.join(filter(str.isdigit, str(customer.phone)))
         if len(contact_digits) >= 10:
             sms_body = f"Hi {customer.name}, we miss you at Golden Bay! It's been a while. Show this text for a complimentary dessert on your next dine-in visit with us. Call +63 917 580 7166 to reserve."
-            send_sms(customer.phone, sms_body)
+            sms_messages.append((customer.phone, sms_body))
             sent_any = True
             
         if customer.email and '@' in customer.email:
@@ -242,21 +244,23 @@ def send_we_miss_you_automation():
             html_message = render_to_string('emails/we_miss_you.html', context)
             plain_message = strip_tags(html_message) 
             
-            send_mail(
+            emails.append(build_email(
                 subject=subject,
-                message=plain_message,
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[customer.email],
-                html_message=html_message,
-                fail_silently=True,
-            )
+                body=plain_message,
+                to=[customer.email],
+                html=html_message,
+            ))
             sent_any = True
             
         if sent_any:
-            customer.last_retention_sent = today
-            customer.save(update_fields=['last_retention_sent'])
+            contacted_ids.append(customer.id)
+
+    # Texts go out concurrently over the pooled gateway session, emails as one SMTP batch
+    get_sms_client().send_many(sms_messages)
+    send_emails(emails, fail_silently=True)
+    Customer.objects.filter(id__in=contacted_ids).update(last_retention_sent=today)
 
-    return f"Processed retention campaign for {eligible_customers.count()} customers."
+    return f"Processed retention campaign for {len(contacted_ids)} customers."
 
 @shared_task
 def send_birthday_promos():
@@ -269,16 +273,19 @@ def send_birthday_promos():
         date_of_birth__day=target_date.day
     ).exclude(last_birthday_promo_year=current_year)
 
+    sms_messages = []
+    promoted_ids = []
     for customer in birthday_customers:
         contact_digits = ''.join(filter(str.isdigit, str(customer.phone)))
         if len(contact_digits) >= 10:
             sms_body = f"Advance Happy Birthday, {customer.name}! 🎉 Celebrate your special day at Golden Bay. Show this text within your birthday month for a complimentary Longevity Peach Bun on us! Reserve at +63 917 580 7166"
-            send_sms(customer.phone, sms_body)
-            
-            customer.last_birthday_promo_year = current_year
-            customer.save(update_fields=['last_birthday_promo_year'])
+            sms_messages.append((customer.phone, sms_body))
+            promoted_ids.append(customer.id)
+
+    get_sms_client().send_many(sms_messages)
+    Customer.objects.filter(id__in=promoted_ids).update(last_birthday_promo_year=current_year)
 
-    return f"Sent birthday promos to {birthday_customers.count()} customers."
+    return f"Sent birthday promos to {len(promoted_ids)} customers."
 
 
 @shared_task
@@ -292,4 +299,62 @@ def send_points_awarded_sms(customer_id, points_earned, total_points):
             send_sms(customer.phone, sms_body)
             
     except Exception as e:
-        print(f"Celery Task Error (Points SMS): {e}")
\ No newline at end of file
+        print(f"Celery Task Error (Points SMS): {e}")
+
+@shared_task
+def reconcile_occupancy_cache(days_ahead=60):
+    """
+    Rewrites the cached occupancy counters of every upcoming slot from the database
+    (e.g. rows changed with queryset.update(), which skips the invalidation signals).
+    Slots nobody has read yet are warmed too, so a missed invalidation never survives a run.
+    """
+    today = date.today()
+    end = today + timedelta(days=days_ahead)
+    area_ids = list(DiningArea.objects.filter(is_active=True).values_list('id', flat=True))
+    sessions = [code for code, _ in Reservation.SESSION_CHOICES]
+    days = [today + timedelta(days=offset) for offset in range((end - today).days + 1)]
+
+    # Versions first: a write committing during the recount bumps its slot past what is written here
+    versions = get_occupancy_versions([(day, session) for day in days for session in sessions])
+    fresh = query_range_occupancy(today, end)
+
+    expected = {
+        occupancy_cache_key(area_id, day, session, versions[(day, session)]): fresh.get((day, session, area_id), EMPTY_SLOT)
+        for day in days for session in sessions for area_id in area_ids
+    }
+    cached = cache.get_many(list(expected))
+    drifted = [key for key, slot in cached.items() if slot != expected[key]]
+    cache.set_many(expected, OCCUPANCY_CACHE_TIMEOUT)
+
+    return f"Refreshed {len(expected)} occupancy slots ({len(cached)} were cached), repaired {len(drifted)}."
+
+
+@shared_task
+def reconcile_hall_seats(days_ahead=60):
+    """
+    Repairs drift between the hall seat ledger and the bookings it counts, from today on
+    (rows changed with queryset.update() or raw edits, areas switched between hall and VIP).
+    """
+    today = date.today()
+    repaired = reconcile_hall_ledger(today, today + timedelta(days=days_ahead))
+    return f"Repaired {repaired} hall seat ledger rows."
+
+@shared_task
+def reconcile_daily_rollups(days_back=30, days_ahead=60):
+    """
+    Repairs drift between DailyReservationRollup and the bookings it summarizes for recent and upcoming days
+    (rows changed with queryset.update() or bulk_update(), areas switched between hall and VIP).
+    Older days can be rebuilt with `manage.py backfill_rollups`.
+    """
+    today = date.today()
+    repaired = reconcile_rollups(today - timedelta(days=days_back), today + timedelta(days=days_ahead))
+    return f"Repaired {repaired} daily rollup rows."
+
+@shared_task
+def sync_reservation_customers():
+    """
+    Files the bookings queued by new reservations and contact changes in the phone book, in batches.
+    Also runs on a schedule, to pick up bookings whose queued sync never ran (broker down, worker lost).
+    """
+    cache.delete(CUSTOMER_SYNC_PENDING_KEY)
+    return f"Synced {sync_pending_customers()} bookings to the phone book."
@@ -1,3 +1,774 @@
-from django.test import TestCase
+import os
+import smtplib
+import threading
+from datetime import date, time, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+from django.apps import apps as django_apps
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from . import occupancy
+from .models import Customer, DailyReservationRollup, DiningArea, HallSeatLedger, Reservation
+from .admission import reconcile_hall_ledger
+from .booking_rules import book_best_area, load_assignable_areas
+from .reports import rebuild_rollups, reconcile_rollups
+from .sms import FakeTransport, SMSClient
+from .tasks import (
+    reconcile_daily_rollups, reconcile_occupancy_cache, send_new_booking_notifications, sync_reservation_customers,
+)
+from core.mail import dispatcher
+from core.models import SystemSetting
 
-# Create your tests here.
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AvailabilityTests(TestCase):
+    """ Availability endpoints must stay at a fixed number of queries no matter how many rooms exist """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=20)
+        cls.vip_rooms = [
+            DiningArea.objects.create(name=f"VIP Room {i}", area_type='VIP', capacity=8)
+            for i in range(1, 13)
+        ]
+        cls.day = date(2026, 5, 1)
+
+        def book(area, pax, status='CONFIRMED', session='DINNER'):
+            return Reservation.objects.create(
+                customer_name="Guest", customer_contact="09170000000", dining_area=area,
+                date=cls.day, session=session, time=time(18, 0), pax=pax, status=status,
+            )
+
+        book(cls.hall, 6)
+        book(cls.hall, 4)
+        book(cls.hall, 5, status='CANCELLED')
+        book(cls.vip_rooms[0], 8)
+        book(cls.vip_rooms[1], 6, status='NO_SHOW')
+        book(cls.vip_rooms[2], 6, session='LUNCH')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def check(self):
+        return self.client.get('/api/reservations/check/', {'date': self.day.isoformat(), 'session': 'DINNER'})
+
+    def test_payload(self):
+        response = self.check()
+        self.assertEqual(response.status_code, 200)
+        by_id = {row['id']: row for row in response.data}
+
+        self.assertEqual(len(by_id), 13)
+        self.assertEqual(by_id[self.hall.id]['remaining_capacity'], 10)
+        self.assertTrue(by_id[self.hall.id]['is_available'])
+        self.assertFalse(by_id[self.vip_rooms[0].id]['is_available'])
+        self.assertTrue(by_id[self.vip_rooms[1].id]['is_available'])
+        self.assertTrue(by_id[self.vip_rooms[2].id]['is_available'])
+        self.assertEqual(by_id[self.vip_rooms[0].id]['remaining_capacity'], 0)
+
+    def test_query_count_is_constant(self):
+        # 1. Active areas  2. Grouped occupancy for the whole session
+        with self.assertNumQueries(2):
+            self.check()
+        # Warm occupancy cache: only the area list is read
+        with self.assertNumQueries(1):
+            self.check()
+
+    def test_writes_invalidate_cached_occupancy(self):
+        self.check()
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = Reservation.objects.get(dining_area=self.vip_rooms[0])
+            booking.status = 'CANCELLED'
+            booking.save()
+
+        by_id = {row['id']: row for row in self.check().data}
+        self.assertTrue(by_id[self.vip_rooms[0].id]['is_available'])
+
+    def test_read_racing_a_write_cannot_recache_old_counts(self):
+        booking = Reservation.objects.get(dining_area=self.vip_rooms[0])
+        real_query = occupancy.query_slot_occupancy
+
+        def query_then_commit_a_cancellation(*args, **kwargs):
+            # The read counts the room as taken, then the cancellation commits before it reaches the cache
+            counts = real_query(*args, **kwargs)
+            with self.captureOnCommitCallbacks(execute=True):
+                booking.status = 'CANCELLED'
+                booking.save()
+            return counts
+
+        with patch('reservations.occupancy.query_slot_occupancy', side_effect=query_then_commit_a_cancellation):
+            by_id = {row['id']: row for row in self.check().data}
+        self.assertFalse(by_id[self.vip_rooms[0].id]['is_available'])
+
+        by_id = {row['id']: row for row in self.check().data}
+        self.assertTrue(by_id[self.vip_rooms[0].id]['is_available'])
+
+    def test_reconcile_refreshes_every_upcoming_slot(self):
+        tomorrow = date.today() + timedelta(days=1)
+        booking = Reservation.objects.create(
+            customer_name="Guest", customer_contact="09170000000", dining_area=self.vip_rooms[3],
+            date=tomorrow, session='DINNER', time=time(18, 0), pax=6,
+        )
+        params = {'date': tomorrow.isoformat(), 'session': 'DINNER'}
+        self.client.get('/api/reservations/check/', params)
+        # Bulk updates skip the invalidation signals
+        Reservation.objects.filter(id=booking.id).update(status='CANCELLED')
+        cache.delete(occupancy.occupancy_version_key(tomorrow, 'LUNCH'))
+
+        self.assertIn("repaired 1", reconcile_occupancy_cache(days_ahead=2))
+
+        # Both the drifted slot and the never-read lunch session are served from the cache
+        with self.assertNumQueries(1):
+            by_id = {row['id']: row for row in self.client.get('/api/reservations/check/', params).data}
+        self.assertTrue(by_id[self.vip_rooms[3].id]['is_available'])
+        with self.assertNumQueries(1):
+            self.client.get('/api/reservations/check/', {'date': tomorrow.isoformat(), 'session': 'LUNCH'})
+
+    def test_calendar_matrix(self):
+        params = {'start': '2026-04-30', 'end': '2026-05-30'}
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/reservations/check/calendar/', params)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(response.data['days']), 31)
+        dinner = response.data['days']['2026-05-01']['DINNER']
+        self.assertEqual(dinner['hall_remaining'][self.hall.id], 10)
+        self.assertTrue(dinner['vip_booked'][self.vip_rooms[0].id])
+        self.assertFalse(dinner['vip_booked'][self.vip_rooms[1].id])
+        self.assertTrue(response.data['days']['2026-05-01']['LUNCH']['vip_booked'][self.vip_rooms[2].id])
+        self.assertFalse(dinner['fully_booked'])
+
+    def test_calendar_rejects_long_ranges(self):
+        response = self.client.get('/api/reservations/check/calendar/', {'start': '2026-01-01', 'end': '2026-12-31'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AdminReservationListTests(TestCase):
+    """ The staff list must not issue a Customer or User lookup per row """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('reception', password='x')
+        hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=500)
+        Customer.objects.create(name="Repeat Guest", phone="09171234567", no_show_count=2)
+        # The phone book sync runs once the bookings commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            for i in range(10):
+                Reservation.objects.create(
+                    customer_name=f"Guest {i}", customer_contact="+63 917 123 4567" if i % 2 else f"0918000000{i}",
+                    dining_area=hall, date=date(2026, 5, 1), session='LUNCH', time=time(11, 0), pax=2,
+                    encoded_by=cls.staff, last_modified_by=cls.staff,
+                )
+
+    def test_query_count_is_constant(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        # Reservations joined with area, customer and users; linked rows need no phone lookups
+        with self.assertNumQueries(1):
+            response = client.get('/api/reservations/manage/')
+
+        self.assertEqual(len(response.data['results']), 10)
+        by_name = {row['customer_name']: row for row in response.data['results']}
+        self.assertEqual(by_name['Guest 1']['customer_no_show_count'], 2)
+        self.assertEqual(by_name['Guest 2']['customer_no_show_count'], 0)
+        self.assertEqual(by_name['Guest 1']['encoded_by_name'], 'reception')
+        self.assertEqual(by_name['Guest 1']['room_name'], 'Main Dining Hall')
+
+    def test_unlinked_rows_fall_back_to_one_phone_lookup(self):
+        Reservation.objects.update(customer=None)
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        # 1. Reservations  2. Customers for every phone on the page
+        with self.assertNumQueries(2):
+            response = client.get('/api/reservations/manage/')
+        by_name = {row['customer_name']: row for row in response.data['results']}
+        self.assertEqual(by_name['Guest 1']['customer_no_show_count'], 2)
+
+    def test_list_is_paginated_newest_first(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        first = client.get('/api/reservations/manage/', {'page_size': 6}).data
+        self.assertEqual([row['customer_name'] for row in first['results']], [f"Guest {i}" for i in range(9, 3, -1)])
+        rest = client.get(first['next']).data
+        self.assertEqual(len(rest['results']), 4)
+        self.assertIsNone(rest['next'])
+
+        guest = Reservation.objects.get(customer_name="Guest 3")
+        found = client.get('/api/reservations/manage/', {'search': str(guest.pk)}).data['results']
+        self.assertIn(guest.pk, [row['id'] for row in found])
+
+    def test_backfill_links_existing_reservations(self):
+        repeat = Customer.objects.get(phone="09171234567")
+        Reservation.objects.update(customer=None)
+        call_command('backfill_reservation_customers', batch_size=3, stdout=StringIO())
+
+        self.assertFalse(Reservation.objects.filter(customer__isnull=True).exists())
+        self.assertEqual(repeat.reservations.count(), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CustomerSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=500)
+        cls.regular = Customer.objects.create(name="Regular", phone="09171234567")
+
+    def setUp(self):
+        cache.clear()
+
+    def book(self, name, contact, email=None):
+        return Reservation.objects.create(
+            customer_name=name, customer_contact=contact, customer_email=email, dining_area=self.hall,
+            date=date(2026, 5, 1), session='LUNCH', time=time(11, 0), pax=2,
+        )
+
+    def test_bookings_committed_together_share_one_batch_upsert(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bookings = [
+                self.book("Regular's Friend", "+63 917 123 4567", email="regular@example.com"),
+                self.book("New Guest", "09180000001"),
+                self.book("New Guest", "0918 000 0001"),
+                self.book("Walk-in", "c/o Evelyn"),
+            ]
+            self.assertTrue(all(r.customer_sync_pending for r in bookings))
+
+        for reservation in bookings:
+            reservation.refresh_from_db()
+            self.assertFalse(reservation.customer_sync_pending)
+        self.regular.refresh_from_db()
+        self.assertEqual(self.regular.name, "Regular")
+        self.assertEqual(self.regular.email, "regular@example.com")
+        self.assertEqual(bookings[0].customer, self.regular)
+        self.assertEqual(bookings[1].customer, bookings[2].customer)
+        self.assertEqual(bookings[1].customer.phone, "09180000001")
+        self.assertEqual(bookings[3].customer.care_of, "c/o Evelyn")
+        self.assertEqual(Customer.objects.count(), 3)
+
+    def test_duplicate_care_of_entries_do_not_block_the_queue(self):
+        first = Customer.objects.create(name="Ana", care_of="c/o Evelyn")
+        Customer.objects.create(name="Ana", care_of="c/o Evelyn")
+        care_of = self.book("Ana", "c/o Evelyn")
+        phone = self.book("Later Guest", "09171112222")
+
+        sync_reservation_customers()
+
+        care_of.refresh_from_db()
+        phone.refresh_from_db()
+        self.assertEqual(care_of.customer, first)
+        self.assertEqual(phone.customer.phone, "09171112222")
+        self.assertFalse(Reservation.objects.filter(customer_sync_pending=True).exists())
+
+    def test_only_new_bookings_and_contact_changes_are_synced(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book("Guest", "09170000000")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'CONFIRMED'
+            booking.save()
+            booking.reminder_sent = True
+            booking.save(update_fields=['reminder_sent'])
+        self.assertFalse(Reservation.objects.get(pk=booking.pk).customer_sync_pending)
+        self.assertEqual(Customer.objects.count(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.customer_contact = "09179999999"
+            booking.save(update_fields=['customer_contact'])
+        booking.refresh_from_db()
+        self.assertEqual(booking.customer.phone, "09179999999")
+
+    def test_stale_copy_keeps_the_link_a_sync_wrote(self):
+        booking = self.book("Regular", "09171234567")
+        stale = Reservation.objects.get(pk=booking.pk)  # e.g. staff editing during the sync countdown
+        sync_reservation_customers()
+
+        stale.status = 'CONFIRMED'
+        stale.save()
+        booking.refresh_from_db()
+        self.assertEqual(booking.customer, self.regular)
+        self.assertEqual(booking.status, 'CONFIRMED')
+
+        booking.customer = None  # Unlinking on purpose still works
+        booking.save()
+        self.assertIsNone(Reservation.objects.get(pk=booking.pk).customer)
+
+    def test_bookings_from_before_the_link_are_queued_for_the_sync(self):
+        legacy = self.book("Regular", "0917 123 4567")
+        Reservation.objects.filter(pk=legacy.pk).update(customer=None, customer_sync_pending=False)
+
+        import_module('reservations.migrations.0024_queue_legacy_customer_links').queue_unlinked_bookings(django_apps, None)
+        sync_reservation_customers()
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.customer, self.regular)
+
+    def test_saving_a_deleted_booking_inserts_it_again(self):
+        booking = self.book("Guest", "09170000000")
+        stale = Reservation.objects.get(pk=booking.pk)
+        booking.delete()
+
+        stale.save()
+        self.assertTrue(Reservation.objects.filter(pk=stale.pk).exists())
+
+
+class DailyRollupTests(TestCase):
+    """ Rollups maintained by reservation writes must match a full rebuild, and feed the owner report """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=200)
+        cls.vip = DiningArea.objects.create(name="VIP Room 1", area_type='VIP', capacity=12)
+        cls.owner = User.objects.create_user('owner', password='x')
+        cls.owner.groups.add(Group.objects.create(name='Owner'))
+
+    def book(self, area, pax, day=None, status='CONFIRMED'):
+        return Reservation.objects.create(
+            customer_name="Guest", customer_contact="09170000000", dining_area=area,
+            date=day or date.today(), session='DINNER', time=time(18, 0), pax=pax, status=status,
+        )
+
+    def snapshot(self):
+        return list(DailyReservationRollup.objects.filter(bookings__gt=0).values(
+            'date', 'session', 'area_type', 'bookings', 'pax', 'vip_rooms', 'estimated_revenue'
+        ))
+
+    def test_incremental_matches_rebuild(self):
+        today = date.today()
+        moved = self.book(self.hall, 4)
+        self.book(self.hall, 6, status='CANCELLED')
+        vip = self.book(self.vip, 10, day=today - timedelta(days=3))
+        deleted = self.book(self.hall, 2)
+
+        moved.dining_area = self.vip
+        moved.date = today - timedelta(days=1)
+        moved.save()
+        vip.status = 'NO_SHOW'
+        vip.save()
+        vip.status = 'SEATED'
+        vip.pax = 11
+        vip.save()
+        deleted.delete()
+
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(len(incremental), 2)
+
+    def test_scheduled_reconcile_repairs_writes_that_skip_save(self):
+        today = date.today()
+        cancelled = self.book(self.hall, 4)
+        resized = self.book(self.vip, 10, day=today + timedelta(days=2))
+        old = self.book(self.hall, 3, day=today - timedelta(days=200))
+
+        Reservation.objects.filter(pk__in=[cancelled.pk, old.pk]).update(status='CANCELLED')
+        resized.pax = 8
+        Reservation.objects.bulk_update([resized], ['pax'])
+        DiningArea.objects.filter(pk=self.hall.pk).update(area_type='VIP')
+        self.book(self.hall, 5)
+        drifted = self.snapshot()
+
+        # Today's hall row (its one booking cancelled) and the resized room's row
+        self.assertEqual(reconcile_daily_rollups(), "Repaired 2 daily rollup rows.")
+        self.assertEqual(reconcile_daily_rollups(), "Repaired 0 daily rollup rows.")
+        reconciled = self.snapshot()
+        self.assertNotEqual(drifted, reconciled)
+        # Days outside the window are left to backfill_rollups
+        self.assertIn(today - timedelta(days=200), [row['date'] for row in reconciled])
+        rebuild_rollups(today - timedelta(days=30), today + timedelta(days=60))
+        self.assertEqual(reconciled, self.snapshot())
+
+    def test_owner_report_reads_rollups(self):
+        self.book(self.hall, 4)
+        self.book(self.vip, 10)
+        self.book(self.hall, 3, day=date.today() - timedelta(days=200))
+
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        # 1. Permission check  2. Per-day rollups  3. All-time bookings  4. Customer totals
+        with self.assertNumQueries(4):
+            response = client.get('/api/reservations/reports/', {'days': 365})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['chart_data']), 365)
+        self.assertEqual(response.data['today'], {
+            "bookings": 2, "pax": 14, "vip_rooms_occupied": 1, "estimated_revenue": "₱21,000"
+        })
+        self.assertEqual(response.data['all_time']['total_bookings'], 3)
+        self.assertEqual(response.data['chart_data'][-201]['pax'], 3)
+        self.assertEqual(client.get('/api/reservations/reports/', {'days': 0}).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AdmissionControlTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=10)
+        cls.vip = DiningArea.objects.create(name="VIP Room 1", area_type='VIP', capacity=12)
+        cls.day = date(2026, 5, 1)
+
+    def book(self, area, pax, session='DINNER', **fields):
+        return Reservation.objects.create(
+            customer_name="Guest", customer_contact="09170000000", dining_area=area,
+            date=self.day, session=session, time=time(18, 0), pax=pax, **fields
+        )
+
+    def booked_pax(self, session='DINNER'):
+        return HallSeatLedger.objects.get(dining_area=self.hall, date=self.day, session=session).booked_pax
+
+    def test_hall_seats_are_claimed_released_and_moved(self):
+        first = self.book(self.hall, 6)
+        self.book(self.hall, 4, session='LUNCH')
+        with self.assertRaisesMessage(ValidationError, "Only 4 seats left in the Hall."):
+            self.book(self.hall, 5)
+        self.assertEqual(self.booked_pax(), 6)
+
+        first.pax = 8
+        first.save()
+        self.assertEqual(self.booked_pax(), 8)
+
+        first.session = 'LUNCH'
+        with self.assertRaises(ValidationError):  # 4 + 8 > 10 at lunch
+            first.save()
+        first.refresh_from_db()
+        self.assertEqual((first.session, self.booked_pax(), self.booked_pax('LUNCH')), ('DINNER', 8, 4))
+
+        first.status = 'CANCELLED'
+        first.save()
+        self.assertEqual(self.booked_pax(), 0)
+        first.delete()
+        self.assertEqual(self.booked_pax(), 0)
+
+    def test_ledger_starts_from_existing_bookings(self):
+        self.book(self.hall, 7)
+        HallSeatLedger.objects.all().delete()  # e.g. bookings made before the ledger existed
+        with self.assertRaises(ValidationError):
+            self.book(self.hall, 4)
+        self.book(self.hall, 3)
+        self.assertEqual(self.booked_pax(), 10)
+
+    def test_hall_with_shared_sessions_cannot_become_a_vip_room(self):
+        self.book(self.hall, 4)
+        self.book(self.hall, 3)
+        self.hall.area_type = 'VIP'
+        with self.assertRaisesMessage(ValidationError, "2 live bookings"):
+            self.hall.full_clean()
+        with self.assertRaises(ValidationError):
+            self.hall.save()
+        self.hall.refresh_from_db()
+        self.assertEqual(self.hall.area_type, 'HALL')
+
+    def test_finished_shared_sessions_do_not_block_a_vip_conversion(self):
+        Reservation.objects.filter(pk__in=[self.book(self.hall, 4).pk, self.book(self.hall, 3).pk]).update(status='COMPLETED')
+        self.hall.area_type = 'VIP'
+        self.hall.full_clean()
+        self.hall.save()
+        self.assertEqual(Reservation.objects.filter(is_private_room=True).count(), 2)
+
+    def test_ledger_drift_is_reconciled(self):
+        first = self.book(self.hall, 4)
+        self.book(self.hall, 3)
+        Reservation.objects.filter(pk=first.pk).update(pax=6)  # Skips save() and the ledger
+        self.assertEqual(self.booked_pax(), 7)
+
+        self.assertEqual(reconcile_hall_ledger(self.day, self.day), 1)
+        self.assertEqual(self.booked_pax(), 9)
+        self.assertEqual(reconcile_hall_ledger(self.day, self.day), 0)
+        with self.assertRaisesMessage(ValidationError, "Only 1 seats left in the Hall."):
+            self.book(self.hall, 2)
+
+    def test_deleting_a_booking_without_a_ledger_row_releases_it_once(self):
+        big = self.book(self.hall, 6)
+        self.book(self.hall, 3)
+        HallSeatLedger.objects.all().delete()
+        big.delete()
+        self.assertEqual(self.booked_pax(), 3)
+        with self.assertRaises(ValidationError):
+            self.book(self.hall, 8)
+
+    def test_database_rejects_a_second_live_vip_booking(self):
+        self.book(self.vip, 8, status='CANCELLED')
+        booking = self.book(self.vip, 8)
+        self.assertTrue(booking.is_private_room)
+
+        # bulk_create skips clean(), as a request racing past the check would
+        clash = Reservation(
+            customer_name="Racer", customer_contact="09171111111", dining_area=self.vip,
+            date=self.day, session='DINNER', time=time(19, 0), pax=4, is_private_room=True,
+        )
+        with self.assertRaises(IntegrityError):
+            Reservation.objects.bulk_create([clash])
+
+    def test_api_reports_full_hall_as_validation_error(self):
+        self.book(self.hall, 9)
+        response = APIClient().post('/api/reservations/create/', {
+            'customer_name': "Guest", 'customer_contact': "09170000000", 'dining_area': self.hall.id,
+            'date': self.day, 'session': 'DINNER', 'time': '18:00', 'pax': 3,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pax', response.data)
+
+
+    def test_non_scheduling_saves_skip_the_booking_checks(self):
+        booking = self.book(self.vip, 8, status='PENDING')
+        hall_booking = self.book(self.hall, 4)
+
+        def booking_queries(action):
+            with CaptureQueriesContext(connection) as ctx:
+                action()
+            return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and (
+                'reservations_reservation' in q['sql'] or 'reservations_hallseatledger' in q['sql']
+            )]
+
+        booking.reminder_sent = True
+        self.assertEqual(booking_queries(lambda: booking.save(update_fields=['reminder_sent'])), [])
+        booking.status = 'CONFIRMED'
+        self.assertEqual(booking_queries(booking.save), [])
+        hall_booking.status = 'SEATED'
+        self.assertEqual(booking_queries(hall_booking.save), [])
+
+        # Reviving a cancelled booking is checked again
+        booking.status = 'CANCELLED'
+        booking.save()
+        self.book(self.vip, 6)
+        booking.status = 'CONFIRMED'
+        with self.assertRaises(ValidationError):
+            booking.save()
+
+
+@override_settings(CACHES=LOCMEM_CACHE, CELERY_TASK_ALWAYS_EAGER=True)
+class RoomAssignmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=10)
+        cls.small_cheap = DiningArea.objects.create(name="VIP Room 2", area_type='VIP', capacity=8, price=20000)
+        cls.small = DiningArea.objects.create(name="VIP Room 5", area_type='VIP', capacity=8, price=30000)
+        cls.large = DiningArea.objects.create(name="VIP Room 11", area_type='VIP', capacity=12, price=30000, min_pax=9)
+        cls.day = date(2026, 5, 1)
+
+    def bot_booking(self, pax, area_type='VIP'):
+        response = APIClient().post('/api/reservations/bot-webhook/', {
+            'name': "Messenger Guest", 'contact': "09170000000", 'date': str(self.day),
+            'session': 'DINNER', 'pax': pax, 'area_type': area_type,
+        }, format='json', HTTP_X_BOT_TOKEN='GoldenBaySecureBot2026!')
+        self.assertEqual(response.status_code, 200)
+        return response.data['messages'][0]['text']
+
+    def test_best_fit_by_capacity_then_price_then_hall(self):
+        self.assertIn("VIP Room 2", self.bot_booking(6))
+        self.assertIn("VIP Room 5", self.bot_booking(6))
+        # VIP Room 11 is kept for parties of 9+ (min_pax), so the next party goes to the hall
+        self.assertIn("Main Dining Hall", self.bot_booking(6))
+        self.assertIn("VIP Room 11", self.bot_booking(10))
+        self.assertIn("fully booked", self.bot_booking(5, area_type='HALL'))
+        self.assertIn("large enough", self.bot_booking(30))
+
+    def test_larger_rooms_are_kept_for_larger_parties(self):
+        room_6 = DiningArea.objects.create(name="VIP Room 6", area_type='VIP', capacity=20, price=50000)
+        DiningArea.objects.filter(pk=self.large.pk).update(min_pax=1)  # Admin data is not what decides
+
+        self.assertIn("VIP Room 2", self.bot_booking(2))
+        self.assertIn("VIP Room 5", self.bot_booking(2))
+        self.assertIn("Main Dining Hall", self.bot_booking(2))  # Not the 12- or 20-seat rooms
+        self.assertIn(room_6.name, self.bot_booking(14))
+        self.assertEqual(DiningArea.objects.get(pk=room_6.pk).min_pax, 1)
+
+    def test_room_taken_after_loading_goes_to_next_best(self):
+        with self.assertNumQueries(1):
+            areas = load_assignable_areas(self.day, 'DINNER')
+        # A concurrent Messenger booking takes the best room between the lookup and the insert
+        Reservation.objects.create(
+            customer_name="Other", customer_contact="09171111111", dining_area=self.small_cheap,
+            date=self.day, session='DINNER', time=time(18, 0), pax=4,
+        )
+        reservation = book_best_area(
+            areas, ['VIP', 'HALL'], 6,
+            customer_name="Guest", customer_contact="09170000000", date=self.day, session='DINNER', time=time(18, 0),
+        )
+        self.assertEqual(reservation.dining_area, self.small)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IdempotentBookingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=50)
+        cls.booking = {
+            'customer_name': "Guest", 'customer_contact': "09170000000", 'dining_area': cls.hall.id,
+            'date': '2026-05-01', 'session': 'DINNER', 'time': '18:00', 'pax': 4,
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def create(self, key, **changes):
+        return APIClient().post('/api/reservations/create/', {**self.booking, **changes}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_booking(self):
+        first = self.create('tap-1')
+        retry = self.create('tap-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Reservation.objects.count(), 1)
+
+        self.assertEqual(self.create('tap-2').status_code, 201)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_reused_key_with_different_body_is_rejected(self):
+        self.create('tap-1')
+        self.assertEqual(self.create('tap-1', pax=6).status_code, 422)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_rejected_booking_can_be_retried_with_the_same_key(self):
+        self.assertEqual(self.create('tap-1', pax=60).status_code, 400)
+        # Room freed up (or capacity raised) before the retry: the rejection must not be replayed
+        DiningArea.objects.filter(pk=self.hall.pk).update(capacity=80)
+        retry = self.create('tap-1', pax=60)
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', retry)
+
+    def test_bot_message_redelivery_books_once(self):
+        message = {
+            'message_id': 'm_abc123', 'name': "Messenger Guest", 'contact': "09170000000",
+            'date': '2026-05-01', 'session': 'DINNER', 'pax': 4, 'area_type': 'HALL',
+        }
+        replies = [
+            APIClient().post('/api/reservations/bot-webhook/', message, format='json', HTTP_X_BOT_TOKEN='GoldenBaySecureBot2026!')
+            for _ in range(2)
+        ]
+        self.assertEqual(replies[0].data, replies[1].data)
+        self.assertIn("Success", replies[1].data['messages'][0]['text'])
+        self.assertEqual(Reservation.objects.filter(source='SOCIAL').count(), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Needs row locks across connections (PostgreSQL)")
+@override_settings(CACHES=LOCMEM_CACHE)
+class AdmissionStressTests(TransactionTestCase):
+
+    def test_concurrent_hall_bookings_never_overbook(self):
+        hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=50)
+        vip = DiningArea.objects.create(name="VIP Room 1", area_type='VIP', capacity=12)
+        day = date(2026, 5, 1)
+        start = threading.Barrier(40)
+
+        def book(area, pax, session):
+            start.wait()
+            try:
+                Reservation.objects.create(
+                    customer_name="Guest", customer_contact="09170000000", dining_area=area,
+                    date=day, session=session, time=time(18, 0), pax=pax,
+                )
+            except ValidationError:
+                pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(hall, 3, ('LUNCH', 'DINNER')[i % 2])) for i in range(36)]
+        threads += [threading.Thread(target=book, args=(vip, 8, 'DINNER')) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for session in ('LUNCH', 'DINNER'):
+            seated = sum(Reservation.objects.filter(dining_area=hall, date=day, session=session).values_list('pax', flat=True))
+            self.assertLessEqual(seated, hall.capacity)
+            self.assertEqual(seated, HallSeatLedger.objects.get(dining_area=hall, date=day, session=session).booked_pax)
+        self.assertEqual(Reservation.objects.filter(dining_area=vip).count(), 1)
+
+    def test_reconcile_never_drops_concurrent_bookings(self):
+        hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=500)
+        day = date.today()
+        book_args = dict(customer_name="Guest", customer_contact="09170000000", dining_area=hall,
+                         date=day, session='DINNER', time=time(18, 0), pax=2)
+        Reservation.objects.create(**book_args)
+        start = threading.Barrier(21)
+
+        def book():
+            start.wait()
+            try:
+                Reservation.objects.create(**book_args)
+            finally:
+                connection.close()
+
+        def reconcile():
+            start.wait()
+            try:
+                for _ in range(10):
+                    # Keep the row drifted so every pass recounts it
+                    DailyReservationRollup.objects.filter(date=day).update(vip_rooms=F('vip_rooms') + 1)
+                    reconcile_rollups(day, day)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book) for _ in range(20)] + [threading.Thread(target=reconcile)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The last reconcile pass repaired vip_rooms; no booking's increment may have been overwritten
+        rollup = DailyReservationRollup.objects.get(date=day, session='DINNER', area_type='HALL')
+        self.assertEqual((rollup.bookings, rollup.pax, rollup.vip_rooms), (21, 42, 0))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NewBookingNotificationTests(TestCase):
+
+    def test_refused_guest_email_does_not_block_the_sms_alerts(self):
+        hall = DiningArea.objects.create(name="Main Dining Hall", area_type='HALL', capacity=50)
+        booking = Reservation.objects.create(
+            customer_name="Guest", customer_contact="09170000000", customer_email="typo@exmaple.con", dining_area=hall,
+            date=date(2026, 5, 1), session='DINNER', time=time(18, 0), pax=2,
+        )
+        refused = smtplib.SMTPRecipientsRefused({"typo@exmaple.con": (550, b"No such user")})
+        sms = Mock()
+        with patch.object(dispatcher, 'send_each', return_value=[None, refused]) as send_each, \
+                patch.dict(os.environ, {'ADMIN_PHONE_NUMBERS': '09179990000'}), \
+                patch('reservations.tasks.get_sms_client', return_value=sms), \
+                patch('reservations.tasks.send_sms') as send_sms, \
+                patch.object(Reservation, 'management_token', 'token', create=True):
+            send_new_booking_notifications(booking.id)
+
+        self.assertEqual(len(send_each.call_args.args[0]), 2)
+        sms.send_bulk.assert_called_once()
+        send_sms.assert_called_once()
+
+
+class SMSClientTests(TestCase):
+
+    def setUp(self):
+        self.transport = FakeTransport()
+        self.client = SMSClient(api_key='test', transport=self.transport, verbose=False)
+
+    def test_shared_bodies_are_bulk_submitted(self):
+        self.client.send_many([
+            ('+63 917 000 0001', 'Fully booked tonight'),
+            ('09170000002', 'Fully booked tonight'),
+            ('09170000002', 'Fully booked tonight'),
+            ('09170000003', 'Happy birthday, Ana!'),
+        ])
+        numbers = sorted(call['number'] for call in self.transport.calls)
+        self.assertEqual(numbers, ['09170000001,09170000002', '09170000003'])
+
+    def test_admin_switch_blocks_the_batch(self):
+        self.addCleanup(SystemSetting.invalidate_cache)
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemSetting.objects.create(enable_sms_notifications=False)
+        self.client.send_many([(f'0917000000{i}', f'Hi {i}') for i in range(5)])
+        self.assertEqual(self.transport.calls, [])
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import (AdminReservationDetailView, AdminReservationListView, AvailableRoomsView, 
+from .views import (AdminReservationDetailView, AdminReservationListView, AvailabilityCalendarView, AvailableRoomsView, 
                     AwardPointsView, ChatbotBookingWebhook, CustomerDetailView, CustomerListView, 
                     DashboardStatsView, LeadCaptureView, OwnerReportView, RedeemRewardView, 
                     ReservationCreateView, RewardItemListView, StaffRedemptionListView, 
@@ -7,6 +7,7 @@ from .views import (AdminReservationDetailView, AdminReservationListView, Availa
 
 urlpatterns = [
     path('check/', AvailableRoomsView.as_view(), name='check_availability'),
+    path('check/calendar/', AvailabilityCalendarView.as_view(), name='check_availability_calendar'),
     path('create/', ReservationCreateView.as_view(), name='create_reservation'),
     path('manage-link/<uuid:token>/', ManageBookingByTokenView.as_view(), name='manage_by_token'), # NEW ENDPOINT
     path('dashboard/', DashboardStatsView.as_view(), name='dashboard_stats'),
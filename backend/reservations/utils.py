@@ -1,41 +1,22 @@
-import requests
-import os
-from core.models import SystemSetting
-
-def send_sms(to_number, body):
-    # --- CHECK THE GLOBAL SWITCH FIRST ---
-    
-    settings = SystemSetting.load()
-    if not settings.enable_sms_notifications:
-        print(f"🛑 SMS DISABLED BY ADMIN: Would have sent to {to_number} -> {body}")
-        return {"status": "disabled", "message": "SMS globally disabled in Admin"}
-    # -------------------------------------
-    
-    api_key = os.getenv('SEMAPHORE_API_KEY')
-    if not api_key:
-        print(f"⚠️ SMS LOG (No API Key): To {to_number} - {body}")
-        return
-        
-    # Clean the phone number (remove spaces, dashes, etc.)
-    clean_number = ''.join(filter(str.isdigit, str(to_number)))
-    
-    # Semaphore prefers 0917 format over 63917 for local sending
+def normalize_phone(raw):
+    """ Strips a phone number down to the phone book format (e.g. 09171234567) """
+    clean_number = ''.join(filter(str.isdigit, str(raw)))
     if clean_number.startswith('63') and len(clean_number) == 12:
         clean_number = '0' + clean_number[2:]
+    return clean_number
 
-    url = "https://api.semaphore.co/api/v4/messages"
-    
-    data = {
-        'apikey': api_key,
-        'number': clean_number,
-        'message': body,
-        'sendername': 'GOLDENBAY'
-    }
-    
-    try:
-        response = requests.post(url, data=data, timeout=10)
-        result = response.json()
-        print(f"📲 SMS Sent to {clean_number}: {result}")
-        return result
-    except Exception as e:
-        print(f"❌ SMS Network Error: {e}")
\ No newline at end of file
+def phone_book_key(contact):
+    """
+    The Customer.phone a reservation contact is filed under, or None for
+    'Care Of' contacts (anything containing letters), which are not keyed by phone.
+    """
+    contact_str = str(contact or '').strip()
+    if not contact_str or any(c.isalpha() for c in contact_str):
+        return None
+    # Fallback to the raw string if cleaning wiped it out (e.g. they typed symbols only)
+    return normalize_phone(contact_str) or contact_str
+
+def send_sms(to_number, body):
+    """ Sends one SMS through the shared pooled client (see reservations.sms) """
+    from .sms import get_sms_client
+    return get_sms_client().send(to_number, body)
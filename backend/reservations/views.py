@@ -1,8 +1,9 @@
 import os
-from datetime import date, timedelta
-from django.db.models import Sum
+from datetime import date
+from django.db.models import Q
 from rest_framework import generics, status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.views import APIView
@@ -11,9 +12,14 @@ import math
 from django.db import transaction
 from decimal import Decimal
 
+from core.idempotency import request_fingerprint, run_idempotent
+from .customer_sync import sync_pending_customers
 from .utils import send_sms
+from .availability import get_availability, get_occupancy_matrix
+from .booking_rules import book_best_area, load_assignable_areas
+from .reports import build_owner_report, get_dashboard_stats
 from .models import DiningArea, PointTransaction, Reservation, Customer, RewardItem, RewardRedemption
-from .serializers import AwardPointsSerializer, ReservationSerializer, DiningAreaSerializer, CustomerSerializer, RewardItemSerializer, RewardRedemptionSerializer
+from .serializers import AwardPointsSerializer, ReservationSerializer, CustomerSerializer, RewardItemSerializer, RewardRedemptionSerializer, VIPRoomSerializer
 from .tasks import (
     send_new_booking_notifications,
     send_points_awarded_sms, 
@@ -31,35 +37,50 @@ class AvailableRoomsView(APIView):
         if not date_param or not session:
             return Response({"error": "Date and Session required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        all_areas = DiningArea.objects.filter(is_active=True)
-        bookings = Reservation.objects.filter(date=date_param, session=session).exclude(status__in=['CANCELLED', 'NO_SHOW'])
-
-        results = []
-        for area in all_areas:
-            is_available = True
-            current_pax = 0
-
-            if area.area_type == 'VIP':
-                if bookings.filter(dining_area=area).exists():
-                    is_available = False
-            elif area.area_type == 'HALL':
-                total_pax = bookings.filter(dining_area=area).aggregate(Sum('pax'))['pax__sum'] or 0
-                current_pax = total_pax
-                if total_pax >= area.capacity:
-                    is_available = False
-            
-            data = DiningAreaSerializer(area).data
-            data['is_available'] = is_available
-            data['remaining_capacity'] = area.capacity - current_pax if area.area_type == 'HALL' else 0
-            results.append(data)
+        # Reject junk early so it never reaches the occupancy cache as a key
+        try:
+            date_param = date.fromisoformat(date_param)
+        except ValueError:
+            return Response({"error": "Invalid date"}, status=status.HTTP_400_BAD_REQUEST)
+        if session not in dict(Reservation.SESSION_CHOICES):
+            return Response({"error": "Invalid session"}, status=status.HTTP_400_BAD_REQUEST)
 
+        results = get_availability(date_param, session)
         return Response(results)
 
+class AvailabilityCalendarView(APIView):
+    """ Month view for the booking page: occupancy for every day of a range in one call """
+    MAX_RANGE_DAYS = 62
+
+    def get(self, request):
+        try:
+            start = date.fromisoformat(request.query_params.get('start', ''))
+            end = date.fromisoformat(request.query_params.get('end', ''))
+        except ValueError:
+            return Response({"error": "Start and End dates (YYYY-MM-DD) required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if end < start:
+            return Response({"error": "End date must not be before Start date"}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.MAX_RANGE_DAYS:
+            return Response({"error": f"Range cannot exceed {self.MAX_RANGE_DAYS} days"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(get_occupancy_matrix(start, end))
+
 class ReservationCreateView(generics.CreateAPIView):
+    """ Send an Idempotency-Key header to make retries and double taps return the first booking instead of a new one """
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     permission_classes = [AllowAny] 
 
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return super().create(request, *args, **kwargs)
+        return run_idempotent(
+            'reservation-create', key, request_fingerprint(request.data),
+            lambda: super(ReservationCreateView, self).create(request, *args, **kwargs),
+        )
+
     def perform_create(self, serializer):
         user = self.request.user if self.request.user.is_authenticated else None
         
@@ -84,38 +105,63 @@ class ReservationCreateView(generics.CreateAPIView):
 
 class DashboardStatsView(APIView):
     def get(self, request):
-        today = date.today()
-        pax_today = Reservation.objects.filter(
-            date=today, 
-            status__in=['CONFIRMED', 'SEATED', 'COMPLETED']
-        ).aggregate(Sum('pax'))['pax__sum'] or 0
-        expected_revenue = pax_today * 1500 
-
-        # Generate last 7 days chart data
-        chart_data = []
-        for i in range(6, -1, -1):
-            target_date = today - timedelta(days=i)
-            count = Reservation.objects.filter(date=target_date).count()
-            chart_data.append({
-                "date": target_date.strftime("%b %d"),
-                "bookings": count
-            })
-
-        return Response({
-            "stats": {
-                "today_count": Reservation.objects.filter(date=today).count(),
-                "pending_count": Reservation.objects.filter(status='PENDING').count(),
-                "vip_pax": Reservation.objects.filter(date=today, dining_area__area_type='VIP').aggregate(total=Sum('pax'))['total'] or 0,
-                "revenue": f"₱{expected_revenue:,}"
-            },
-            "chart_data": chart_data, 
-            "recent_bookings": ReservationSerializer(Reservation.objects.all().order_by('-created_at')[:5], many=True).data
-        })
+        # Cached briefly and invalidated by reservation writes, so the polling dashboard rarely touches Postgres
+        return Response(get_dashboard_stats())
     
+class ReservationCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest first: {next, previous, results}.
+    Pages hold 50 bookings by default, up to 200 with ?page_size=.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
 class AdminReservationListView(generics.ListCreateAPIView):
-    queryset = Reservation.objects.all().order_by('-created_at')
+    """
+    Staff reservation list. Supports ?date=, ?date_from=, ?date_to=, ?status= (comma separated),
+    ?session=, ?dining_area=, ?source= and ?search= (name, contact or booking number).
+    """
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated] 
+    pagination_class = ReservationCursorPagination
+
+    def get_queryset(self):
+        queryset = Reservation.objects.select_related('dining_area', 'customer', 'encoded_by', 'last_modified_by').order_by('-created_at', '-id')
+        params = self.request.query_params
+
+        def parse_date(name):
+            try:
+                return date.fromisoformat(params[name])
+            except ValueError:
+                raise ValidationError({name: "Use the YYYY-MM-DD format."})
+
+        if params.get('date'):
+            queryset = queryset.filter(date=parse_date('date'))
+        if params.get('date_from'):
+            queryset = queryset.filter(date__gte=parse_date('date_from'))
+        if params.get('date_to'):
+            queryset = queryset.filter(date__lte=parse_date('date_to'))
+        if params.get('status'):
+            queryset = queryset.filter(status__in=params['status'].split(','))
+        if params.get('session'):
+            queryset = queryset.filter(session=params['session'])
+        if params.get('dining_area'):
+            if not params['dining_area'].isdigit():
+                raise ValidationError({"dining_area": "Must be a dining area id."})
+            queryset = queryset.filter(dining_area_id=params['dining_area'])
+        if params.get('source'):
+            queryset = queryset.filter(source=params['source'])
+
+        search = params.get('search', '').strip()
+        if search:
+            matches = Q(customer_name__icontains=search) | Q(customer_contact__icontains=search)
+            if search.isdigit():
+                matches |= Q(pk=int(search))  # Booking numbers as shown to staff
+            queryset = queryset.filter(matches)
+
+        return queryset
 
 class AdminReservationDetailView(generics.RetrieveUpdateAPIView):
     queryset = Reservation.objects.all()
@@ -160,8 +206,11 @@ class AdminReservationDetailView(generics.RetrieveUpdateAPIView):
 
             # 3. Fire appropriate notification & Logic
             if status_changed and reservation.status == 'COMPLETED':
-                # Track Visit & VIP Status
-                customer = Customer.objects.filter(phone=reservation.customer_contact).first()
+                # Track Visit & VIP Status (filing the booking first if the background sync hasn't yet)
+                if reservation.customer_sync_pending:
+                    sync_pending_customers([reservation.pk])
+                    reservation.refresh_from_db(fields=['customer'])
+                customer = reservation.customer
                 if customer:
                     customer.visit_count += 1
                     if customer.visit_count >= 3: 
@@ -204,12 +253,12 @@ class CustomerDetailView(generics.RetrieveUpdateDestroyAPIView):
          return super().delete(request, *args, **kwargs)
 
 class VIPRoomListView(generics.ListAPIView):
-    serializer_class = DiningAreaSerializer
+    serializer_class = VIPRoomSerializer
     permission_classes = [AllowAny]
     pagination_class = None
 
     def get_queryset(self):
-        return DiningArea.objects.filter(area_type='VIP', is_active=True).order_by('name')
+        return DiningArea.objects.filter(area_type='VIP', is_active=True).prefetch_related('image_derivatives').order_by('name')
     
 
 class ChatbotBookingWebhook(APIView):
@@ -221,113 +270,80 @@ class ChatbotBookingWebhook(APIView):
             return Response({"messages": [{"text": "Unauthorized"}]}, status=401)
 
         data = request.data
-        
-        try:
-            name = data.get('name')
-            contact = data.get('contact')
-            date_str = data.get('date') 
-            
-            # SAFETY CHECK 1: Missing data check
-            if not name or not contact or not date_str:
-                 return Response({"messages": [{"text": "Missing required details (Name, Contact, or Date). Please try again."}]}, status=200)
+        # Messenger redelivers a message until it is acknowledged: the same message id must not book twice
+        key = request.headers.get('Idempotency-Key') or data.get('message_id')
 
-            # SAFETY CHECK 2: Safe integer casting for pax
-            raw_pax = data.get('pax')
-            pax = int(raw_pax) if raw_pax else 2
-            
-            session = data.get('session', 'LUNCH')
-            area_type_request = data.get('area_type', 'HALL')
-            
-            # Smart Time Assignment
-            time_str = data.get('time')
-            if not time_str:
-                time_str = "11:00:00" if session == 'LUNCH' else "17:30:00"
-
-            assigned_area = None
-            transfer_notice = ""
-
-            # --- 1. VIP ROOM LOGIC WITH STRICT PAX BRACKETS ---
-            if area_type_request == 'VIP':
-                suitable_rooms_query = DiningArea.objects.filter(area_type='VIP', is_active=True)
-
-                if pax <= 8:
-                    suitable_rooms_query = suitable_rooms_query.filter(name__in=['VIP Room 2', 'VIP Room 3', 'VIP Room 5', 'VIP Room 7', 'VIP Room 8'])
-                elif 8 < pax <= 12:
-                    suitable_rooms_query = suitable_rooms_query.filter(name__in=['VIP Room 11', 'VIP Room 12', 'VIP Room 15'])
-                elif 12 < pax <= 18:
-                    suitable_rooms_query = suitable_rooms_query.filter(name='VIP Room 10')
-                elif 18 < pax <= 20:
-                    suitable_rooms_query = suitable_rooms_query.filter(name__in=['VIP Room 1', 'VIP Room 9'])
-                elif 20 < pax <= 24:
-                    suitable_rooms_query = suitable_rooms_query.filter(name='VIP Room 6')
-                elif 24 < pax <= 60:
-                    suitable_rooms_query = suitable_rooms_query.filter(name='MANILA VIP Room')
-                else:
-                    return Response({"messages": [{"text": f"Sorry! We don't have a single VIP room large enough for {pax} guests. Please call us at +63 917 580 7166 for banquet options."}]}, status=200)
-
-                for room in suitable_rooms_query.order_by('capacity'):
-                    is_booked = Reservation.objects.filter(
-                        dining_area=room, date=date_str, session=session
-                    ).exclude(status__in=['CANCELLED', 'NO_SHOW']).exists()
-                    
-                    if not is_booked:
-                        assigned_area = room
-                        break
-
-                # FALLBACK: If VIP tier is full, try the Main Hall
-                if not assigned_area:
-                    main_hall = DiningArea.objects.filter(area_type='HALL', is_active=True).first()
-                    if main_hall:
-                        total_pax = Reservation.objects.filter(
-                            dining_area=main_hall, date=date_str, session=session
-                        ).exclude(status__in=['CANCELLED', 'NO_SHOW']).aggregate(Sum('pax'))['pax__sum'] or 0
-                        
-                        if (total_pax + pax) <= main_hall.capacity:
-                            assigned_area = main_hall
-                            transfer_notice = "Note: Our VIP rooms for your guest count are fully booked, so we have secured a table for you in our Main Dining Hall instead. ✨\n\n"
-
-            # --- 2. MAIN HALL LOGIC (Direct request or fallback) ---
-            else:
-                assigned_area = DiningArea.objects.filter(area_type='HALL', is_active=True).first()
-                if assigned_area:
-                    total_pax = Reservation.objects.filter(
-                        dining_area=assigned_area, date=date_str, session=session
-                    ).exclude(status__in=['CANCELLED', 'NO_SHOW']).aggregate(Sum('pax'))['pax__sum'] or 0
-                    
-                    if (total_pax + pax) > assigned_area.capacity:
-                        assigned_area = None
-
-            # --- 3. FULLY BOOKED RESPONSE ---
-            if not assigned_area:
-                return Response({
-                    "messages": [
-                        {
-                            "text": f"We are sorry! We are fully booked for {session} on {date_str}. Would you like to check another date?",
-                            "quick_replies": [
-                                {"content_type": "text", "title": "Check Another Date", "payload": "RESTART"},
-                                {"content_type": "text", "title": "View Menu", "payload": "MENU"}
-                            ]
-                        }
-                    ]
-                }, status=200)
-
-            # --- 4. CREATE RESERVATION ---
-            reservation = Reservation.objects.create(
-                customer_name=name, customer_contact=contact, date=date_str,
-                session=session, time=time_str, pax=pax, dining_area=assigned_area,
-                source='SOCIAL', status='PENDING' 
+        try:
+            if not key:
+                return self.book(data)
+            return run_idempotent(
+                'bot-booking', str(key), request_fingerprint(data), lambda: self.book(data),
+                in_progress=Response({"messages": [{"text": "We're still securing your table, one moment please. ⏳"}]}, status=200),
             )
-
-            send_new_booking_notifications.delay(reservation.id)
-
-            display_time = "11:00 AM" if session == 'LUNCH' else "5:30 PM"
-            success_msg = f"{transfer_notice}Success! 🎉 Your table for {pax} on {date_str} at {display_time} in {assigned_area.name} is reserved. Ref: #{reservation.id}"
-            
-            return Response({"messages": [{"text": success_msg}]}, status=200)
-
         except Exception as e:
             print(f"Chatbot Webhook Error: {e}") 
             return Response({"messages": [{"text": "Something went wrong. Please try again or call us at +63 917 580 7166."}]}, status=200)
+
+    def book(self, data):
+        name = data.get('name')
+        contact = data.get('contact')
+        date_str = data.get('date') 
+        
+        # SAFETY CHECK 1: Missing data check
+        if not name or not contact or not date_str:
+             return Response({"messages": [{"text": "Missing required details (Name, Contact, or Date). Please try again."}]}, status=200)
+
+        # SAFETY CHECK 2: Safe integer casting for pax
+        raw_pax = data.get('pax')
+        pax = int(raw_pax) if raw_pax else 2
+        
+        session = data.get('session', 'LUNCH')
+        area_type_request = data.get('area_type', 'HALL')
+        
+        # Smart Time Assignment
+        time_str = data.get('time')
+        if not time_str:
+            time_str = "11:00:00" if session == 'LUNCH' else "17:30:00"
+
+        # --- 1. ROOM ASSIGNMENT: all rooms and their occupancy in one query, best fit by capacity and price ---
+        areas = load_assignable_areas(date_str, session)
+        area_types = ['VIP', 'HALL'] if area_type_request == 'VIP' else ['HALL']
+
+        if area_type_request == 'VIP' and not any(a.area_type == 'VIP' and a.capacity >= pax for a in areas):
+            return Response({"messages": [{"text": f"Sorry! We don't have a single VIP room large enough for {pax} guests. Please call us at +63 917 580 7166 for banquet options."}]}, status=200)
+
+        # --- 2. CREATE RESERVATION (falls back to the Main Hall when the VIP rooms are full) ---
+        reservation = book_best_area(
+            areas, area_types, pax,
+            customer_name=name, customer_contact=contact, date=date_str,
+            session=session, time=time_str, source='SOCIAL', status='PENDING'
+        )
+
+        # --- 3. FULLY BOOKED RESPONSE ---
+        if not reservation:
+            return Response({
+                "messages": [
+                    {
+                        "text": f"We are sorry! We are fully booked for {session} on {date_str}. Would you like to check another date?",
+                        "quick_replies": [
+                            {"content_type": "text", "title": "Check Another Date", "payload": "RESTART"},
+                            {"content_type": "text", "title": "View Menu", "payload": "MENU"}
+                        ]
+                    }
+                ]
+            }, status=200)
+
+        assigned_area = reservation.dining_area
+        transfer_notice = ""
+        if area_type_request == 'VIP' and assigned_area.area_type == 'HALL':
+            transfer_notice = "Note: Our VIP rooms for your guest count are fully booked, so we have secured a table for you in our Main Dining Hall instead. ✨\n\n"
+
+        send_new_booking_notifications.delay(reservation.id)
+
+        display_time = "11:00 AM" if session == 'LUNCH' else "5:30 PM"
+        success_msg = f"{transfer_notice}Success! 🎉 Your table for {pax} on {date_str} at {display_time} in {assigned_area.name} is reserved. Ref: #{reservation.id}"
+        
+        return Response({"messages": [{"text": success_msg}]}, status=200)
         
 class LeadCaptureView(APIView):
     """ Public endpoint for the frontend VIP Perk Widget """
@@ -392,7 +408,7 @@ class LeadCaptureView(APIView):
     
 class RewardItemListView(generics.ListAPIView):
     """ Public endpoint to list all available rewards """
-    queryset = RewardItem.objects.filter(is_active=True).order_by('points_required')
+    queryset = RewardItem.objects.filter(is_active=True).prefetch_related('image_derivatives').order_by('points_required')
     serializer_class = RewardItemSerializer
     permission_classes = [AllowAny]
 
@@ -563,58 +579,21 @@ class StaffRedemptionUpdateView(generics.UpdateAPIView):
 
 class OwnerReportView(APIView):
     permission_classes = [IsAuthenticated]
+    MAX_DAYS = 366
 
     def get(self, request):
         user = request.user
         if not (user.is_superuser or user.groups.filter(name__in=['Owner', 'Admin']).exists()):
             raise PermissionDenied("Only Owners and Admins can view financial reports.")
-        today = date.today()
-        
-        # 1. Today's Metrics
-        today_active_res = Reservation.objects.filter(date=today).exclude(status__in=['CANCELLED', 'NO_SHOW'])
-        today_bookings = today_active_res.count()
-        today_pax = today_active_res.aggregate(Sum('pax'))['pax__sum'] or 0
-        today_vip_rooms = today_active_res.filter(dining_area__area_type='VIP').count()
-        expected_revenue = today_pax * 1500  # Estimate: 1500 PHP per head
-
-        # 2. All-Time Metrics
-        total_customers = Customer.objects.count()
-        total_vip_customers = Customer.objects.filter(is_vip=True).count()
-        total_bookings = Reservation.objects.exclude(status__in=['CANCELLED', 'NO_SHOW']).count()
-        total_points_in_circulation = Customer.objects.aggregate(Sum('points_balance'))['points_balance__sum'] or 0
-
-        # 3. 30-Day Trend Chart
-        chart_data = []
-        for i in range(29, -1, -1):
-            target_date = today - timedelta(days=i)
-            day_res = Reservation.objects.filter(date=target_date).exclude(status__in=['CANCELLED', 'NO_SHOW'])
-            
-            # Count bookings and pax for that specific day
-            b_count = day_res.count()
-            p_count = day_res.aggregate(Sum('pax'))['pax__sum'] or 0
-            
-            chart_data.append({
-                "date": target_date.strftime("%b %d"),
-                "bookings": b_count,
-                "pax": p_count,
-                "revenue": p_count * 1500
-            })
-
-        return Response({
-            "today": {
-                "bookings": today_bookings,
-                "pax": today_pax,
-                "vip_rooms_occupied": today_vip_rooms,
-                "estimated_revenue": f"₱{expected_revenue:,}"
-            },
-            "all_time": {
-                "total_customers": total_customers,
-                "total_vip_customers": total_vip_customers,
-                "total_bookings": total_bookings,
-                "points_liability": total_points_in_circulation
-            },
-            "chart_data": chart_data
-        })
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({"error": "days must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= self.MAX_DAYS:
+            return Response({"error": f"days must be between 1 and {self.MAX_DAYS}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Served from DailyReservationRollup, so a year costs the same handful of queries as a month
+        return Response(build_owner_report(days))
     
 class ManageBookingByTokenView(APIView):
     """ Allows guests to view and cancel their booking using their secure email link """
@@ -0,0 +1,26 @@
+// src/components/layout/ResponsiveImage.jsx
+const BACKEND_URL = import.meta.env.PROD ? window.location.origin : "http://127.0.0.1:8000";
+
+// AVIF first: browsers take the first <source> whose type they can decode
+const FORMATS = [['avif', 'image/avif'], ['webp', 'image/webp']];
+
+const absolute = (url) => (url.startsWith('http') ? url : `${BACKEND_URL}${url}`);
+
+// The API's srcset is {format: "url 320w, url 640w, ..."}; urls may be relative like `image`
+const absoluteSrcset = (srcset) => srcset.split(', ').map(absolute).join(', ');
+
+/**
+ * Renders an API image through its resized variants, falling back to the original upload.
+ * `sizes` should describe the rendered width so phones pick the small variant.
+ * The <picture> is display: contents, so className sizes the <img> just like a plain one.
+ */
+const ResponsiveImage = ({ src, srcset, sizes = '100vw', ...props }) => (
+  <picture className="contents">
+    {FORMATS.filter(([format]) => srcset?.[format]).map(([format, type]) => (
+      <source key={format} type={type} srcSet={absoluteSrcset(srcset[format])} sizes={sizes} />
+    ))}
+    <img src={absolute(src)} {...props} />
+  </picture>
+);
+
+export default ResponsiveImage;
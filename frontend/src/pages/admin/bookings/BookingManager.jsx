@@ -6,7 +6,7 @@ import { canCancelBooking, getUserRole } from '../../../utils/auth';
 import Calendar from 'react-calendar';
 import 'react-calendar/dist/Calendar.css';
 import { format, addDays, subDays, isToday, parseISO } from 'date-fns';
-import axiosInstance from '../../../utils/axiosInstance';
+import axiosInstance, { fetchAllPages } from '../../../utils/axiosInstance';
 import { useLocation } from 'react-router-dom';
 
 const BookingManager = () => {
@@ -24,14 +24,31 @@ const BookingManager = () => {
   const [isCheckingRooms, setIsCheckingRooms] = useState(false);
   const [loading, setLoading] = useState(true);
   const latestBookingId = useRef(null);
+  const fetchSeq = useRef(0);
 
+  const formattedSelectedDate = format(selectedDate, 'yyyy-MM-dd');
+  const isSearching = searchQuery.trim() !== '';
+  const isViewingGlobalPending = filter === 'PENDING';
+
+  // The list is paginated server side: only load what this view shows (a search, all pending, or one day)
   const fetchBookings = async () => {
+    const params = { page_size: 200 };
+    if (isSearching) params.search = searchQuery.trim();
+    else if (isViewingGlobalPending) params.status = 'PENDING';
+    else params.date = formattedSelectedDate;
+
+    const seq = ++fetchSeq.current;
     try {
-      const res = await axiosInstance.get('/api/reservations/manage/');
-      const fetchedBookings = res.data;
-      
-      if (fetchedBookings.length > 0) {
-        const maxId = Math.max(...fetchedBookings.map(b => b.id));
+      const [fetchedBookings, newest] = await Promise.all([
+        // A search has no date to bound it: show only the newest page of matches
+        fetchAllPages('/api/reservations/manage/', params, isSearching ? 1 : 10),
+        // Newest booking on any date, for the new-booking bell
+        axiosInstance.get('/api/reservations/manage/', { params: { page_size: 1 } }),
+      ]);
+      if (seq !== fetchSeq.current) return; // The view changed while this was loading
+
+      const maxId = newest.data.results[0]?.id;
+      if (maxId !== undefined) {
         if (latestBookingId.current !== null && maxId > latestBookingId.current) {
             const bell = new Audio('/audio/bell.mp3');
             bell.play().catch(e => console.log("Audio blocked. Staff must click the page first.", e));
@@ -49,10 +66,11 @@ const BookingManager = () => {
   };
 
   useEffect(() => {
-    fetchBookings();
+    // Typing in the search box waits for a pause before querying
+    const timeout = setTimeout(() => { fetchBookings(); }, isSearching ? 300 : 0);
     const interval = setInterval(() => { fetchBookings(); }, 30000);
-    return () => clearInterval(interval); 
-  }, []);
+    return () => { clearTimeout(timeout); clearInterval(interval); };
+  }, [formattedSelectedDate, filter, searchQuery]);
 
   const checkEditRooms = async (date, session) => {
     setIsCheckingRooms(true);
@@ -106,10 +124,6 @@ const BookingManager = () => {
       updateStatus(id, {status: 'CANCELLED'}, "Cancelled!", e);
   };
 
-  const formattedSelectedDate = format(selectedDate, 'yyyy-MM-dd');
-  const isSearching = searchQuery.trim() !== '';
-  const isViewingGlobalPending = filter === 'PENDING';
-
   const filteredBookings = bookings.filter(b => {
       const matchesSearch = isSearching ? (
           b.customer_name.toLowerCase().includes(searchQuery.toLowerCase()) || 
@@ -1,8 +1,8 @@
 import React, { useEffect, useState } from 'react';
-import { Users, Crown, CalendarCheck, DoorOpen, BarChart3, TrendingUp, DollarSign, Gift, MapPin, Clock, CheckCircle2, XCircle, Flag } from 'lucide-react';
+import { Users, Crown, CalendarCheck, DoorOpen, BarChart3, TrendingUp, DollarSign, Gift, MapPin, Clock } from 'lucide-react';
 import { AreaChart, Area, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 import toast from 'react-hot-toast';
-import axiosInstance from '../../../utils/axiosInstance';
+import axiosInstance, { fetchAllPages } from '../../../utils/axiosInstance';
 
 const StatCard = ({ title, value, icon: Icon, colorClass, subtitle }) => (
   <div className="bg-white p-5 rounded-xl border border-gray-200 shadow-sm flex flex-col justify-between relative overflow-hidden h-full">
@@ -24,44 +24,27 @@ const OwnerDashboardPage = () => {
   const [data, setData] = useState(null);
   const [todayBookings, setTodayBookings] = useState([]);
   
-  // New state for all-time booking status totals
-  const [bookingStats, setBookingStats] = useState({
-    confirmed: 0,
-    completed: 0,
-    noShow: 0,
-    cancelled: 0,
-  });
-  
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        // Fetch both reports and today's schedule concurrently for speed
-        const [reportsRes, bookingsRes] = await Promise.all([
+        // Get today's date in YYYY-MM-DD format based on local timezone
+        const d = new Date();
+        const todayStr = `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+
+        // Fetch both reports and today's active schedule concurrently for speed
+        const [reportsRes, todayRes] = await Promise.all([
           axiosInstance.get('/api/reservations/reports/'),
-          axiosInstance.get('/api/reservations/manage/')
+          fetchAllPages('/api/reservations/manage/', {
+            date: todayStr, status: 'PENDING,CONFIRMED,SEATED,COMPLETED', page_size: 200
+          })
         ]);
         
         setData(reportsRes.data);
 
-        // Calculate all-time status totals directly from the bookings array
-        const allBookings = bookingsRes.data;
-        setBookingStats({
-          confirmed: allBookings.filter(b => b.status === 'CONFIRMED').length,
-          completed: allBookings.filter(b => b.status === 'COMPLETED').length,
-          noShow: allBookings.filter(b => b.status === 'NO_SHOW').length,
-          cancelled: allBookings.filter(b => b.status === 'CANCELLED').length,
-        });
-
-        // Get today's date in YYYY-MM-DD format based on local timezone
-        const d = new Date();
-        const todayStr = `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
-
-        // Filter bookings to only show today's active reservations, sorted by time
-        const activeToday = allBookings
-          .filter(b => b.date === todayStr && !['CANCELLED', 'NO_SHOW'].includes(b.status))
-          .sort((a, b) => a.time.localeCompare(b.time));
+        // Today's active reservations, sorted by time
+        const activeToday = todayRes.sort((a, b) => a.time.localeCompare(b.time));
 
         setTodayBookings(activeToday);
 
@@ -194,15 +177,6 @@ const OwnerDashboardPage = () => {
         <StatCard title="Points Liability" value={data.all_time.points_liability.toLocaleString()} icon={Gift} colorClass="rose" subtitle="Total unredeemed points in economy" />
       </div>
 
-      {/* ALL-TIME BOOKING ANALYSIS */}
-      <h2 className="text-sm font-bold text-gray-900 uppercase tracking-widest mt-8 border-b border-gray-200 pb-2">All-Time Booking Analysis</h2>
-      <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-5">
-        <StatCard title="Total Confirmed" value={bookingStats.confirmed.toLocaleString()} icon={CalendarCheck} colorClass="blue" subtitle="Awaiting Arrival" />
-        <StatCard title="Total Completed" value={bookingStats.completed.toLocaleString()} icon={CheckCircle2} colorClass="green" subtitle="Successfully Served" />
-        <StatCard title="Total No-Show" value={bookingStats.noShow.toLocaleString()} icon={Flag} colorClass="orange" subtitle="Missed Reservations" />
-        <StatCard title="Total Cancelled" value={bookingStats.cancelled.toLocaleString()} icon={XCircle} colorClass="rose" subtitle="Cancelled by Guest/Staff" />
-      </div>
-
       {/* 30-DAY TREND CHARTS */}
       <h2 className="text-sm font-bold text-gray-900 uppercase tracking-widest mt-8 border-b border-gray-200 pb-2">30-Day Trajectory</h2>
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
@@ -5,6 +5,7 @@ import { motion, AnimatePresence } from 'framer-motion';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
 import html2canvas from 'html2canvas'; 
+import ResponsiveImage from '../../../components/layout/ResponsiveImage';
 
 // Backend configuration
 const BACKEND_URL = import.meta.env.PROD ? window.location.origin : "http://127.0.0.1:8000";
@@ -30,6 +31,7 @@ const CustomerRewardsPage = () => {
         acc[reward.name] = {
           name: reward.name,
           image: reward.image,
+          srcset: reward.srcset,
           description: reward.description,
           options: []
         };
@@ -423,8 +425,10 @@ const CustomerRewardsPage = () => {
                 {/* FIXED ASPECT RATIO IMAGE CONTAINER (4:3) */}
                 <div className="aspect-[4/3] w-full bg-gray-50 relative overflow-hidden border-b border-gray-100 flex items-center justify-center">
                     {group.image ? (
-                    <img 
-                        src={group.image.startsWith('http') ? group.image : `${BACKEND_URL}${group.image}`} 
+                    <ResponsiveImage 
+                        src={group.image}
+                        srcset={group.srcset}
+                        sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" 
                         className="w-full h-full object-cover transition-transform duration-700 group-hover/card:scale-105" 
                         alt={group.name}
                         loading="lazy"
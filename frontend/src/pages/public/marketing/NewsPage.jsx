@@ -4,6 +4,7 @@ import { Calendar } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import heroimage from '../../../assets/images/heroimage2.webp'; 
 import { useLanguage } from '../../../context/LanguageContext';
+import ResponsiveImage from '../../../components/layout/ResponsiveImage';
 
 const BACKEND_URL = import.meta.env.PROD ? window.location.origin : "http://127.0.0.1:8000";
 
@@ -100,9 +101,12 @@ const NewsPage = () => {
             >
                 <Link to={`/news/${post.slug}`} className="block h-64 overflow-hidden relative">
                     {post.image ? (
-                    <img 
-                        src={post.image.startsWith('http') ? post.image : `${BACKEND_URL}${post.image}`} 
+                    <ResponsiveImage 
+                        src={post.image}
+                        srcset={post.srcset}
+                        sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
                         alt={post.title} 
+                        loading="lazy" 
                         className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110" 
                     />
                     ) : (
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { Calendar, ArrowLeft } from 'lucide-react';
 import SEO from '../../../components/seo/SEO';
+import ResponsiveImage from '../../../components/layout/ResponsiveImage';
 
 const BACKEND_URL = import.meta.env.PROD ? window.location.origin : "http://127.0.0.1:8000";
 
@@ -81,7 +82,7 @@ const SinglePostPage = () => {
 
         {imageUrl && (
             <div className="w-full h-[300px] md:h-[500px] mb-12 overflow-hidden rounded-sm border border-gray-200 shadow-lg">
-                <img src={imageUrl} alt={post.title} className="w-full h-full object-cover" />
+                <ResponsiveImage src={imageUrl} srcset={post.srcset} sizes="(min-width: 768px) 768px, 100vw" alt={post.title} className="w-full h-full object-cover" />
             </div>
         )}
 
@@ -6,6 +6,7 @@ import logo from '../../../assets/images/goldenbaylogo.svg';
 import heroimage from '../../../assets/images/heroimage.webp'; 
 import { useLanguage } from '../../../context/LanguageContext';
 import SEO from '../../../components/seo/SEO';
+import ResponsiveImage from '../../../components/layout/ResponsiveImage';
 
 const BACKEND_URL = import.meta.env.PROD ? window.location.origin : "http://127.0.0.1:8000";
 
@@ -105,7 +106,7 @@ const MenuPage = () => {
     >
         <div className="aspect-[4/3] overflow-hidden relative bg-white border-b border-gray-100 flex items-center justify-center">
             {item.image ? (
-                <img src={`${BACKEND_URL}${item.image}`} loading="lazy" className="w-full h-full object-contain transition-transform duration-700 group-hover:scale-105" alt={item.name} />
+                <ResponsiveImage src={item.image} srcset={item.srcset} sizes="(min-width: 1024px) 25vw, (min-width: 768px) 33vw, 50vw" loading="lazy" className="w-full h-full object-contain transition-transform duration-700 group-hover:scale-105" alt={item.name} />
             ) : (
                 <div className="w-full h-full flex flex-col items-center justify-center opacity-10">
                     <img src={logo} className="h-20 w-auto grayscale" alt="placeholder" />
@@ -218,7 +219,7 @@ const MenuPage = () => {
                     >
                       <div className="aspect-[4/3] overflow-hidden relative bg-white border-b border-gray-100 flex items-center justify-center">
                         {item.image ? (
-                          <img src={item.image.startsWith('http') ? item.image : `${BACKEND_URL}${item.image}`} loading="lazy" className="w-full h-full object-contain transition-transform duration-700 group-hover:scale-105" alt={item.name} />
+                          <ResponsiveImage src={item.image} srcset={item.srcset} sizes="(min-width: 1024px) 25vw, (min-width: 768px) 33vw, 50vw" loading="lazy" className="w-full h-full object-contain transition-transform duration-700 group-hover:scale-105" alt={item.name} />
                         ) : (
                           <div className="w-full h-full flex flex-col items-center justify-center opacity-10"><img src={logo} className="h-20 w-auto grayscale" alt="placeholder" /></div>
                         )}
@@ -287,8 +288,10 @@ const MenuPage = () => {
 
                     <div className="w-full md:w-3/5 h-[30vh] md:h-[600px] bg-white relative flex items-center justify-center border-b md:border-b-0 md:border-r border-gray-100">
                         {selectedDish.image ? (
-                            <img 
-                                src={selectedDish.image.startsWith('http') ? selectedDish.image : `${BACKEND_URL}${selectedDish.image}`} 
+                            <ResponsiveImage 
+                                src={selectedDish.image}
+                                srcset={selectedDish.srcset}
+                                sizes="(min-width: 768px) 60vw, 100vw" 
                                 alt={selectedDish.name}
                                 className="w-full h-full object-contain p-4"
                             />
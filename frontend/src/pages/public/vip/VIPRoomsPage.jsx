@@ -5,6 +5,7 @@ import { Users, Mic2, Tv, Armchair, Star } from 'lucide-react';
 import heroimage from '../../../assets/images/heroimage4.webp'; 
 import { useLanguage } from '../../../context/LanguageContext';
 import SEO from '../../../components/seo/SEO';
+import ResponsiveImage from '../../../components/layout/ResponsiveImage';
 
 const BACKEND_URL = import.meta.env.PROD ? window.location.origin : "http://127.0.0.1:8000";
 
@@ -67,7 +68,7 @@ const VIPRoomsPage = () => {
               <motion.div key={room.id} initial={{ opacity: 0, y: 20 }} whileInView={{ opacity: 1, y: 0 }} viewport={{ once: true }} className="group bg-white border border-gray-200 hover:border-gold-400/50 transition-all duration-500 rounded-sm overflow-hidden flex flex-col shadow-sm hover:shadow-lg">
                   <div className="aspect-[4/3] overflow-hidden relative bg-gray-100 border-b border-gray-100">
                   {room.image ? (
-                      <img src={room.image.startsWith('http') ? room.image : `${BACKEND_URL}${room.image}`} className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105" alt={room.name} />
+                      <ResponsiveImage src={room.image} srcset={room.srcset} sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw" loading="lazy" className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105" alt={room.name} />
                   ) : (
                       <div className={`w-full h-full flex flex-col items-center justify-center opacity-20 text-gray-400 uppercase text-xs tracking-widest ${getFontClass()}`}>{t('vip.noImage')}</div>
                   )}
@@ -55,4 +55,15 @@ axiosInstance.interceptors.response.use((response) => {
     return Promise.reject(error);
 });
 
-export default axiosInstance;
\ No newline at end of file
+// Paginated list endpoints answer {next, previous, results}: follows `next` for at most `maxPages` pages
+export const fetchAllPages = async (url, params, maxPages = 10) => {
+    let res = await axiosInstance.get(url, { params });
+    const rows = [...res.data.results];
+    for (let page = 1; page < maxPages && res.data.next; page++) {
+        res = await axiosInstance.get(res.data.next);
+        rows.push(...res.data.results);
+    }
+    return rows;
+};
+
+export default axiosInstance;